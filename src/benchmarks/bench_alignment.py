@@ -0,0 +1,28 @@
+from sunpy.time import TimeRange
+
+from benchmarks.fixtures import fips_file, mag_full_cadence_file
+from hermpy.data import asof_join, parse_messenger_fips, parse_messenger_mag, scan_statistics
+
+TIME_RANGE = TimeRange("2011-05-31T23:59", "2011-06-02T00:01")
+
+
+class MAGFIPSAlignment:
+
+    def setup(self):
+        mag_path, self.rows = mag_full_cadence_file()
+
+        self.mag = parse_messenger_mag([mag_path], TIME_RANGE, as_arrays=True)
+        self.fips = parse_messenger_fips([fips_file()[0]], TIME_RANGE)
+
+    def time_scan_statistics(self):
+        scan_statistics(self.fips, self.mag)
+
+    def time_scan_statistics_streamed(self):
+        # As if the day were split across several files
+        chunk = len(self.mag) // 4 + 1
+        scan_statistics(
+            self.fips, (self.mag[i : i + chunk] for i in range(0, len(self.mag), chunk))
+        )
+
+    def time_asof_join(self):
+        asof_join(self.fips, self.mag, variables=["Mode"])
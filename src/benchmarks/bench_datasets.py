@@ -0,0 +1,56 @@
+import itertools
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from astropy import units as u
+from astropy.table import QTable
+
+from benchmarks.fixtures import DAY_OF_YEAR, YEAR, fips_file, mag_full_cadence_file
+from hermpy.data import InstantEventList, build_window_dataset
+from hermpy.utils import from_nanoseconds
+
+
+class WindowDataset:
+
+    def setup(self):
+        self.mag_path, self.rows = mag_full_cadence_file()
+        self.fips_path, _ = fips_file()
+
+        # Crossings spread over the span of the fixture
+        day_start = np.datetime64(f"{YEAR}-01-01", "ns") + np.timedelta64(
+            DAY_OF_YEAR - 1, "D"
+        )
+        span = self.rows * 50_000_000
+        times = day_start.view(np.int64) + np.linspace(0.1, 0.9, 200) * span
+        self.crossings = InstantEventList(
+            QTable({"UTC": from_nanoseconds(times.astype(np.int64))}), "UTC"
+        )
+
+        # Each build is written to a new directory, as an existing one would
+        # be resumed.
+        self.directory = tempfile.TemporaryDirectory()
+        self.outputs = (Path(self.directory.name) / str(i) for i in itertools.count())
+
+    def time_build(self):
+        build_window_dataset(
+            self.crossings,
+            [self.mag_path],
+            next(self.outputs),
+            window=5 * u.min,
+            resolution=1 * u.s,
+            columns=["Bx", "By", "Bz", "|B|"],
+            negatives=200,
+            workers=1,
+        )
+
+    def time_build_with_fips(self):
+        build_window_dataset(
+            self.crossings,
+            [self.mag_path],
+            next(self.outputs),
+            window=5 * u.min,
+            resolution=1 * u.s,
+            negatives=200,
+            fips_paths=[self.fips_path],
+        )
@@ -0,0 +1,26 @@
+import numpy as np
+from sunpy.time import TimeRange
+
+from benchmarks.fixtures import crossing_list_csv
+from hermpy.data import CrossingList
+
+
+class Crossings:
+
+    def setup(self):
+        self.path, self.rows = crossing_list_csv()
+        self.nbytes = self.path.stat().st_size
+
+        self.crossings = CrossingList.from_csv(self.path, time_column="Time")
+        self.query_times = np.sort(
+            np.random.default_rng(0).choice(self.crossings.time_index, 100_000)
+        )
+
+    def time_from_csv(self):
+        CrossingList.from_csv(self.path, time_column="Time")
+
+    def time_nearest(self):
+        self.crossings.nearest(self.query_times)
+
+    def time_events_in(self):
+        self.crossings.events_in(TimeRange("2012-01-01", "2012-02-01"))
@@ -0,0 +1,51 @@
+from sunpy.time import TimeRange
+
+from benchmarks.fixtures import fips_file, mag_averaged_file, mag_full_cadence_file
+from hermpy.data import parse_messenger_fips, parse_messenger_mag
+
+# Covers the whole fixture day
+TIME_RANGE = TimeRange("2011-05-31T23:59", "2011-06-02T00:01")
+
+
+class MAGFullCadence:
+
+    def setup(self):
+        self.path, self.rows = mag_full_cadence_file()
+        self.nbytes = self.path.stat().st_size
+
+    def time_parse(self):
+        parse_messenger_mag([self.path], TIME_RANGE, use_cache=False)
+
+    def time_parse_arrays(self):
+        parse_messenger_mag([self.path], TIME_RANGE, as_arrays=True, use_cache=False)
+
+
+class MAGAveraged:
+
+    def setup(self):
+        self.path, self.rows = mag_averaged_file()
+        self.nbytes = self.path.stat().st_size
+
+    def time_parse(self):
+        parse_messenger_mag([self.path], TIME_RANGE, use_cache=False)
+
+    def time_parse_cached(self):
+        # Repeated calls, as with sliding windows, are served by parse_cache
+        parse_messenger_mag([self.path], TIME_RANGE)
+
+    def time_parse_multiple_files(self):
+        # The same file stands in for consecutive days, to measure merging
+        parse_messenger_mag([self.path] * 3, TIME_RANGE, as_arrays=True, use_cache=False)
+
+
+class FIPS:
+
+    def setup(self):
+        self.path, self.rows = fips_file()
+        self.nbytes = self.path.stat().st_size
+
+    def time_parse(self):
+        parse_messenger_fips([self.path], TIME_RANGE, use_cache=False)
+
+    def time_parse_multiple_files(self):
+        parse_messenger_fips([self.path] * 3, TIME_RANGE, use_cache=False)
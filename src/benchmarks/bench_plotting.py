@@ -0,0 +1,31 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+from sunpy.time import TimeRange
+
+from benchmarks.fixtures import fips_file, mag_averaged_file
+from hermpy.data import parse_messenger_fips, parse_messenger_mag
+from hermpy.plotting import SpectrogramPanel, TimeseriesPanel
+
+TIME_RANGE = TimeRange("2011-05-31T23:59", "2011-06-02T00:01")
+
+
+class MultiPanelPlot:
+
+    def setup(self):
+        mag_path, self.rows = mag_averaged_file()
+        fips_path, _ = fips_file()
+
+        mag = parse_messenger_mag([mag_path], TIME_RANGE, use_cache=False)
+        fips = parse_messenger_fips([fips_path], TIME_RANGE, use_cache=False)
+
+        self.figure = TimeseriesPanel(mag["UTC", "Bx", "By", "Bz"]) + SpectrogramPanel(
+            fips["Proton Flux"]
+        )
+
+    def time_plot(self):
+        figure, _ = self.figure.plot(show=False)
+        figure.canvas.draw()
+        plt.close(figure)
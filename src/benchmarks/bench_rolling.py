@@ -0,0 +1,33 @@
+from astropy import units as u
+from sunpy.time import TimeRange
+
+from benchmarks.fixtures import mag_full_cadence_file
+from hermpy.data import add_field_magnitude, parse_messenger_mag, rolling_statistics
+
+TIME_RANGE = TimeRange("2011-05-31T23:59", "2011-06-02T00:01")
+WINDOWS = [1, 10, 60] * u.s
+
+
+class RollingStatistics:
+
+    def setup(self):
+        path, self.rows = mag_full_cadence_file()
+        self.mag = add_field_magnitude(
+            parse_messenger_mag([path], TIME_RANGE, as_arrays=True)
+        )
+
+    def time_moments(self):
+        rolling_statistics(self.mag, ["|B|"], WINDOWS)
+
+    def time_quantiles(self):
+        rolling_statistics(self.mag, ["|B|"], WINDOWS, ("mean",), quantiles=(0.1, 0.5, 0.9))
+
+    def time_streamed(self):
+        # As if the day were split across several files
+        chunk = len(self.mag) // 4 + 1
+        rolling_statistics(
+            (self.mag[i : i + chunk] for i in range(0, len(self.mag), chunk)),
+            ["|B|"],
+            WINDOWS,
+            alignment="centred",
+        )
@@ -0,0 +1,58 @@
+import numpy as np
+import spiceypy as spice
+from sunpy.time import TimeRange
+
+from benchmarks.fixtures import (
+    MAG_FULL_CADENCE_ROWS,
+    SCALE,
+    mag_averaged_file,
+    spice_kernels,
+)
+from hermpy.data import parse_messenger_mag, rotate_to_aberrated_coordinates
+from hermpy.data.coordinates import transform
+from hermpy.data.trajectories import _get_aberration_angle_single, get_aberration_angle
+
+TIME_RANGE = TimeRange("2011-05-31T23:59", "2011-06-02T00:01")
+
+
+class AberrationAngle:
+
+    def setup(self):
+        for kernel in spice_kernels():
+            spice.furnsh(str(kernel))
+
+        path, self.rows = mag_averaged_file()
+        table = parse_messenger_mag([path], TIME_RANGE, use_cache=False)
+        self.datetimes = table["UTC"].to_datetime(leap_second_strict="warn")
+
+    def time_get_aberration_angle(self):
+        # Without the per-day cache, as for the first call in a session.
+        _get_aberration_angle_single.cache_clear()
+        get_aberration_angle(self.datetimes)
+
+
+class AberratedCoordinates:
+
+    def setup(self):
+        for kernel in spice_kernels():
+            spice.furnsh(str(kernel))
+
+        path, self.rows = mag_averaged_file()
+        self.table = parse_messenger_mag([path], TIME_RANGE, use_cache=False)
+
+    def time_rotate_to_aberrated_coordinates(self):
+        _get_aberration_angle_single.cache_clear()
+        rotate_to_aberrated_coordinates(self.table)
+
+
+class Transform:
+
+    def setup(self):
+        # A day of full cadence positions
+        self.rows = int(MAG_FULL_CADENCE_ROWS * SCALE)
+        rng = np.random.default_rng(0)
+        self.x, self.y, self.z = rng.normal(0, 5000, (3, self.rows))
+        self.angle = np.full(self.rows, 0.1)
+
+    def time_mso_to_aberrated_msm(self):
+        transform(self.x, self.y, self.z, "MSO", "MSM'", self.angle)
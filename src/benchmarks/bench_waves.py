@@ -0,0 +1,28 @@
+from astropy import units as u
+from sunpy.time import TimeRange
+
+from benchmarks.fixtures import mag_full_cadence_file
+from hermpy.data import dynamic_spectrum, parse_messenger_mag
+
+TIME_RANGE = TimeRange("2011-05-31T23:59", "2011-06-02T00:01")
+
+
+class DynamicSpectrum:
+
+    def setup(self):
+        path, self.rows = mag_full_cadence_file()
+        self.mag = parse_messenger_mag([path], TIME_RANGE, as_arrays=True)
+
+    def time_fft(self):
+        dynamic_spectrum(self.mag, window=60 * u.s)
+
+    def time_fft_streamed(self):
+        # As if the day were split across several files
+        chunk = len(self.mag) // 4 + 1
+        dynamic_spectrum(
+            (self.mag[i : i + chunk] for i in range(0, len(self.mag), chunk)),
+            window=60 * u.s,
+        )
+
+    def time_wavelet(self):
+        dynamic_spectrum(self.mag, ["Bx"], window=60 * u.s, method="wavelet")
@@ -0,0 +1,210 @@
+"""
+Deterministic synthetic inputs for the benchmarks, mimicking the layout and
+size of the real products so the benchmarks can run offline.
+
+Files are written once to a cache directory (HERMPY_BENCHMARK_DATA, or a
+directory in the system temporary directory) and reused. Sizes are scaled by
+HERMPY_BENCHMARK_SCALE (default 1, a realistic day of each product), which is
+useful for quick runs.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from spice_fixtures import write_spice_kernels
+
+SCALE = float(os.environ.get("HERMPY_BENCHMARK_SCALE", 1))
+
+# Bump if the format of any fixture changes, so stale files aren't reused.
+_FIXTURE_VERSION = 1
+
+YEAR = 2011
+DAY_OF_YEAR = 152
+
+# Rows in a day of each product
+MAG_FULL_CADENCE_ROWS = 20 * 86_400
+MAG_AVERAGED_ROWS = 86_400
+FIPS_ROWS = 8_640
+CROSSINGS = 40_000
+
+
+def data_directory() -> Path:
+    directory = Path(
+        os.environ.get(
+            "HERMPY_BENCHMARK_DATA", Path(tempfile.gettempdir()) / "hermpy-benchmarks"
+        )
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+
+    return directory
+
+
+def mag_full_cadence_file(scale: float = SCALE) -> tuple[Path, int]:
+    """A day of 20 Hz MAG data (12 columns). Returns the path and rows."""
+
+    rows = int(MAG_FULL_CADENCE_ROWS * scale)
+    path = _fixture_path(f"MAGMSOSCI11{DAY_OF_YEAR}", rows)
+
+    if not path.exists():
+        seconds = np.arange(rows) / 20
+        position, field = _trajectory(seconds)
+
+        _write_table(
+            path,
+            [*_time_columns(seconds), DAY_OF_YEAR + seconds / 86_400, *position, *field],
+            "%4d %03d %02d %02d %06.3f %13.8f %10.3f %10.3f %10.3f %9.3f %9.3f %9.3f",
+        )
+
+    return path, rows
+
+
+def mag_averaged_file(scale: float = SCALE) -> tuple[Path, int]:
+    """A day of the 1 s averaged MAG product (16 columns)."""
+
+    rows = int(MAG_AVERAGED_ROWS * scale)
+    path = _fixture_path(f"MAGMSOSCIAVG11{DAY_OF_YEAR}_01", rows)
+
+    if not path.exists():
+        seconds = np.arange(rows) + 0.5
+        position, field = _trajectory(seconds)
+        deviation = np.abs(_rng(1).normal(0, 2, (3, rows)))
+
+        _write_table(
+            path,
+            [
+                *_time_columns(seconds),
+                DAY_OF_YEAR + seconds / 86_400,
+                np.full(rows, 20),
+                *position,
+                *field,
+                *deviation,
+            ],
+            "%4d %03d %02d %02d %06.3f %13.8f %3d %10.3f %10.3f %10.3f "
+            "%9.3f %9.3f %9.3f %9.3f %9.3f %9.3f",
+        )
+
+    return path, rows
+
+
+def fips_file(scale: float = SCALE) -> tuple[Path, int]:
+    """A day of FIPS scans (319 columns), one every 10 s."""
+
+    rows = int(FIPS_ROWS * scale)
+    path = _fixture_path(f"FIPS_R{YEAR}{DAY_OF_YEAR}CDR", rows)
+
+    if not path.exists():
+        rng = _rng(2)
+        seconds = np.arange(rows) * 10.0
+
+        quality = (rng.random(rows) < 0.01).astype(int)
+        mode = np.zeros(rows, dtype=int)
+
+        # 126 housekeeping columns, then valid event, proton and total event
+        # flux in 63 channels each.
+        housekeeping = rng.random((126, rows))
+        proton_flux = rng.lognormal(3, 1, (63, rows))
+        valid_event_flux = proton_flux * (1 + rng.random((63, rows)))
+        total_event_flux = valid_event_flux * (1 + rng.random((63, rows)))
+
+        hour, minute, second = _time_columns(seconds)[2:]
+        times = [
+            f"{YEAR}-{DAY_OF_YEAR:03d}T{h:02d}:{m:02d}:{s:06.3f}"
+            for h, m, s in zip(hour, minute, second)
+        ]
+
+        numbers = np.vstack(
+            [housekeeping, valid_event_flux, proton_flux, total_event_flux]
+        ).T
+
+        temporary_path = path.with_suffix(".partial")
+        with open(temporary_path, "w") as file:
+            for i in range(rows):
+                file.write(
+                    f"{200_000_000 + 10 * i} {times[i]} {quality[i]} {mode[i]} "
+                    + " ".join(f"{value:.4e}" for value in numbers[i])
+                    + "\n"
+                )
+        temporary_path.replace(path)
+
+    return path, rows
+
+
+def crossing_list_csv(scale: float = SCALE) -> tuple[Path, int]:
+    """A crossing list in the format of Hollman et al. (2025)."""
+
+    rows = int(CROSSINGS * scale)
+    path = _fixture_path("crossing_list", rows, suffix=".csv")
+
+    if not path.exists():
+        rng = _rng(3)
+
+        start = np.datetime64("2011-03-24T00:00:00", "ms")
+        times = start + np.sort(rng.integers(0, 4 * 365 * 86_400_000, rows)).astype(
+            "timedelta64[ms]"
+        )
+        types = np.array(["BS_IN", "MP_IN", "MP_OUT", "BS_OUT"])[np.arange(rows) % 4]
+
+        with open(path, "w") as file:
+            file.write("Time,Type\n")
+            file.writelines(
+                f"{time},{crossing_type}\n" for time, crossing_type in zip(times, types)
+            )
+
+    return path, rows
+
+
+def spice_kernels() -> list[Path]:
+    """
+    A leap seconds kernel, and an SPK of Mercury's (Keplerian) orbit about the
+    Sun for 2011 to 2015, enough for get_aberration_angle().
+    """
+
+    return write_spice_kernels(data_directory(), f"synthetic-v{_FIXTURE_VERSION}")
+
+
+def _fixture_path(name: str, rows: int, suffix: str = ".TAB") -> Path:
+    return data_directory() / f"{name}_{rows}_v{_FIXTURE_VERSION}{suffix}"
+
+
+def _rng(stream: int) -> np.random.Generator:
+    return np.random.default_rng([20110318, stream])
+
+
+def _time_columns(seconds: np.ndarray) -> list[np.ndarray]:
+    hour, remainder = np.divmod(seconds, 3600)
+    minute, second = np.divmod(remainder, 60)
+
+    return [
+        np.full(len(seconds), YEAR),
+        np.full(len(seconds), DAY_OF_YEAR),
+        hour.astype(int),
+        minute.astype(int),
+        second,
+    ]
+
+
+def _trajectory(seconds: np.ndarray) -> tuple[list[np.ndarray], list[np.ndarray]]:
+    # A 12 hour elliptical orbit, and a field which strengthens near the
+    # planet, with noise.
+    phase = 2 * np.pi * seconds / 43_200
+    radius = 2440 * (3.5 - 2.5 * np.cos(phase))
+
+    position = [radius * np.cos(phase), radius * np.sin(phase) * 0.3, radius * np.sin(phase)]
+
+    noise = _rng(0).normal(0, 5, (3, len(seconds)))
+    strength = 300 * (2440 / radius) ** 3
+    field = [strength * np.cos(phase) + noise[0], 20 + noise[1], strength + noise[2]]
+
+    return position, field
+
+
+def _write_table(path: Path, columns: list[np.ndarray], fmt: str) -> None:
+    # Written to a temporary file first, so an interrupted run doesn't leave
+    # a partial fixture behind.
+    temporary_path = path.with_suffix(".partial")
+    np.savetxt(temporary_path, np.column_stack(columns), fmt=fmt)
+    temporary_path.replace(path)
+
@@ -0,0 +1,179 @@
+"""
+Run the hermpy benchmarks, recording time, throughput and peak memory.
+
+Benchmarks are asv-style: classes in benchmarks/bench_*.py with an optional
+setup() method, and methods prefixed with 'time_'. Throughput is reported if
+setup() sets self.rows (rows/s) or self.nbytes (MB/s of input).
+
+From the src directory:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --filter MAG --compare benchmark-results/abc1234.json
+
+Results are written as JSON, named by the current commit, so runs across
+commits can be compared. Everything runs offline on synthetic fixtures (see
+benchmarks.fixtures).
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--filter", default="", help="Only run benchmarks matching this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    parser.add_argument(
+        "--no-memory", action="store_true", help="Skip peak memory measurements"
+    )
+    arguments = parser.parse_args()
+
+    commit = _git_commit()
+    results = run(arguments.filter, arguments.repeat, not arguments.no_memory)
+
+    output = arguments.output or Path("benchmark-results") / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": platform.machine(),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+    previous = None
+    if arguments.compare is not None:
+        previous = json.loads(arguments.compare.read_text())["results"]
+
+    print(_summary(results, previous))
+    print(f"\nResults written to {output}")
+
+
+def run(name_filter: str = "", repeat: int = 3, memory: bool = True) -> dict[str, dict]:
+    """Run all benchmarks whose full name contains name_filter."""
+
+    results: dict[str, dict] = {}
+
+    for module_path in sorted(Path(__file__).parent.glob("bench_*.py")):
+        module = importlib.import_module(f"benchmarks.{module_path.stem}")
+
+        for class_name, benchmark_class in vars(module).items():
+            # Only classes defined in the module, not those imported into it
+            if not isinstance(benchmark_class, type):
+                continue
+            if benchmark_class.__module__ != module.__name__:
+                continue
+
+            methods = [m for m in dir(benchmark_class) if m.startswith("time_")]
+            names = {m: f"{module_path.stem[6:]}.{class_name}.{m}" for m in methods}
+            methods = [m for m in methods if name_filter in names[m]]
+
+            if len(methods) == 0:
+                continue
+
+            benchmark = benchmark_class()
+            if hasattr(benchmark, "setup"):
+                try:
+                    benchmark.setup()
+                except NotImplementedError:
+                    continue
+
+            for method in methods:
+                result = _measure(benchmark, getattr(benchmark, method), repeat, memory)
+                results[names[method]] = result
+
+                print(f"{names[method]}: {result['seconds']:.4g} s", flush=True)
+
+    return results
+
+
+def _measure(benchmark, function, repeat: int, memory: bool) -> dict:
+    # A warm up call, so imports and one-off caches aren't timed.
+    function()
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    result = {
+        "seconds": min(durations),
+        "median_seconds": statistics.median(durations),
+    }
+
+    if hasattr(benchmark, "rows"):
+        result["rows_per_second"] = benchmark.rows / result["seconds"]
+    if hasattr(benchmark, "nbytes"):
+        result["megabytes_per_second"] = benchmark.nbytes / 1e6 / result["seconds"]
+
+    if memory:
+        # tracemalloc slows allocation heavy code, so this is measured in a
+        # separate, untimed call. numpy reports its allocations to tracemalloc.
+        tracemalloc.start()
+        try:
+            function()
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return result
+
+
+def _summary(results: dict[str, dict], previous: dict[str, dict] | None) -> str:
+    lines = [f"{'Benchmark':<70} {'Time':>10} {'Throughput':>16} {'Peak memory':>12}"]
+
+    for name, result in results.items():
+        if "rows_per_second" in result:
+            throughput = f"{result['rows_per_second']:.3g} rows/s"
+        elif "megabytes_per_second" in result:
+            throughput = f"{result['megabytes_per_second']:.3g} MB/s"
+        else:
+            throughput = ""
+
+        peak = f"{result['peak_bytes'] / 1e6:.1f} MB" if "peak_bytes" in result else ""
+        line = f"{name:<70} {result['seconds']:>9.4g}s {throughput:>16} {peak:>12}"
+
+        if previous is not None and name in previous:
+            ratio = result["seconds"] / previous[name]["seconds"]
+            flag = "  slower" if ratio > 1.2 else "  faster" if ratio < 1 / 1.2 else ""
+            line += f"  x{ratio:.2f}{flag}"
+
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+if __name__ == "__main__":
+    main()
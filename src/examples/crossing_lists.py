@@ -3,7 +3,7 @@ from pathlib import Path
 
 import requests
 
-from hermpy.data import CrossingList
+from hermpy.data import CrossingList, InstantEventList
 
 EXAMPLES_DATA_DIR = Path(__file__).parent / "example-data/"
 
@@ -23,3 +23,10 @@ with open(local_csv_path, "wb") as file:
 crossings = CrossingList.from_csv(local_csv_path, time_column="Time")
 
 print(crossings.table)
+
+# Parsing csv files can be slow for large lists. Lists can instead be saved to
+# and loaded from a binary format. Loading can optionally memory-map columns.
+local_list_path = EXAMPLES_DATA_DIR / "hollman_2025_crossing_list"
+crossings.save(local_list_path)
+
+crossings = InstantEventList.load(local_list_path)
@@ -1,3 +1,4 @@
+import importlib
 from importlib.metadata import PackageNotFoundError
 from importlib.metadata import version as _version
 
@@ -5,3 +6,18 @@ try:
     __version__ = _version(__name__)
 except PackageNotFoundError:
     pass
+
+# Subpackages are imported on first access (PEP 562), so that `import hermpy`
+# doesn't pull in astropy, xarray, sunpy, matplotlib, etc.
+_SUBPACKAGES = ["data", "net", "plotting", "utils"]
+
+
+def __getattr__(name: str):
+    if name in _SUBPACKAGES:
+        return importlib.import_module(f".{name}", __name__)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_SUBPACKAGES])
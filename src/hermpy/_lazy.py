@@ -0,0 +1,28 @@
+import importlib
+from collections.abc import Callable
+
+
+def attach(
+    package_name: str, attributes: dict[str, str]
+) -> tuple[Callable, Callable, list[str]]:
+    """
+    Lazily import package attributes from their submodules on first access
+    (PEP 562). attributes maps each attribute name to the relative name of
+    the submodule which defines it.
+
+    Returns __getattr__, __dir__, and __all__ for the package, e.g.
+
+        __getattr__, __dir__, __all__ = attach(__name__, {"f": ".module"})
+    """
+
+    def __getattr__(name: str):
+        if name in attributes:
+            module = importlib.import_module(attributes[name], package_name)
+            return getattr(module, name)
+
+        raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+
+    def __dir__() -> list[str]:
+        return sorted(attributes)
+
+    return __getattr__, __dir__, list(attributes)
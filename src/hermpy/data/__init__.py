@@ -1,13 +1,65 @@
-from .lists import (
-    CrossingIntervalList,
-    CrossingList,
-    DurationEventList,
-    EventList,
-    InstantEventList,
-)
-from .spectrograms import fips_energy_bin_edges, parse_messenger_fips
-from .timeseries import (
-    add_field_magnitude,
-    parse_messenger_mag,
-    rotate_to_aberrated_coordinates,
-)
+from typing import TYPE_CHECKING
+
+from hermpy._lazy import attach
+
+# Attributes are imported from their submodules on first access (PEP 562), as
+# the submodules depend on heavy packages such as astropy, xarray and sunpy.
+_LAZY_ATTRIBUTES = {
+    "asof_join": ".alignment",
+    "scan_statistics": ".alignment",
+    "ArrayTimeseries": ".arrays",
+    "Region": ".boundaries",
+    "Winslow2013": ".boundaries",
+    "classify_regions": ".boundaries",
+    "ParsedFileCache": ".cache",
+    "parse_cache": ".cache",
+    "CoverageIndex": ".coverage",
+    "WindowDataset": ".datasets",
+    "build_window_dataset": ".datasets",
+    "superposed_epoch": ".epochs",
+    "CrossingIntervalList": ".lists",
+    "CrossingList": ".lists",
+    "DurationEventList": ".lists",
+    "EventList": ".lists",
+    "InstantEventList": ".lists",
+    "OrbitList": ".orbits",
+    "precision_report": ".precision",
+    "RollingStatistics": ".rolling",
+    "rolling_statistics": ".rolling",
+    "fips_energy_bin_edges": ".spectrograms",
+    "parse_messenger_fips": ".spectrograms",
+    "add_coordinate_frames": ".timeseries",
+    "add_field_magnitude": ".timeseries",
+    "parse_messenger_mag": ".timeseries",
+    "rotate_to_aberrated_coordinates": ".timeseries",
+    "dynamic_spectrum": ".waves",
+}
+
+__getattr__, __dir__, __all__ = attach(__name__, _LAZY_ATTRIBUTES)
+
+if TYPE_CHECKING:
+    from .alignment import asof_join, scan_statistics
+    from .arrays import ArrayTimeseries
+    from .boundaries import Region, Winslow2013, classify_regions
+    from .cache import ParsedFileCache, parse_cache
+    from .coverage import CoverageIndex
+    from .datasets import WindowDataset, build_window_dataset
+    from .epochs import superposed_epoch
+    from .lists import (
+        CrossingIntervalList,
+        CrossingList,
+        DurationEventList,
+        EventList,
+        InstantEventList,
+    )
+    from .orbits import OrbitList
+    from .precision import precision_report
+    from .rolling import RollingStatistics, rolling_statistics
+    from .spectrograms import fips_energy_bin_edges, parse_messenger_fips
+    from .timeseries import (
+        add_coordinate_frames,
+        add_field_magnitude,
+        parse_messenger_mag,
+        rotate_to_aberrated_coordinates,
+    )
+    from .waves import dynamic_spectrum
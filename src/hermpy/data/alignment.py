@@ -0,0 +1,317 @@
+"""
+Alignment of MAG timeseries with FIPS scans, in both directions:
+
+    scan_statistics(fips, mag)  MAG statistics over each scan's window
+    asof_join(fips, mag)        the FIPS scan for each MAG sample
+
+Both work on int64 nanosecond times with sorted searches and bincount
+reductions, rather than loops over scans or samples.
+"""
+
+from collections.abc import Iterable
+
+import numpy as np
+import xarray as xr
+from astropy import units as u
+from astropy.table import QTable
+
+from hermpy.data.arrays import ArrayTimeseries
+from hermpy.utils import nearest_indices, to_nanoseconds
+
+Timeseries = ArrayTimeseries | QTable
+
+
+def scan_statistics(
+    fips: xr.Dataset,
+    mag: Timeseries | Iterable[Timeseries],
+    columns: tuple[str, ...] | list[str] = ("Bx", "By", "Bz"),
+    max_window: u.Quantity | None = None,
+    time_column: str = "UTC",
+) -> xr.Dataset:
+    """
+    The mean, standard deviation, and number of MAG samples within each FIPS
+    scan's accumulation window.
+
+    A scan accumulates from its time until the next scan, so windows follow
+    changes in scan mode (e.g. ~10 s burst and ~60 s normal scans). The last
+    scan is taken to last as long as the one before it. Windows may be
+    limited to max_window, so that a data gap doesn't widen a window. A
+    single scan lasts max_window, which must then be given.
+
+    MAG may be a single timeseries, or an iterable of chunks (e.g. one
+    parsed file per day, from a generator). Each chunk is visited once, and
+    windows which span chunk boundaries are combined exactly, so only one
+    chunk need be held in memory at a time. Chunks may be in any order.
+
+    NaN samples are ignored. Runs in O(N + M) for N MAG samples and M scans.
+
+
+    Parameters
+    ----------
+    fips : xarray.Dataset
+        FIPS scans, e.g. from parse_messenger_fips().
+
+    mag : ArrayTimeseries | QTable | Iterable[ArrayTimeseries | QTable]
+        MAG timeseries, or chunks of one.
+
+    columns : tuple[str, ...]
+        MAG columns to summarise. These form the channel dimension.
+
+    max_window : astropy.units.Quantity, optional
+        Longest accumulation window.
+
+
+    Returns
+    -------
+    out : xarray.Dataset
+        With variables "Mean", "SD" (sample standard deviation), and "Count",
+        each with dimensions ("UTC", "Channel"), on the scan times of fips.
+        The end of each scan's window is given as the "Window End"
+        coordinate.
+    """
+
+    scan_times, window_end = _scan_windows(fips, max_window)
+    columns = list(columns)
+
+    count = np.zeros((len(scan_times), len(columns)), dtype=np.int64)
+    mean = np.zeros((len(scan_times), len(columns)))
+    m2 = np.zeros((len(scan_times), len(columns)))
+    units: list[str] = []
+
+    if isinstance(mag, (ArrayTimeseries, QTable)):
+        mag = [mag]
+
+    for chunk in mag:
+        if len(chunk) == 0:
+            continue
+
+        if len(units) == 0:
+            units = [_unit(chunk, c) for c in columns]
+
+        times = _times(chunk, time_column)
+
+        # Only the scans overlapping this chunk are reduced, so that each
+        # chunk costs O(chunk + scans in chunk).
+        first = max(np.searchsorted(scan_times, times.min(), side="right") - 1, 0)
+        last = np.searchsorted(scan_times, times.max(), side="right")
+        if last <= first:
+            continue
+
+        scan = np.searchsorted(scan_times[first:last], times, side="right") - 1 + first
+        inside = (scan >= first) & (times < window_end[np.maximum(scan, 0)])
+        scan = scan[inside] - first
+
+        for i, column in enumerate(columns):
+            values = _values(chunk, column)[inside]
+            finite = np.isfinite(values)
+
+            _combine(
+                count[first:last, i],
+                mean[first:last, i],
+                m2[first:last, i],
+                scan[finite],
+                values[finite],
+            )
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean[count == 0] = np.nan
+        sd = np.sqrt(m2 / (count - 1))
+        sd[count < 2] = np.nan
+
+    return xr.Dataset(
+        data_vars={
+            "Mean": (("UTC", "Channel"), mean),
+            "SD": (("UTC", "Channel"), sd),
+            "Count": (("UTC", "Channel"), count),
+        },
+        coords={
+            "UTC": scan_times.view("datetime64[ns]"),
+            "Window End": ("UTC", window_end.view("datetime64[ns]")),
+            "Channel": columns,
+        },
+        attrs={"Channel Units": units},
+    )
+
+
+def asof_indices(
+    scan_times: np.ndarray,
+    times: np.ndarray,
+    direction: str = "backward",
+    tolerance: u.Quantity | None = None,
+) -> np.ndarray:
+    """
+    For each time, the index of the matching scan, or -1 if there is none.
+    Both inputs are int64 nanoseconds, scan_times must be sorted.
+
+    With direction "backward", the match is the latest scan at or before each
+    time (i.e. the scan being accumulated), with "forward" the earliest scan
+    at or after it, and with "nearest" the closest. Matches further than
+    tolerance from the time are dropped.
+    """
+
+    match direction:
+        case "backward":
+            indices = np.searchsorted(scan_times, times, side="right") - 1
+        case "forward":
+            indices = np.searchsorted(scan_times, times, side="left")
+            indices[indices == len(scan_times)] = -1
+        case "nearest":
+            if len(scan_times) == 0:
+                return np.full(len(times), -1, dtype=np.intp)
+            indices = nearest_indices(scan_times, times)
+        case _:
+            raise ValueError(
+                f"Unknown direction: {direction}. "
+                "Expected 'backward', 'forward', or 'nearest'"
+            )
+
+    if tolerance is not None:
+        matched = indices >= 0
+        distance = np.abs(times[matched] - scan_times[indices[matched]])
+        too_far = np.zeros(len(indices), dtype=bool)
+        too_far[matched] = distance > tolerance.to_value(u.ns)
+        indices[too_far] = -1
+
+    return indices
+
+
+def asof_join(
+    fips: xr.Dataset,
+    mag: Timeseries,
+    variables: list[str] | None = None,
+    direction: str = "backward",
+    tolerance: u.Quantity | None = None,
+    time_column: str = "UTC",
+) -> xr.Dataset:
+    """
+    The FIPS scan matching each MAG sample (see asof_indices()), as a Dataset
+    on the MAG sample times. The time of the matched scan is given as the
+    "Scan UTC" coordinate.
+
+    Samples without a match are NaN (and NaT), in which case integer
+    variables (e.g. Mode) become floating point. As FIPS variables have 63
+    energy channels, the result can be large for full cadence MAG; consider
+    selecting variables, or joining one chunk of MAG at a time.
+    """
+
+    scan_times = fips["UTC"].values.astype("datetime64[ns]").view(np.int64)
+    times = _times(mag, time_column)
+
+    indices = asof_indices(scan_times, times, direction, tolerance)
+    missing = indices < 0
+    any_missing = bool(missing.any())
+
+    data_vars = {}
+    for name in variables or list(fips.data_vars):
+        variable = fips[name]
+        if variable.dims[0] != "UTC":
+            raise ValueError(f"Variable {name} isn't indexed by scan time")
+
+        if len(scan_times) == 0:
+            # e.g. a time range without FIPS data, so nothing matches
+            values = np.full((len(times),) + variable.shape[1:], np.nan)
+        else:
+            values = variable.values[np.maximum(indices, 0)]
+
+        if any_missing:
+            if values.dtype.kind != "f":
+                values = values.astype(np.float64)
+            values[missing] = np.nan
+
+        data_vars[name] = (variable.dims, values, variable.attrs)
+
+    matched_times = np.full(len(times), np.datetime64("NaT", "ns"))
+    matched_times[~missing] = scan_times[indices[~missing]].view("datetime64[ns]")
+
+    coords = {
+        "UTC": times.view("datetime64[ns]"),
+        "Scan UTC": ("UTC", matched_times),
+    }
+    # Other coordinates (e.g. Energy Channel) of the selected variables
+    dims = {dim for _, (variable_dims, *_) in data_vars.items() for dim in variable_dims}
+    coords.update(
+        {
+            name: fips.coords[name]
+            for name in fips.coords
+            if "UTC" not in fips[name].dims and set(fips[name].dims) <= dims
+        }
+    )
+
+    return xr.Dataset(data_vars=data_vars, coords=coords)
+
+
+def _scan_windows(
+    fips: xr.Dataset, max_window: u.Quantity | None
+) -> tuple[np.ndarray, np.ndarray]:
+
+    scan_times = fips["UTC"].values.astype("datetime64[ns]").view(np.int64)
+    if np.any(np.diff(scan_times) < 0):
+        raise ValueError("FIPS scans must be sorted in time")
+
+    window_end = np.empty_like(scan_times)
+    window_end[:-1] = scan_times[1:]
+    if len(scan_times) > 1:
+        window_end[-1] = 2 * scan_times[-1] - scan_times[-2]
+    elif len(scan_times) == 1:
+        # Without a second scan, there's no length to take the window from
+        if max_window is None:
+            raise ValueError("A single FIPS scan's window is unknown. Give max_window.")
+        window_end[-1] = scan_times[-1] + round(max_window.to_value(u.ns))
+
+    if max_window is not None:
+        window_end = np.minimum(window_end, scan_times + round(max_window.to_value(u.ns)))
+
+    return scan_times, window_end
+
+
+def _combine(
+    count: np.ndarray,
+    mean: np.ndarray,
+    m2: np.ndarray,
+    scan: np.ndarray,
+    values: np.ndarray,
+) -> None:
+    # Reduce one chunk's samples per scan (two passes, for a stable sum of
+    # squared deviations), then merge them into the running count, mean, and
+    # sum of squared deviations in place, with Chan et al.'s parallel update.
+    n_scans = len(count)
+
+    chunk_count = np.bincount(scan, minlength=n_scans)
+    chunk_sum = np.bincount(scan, weights=values, minlength=n_scans)
+    chunk_mean = np.divide(
+        chunk_sum, chunk_count, out=np.zeros(n_scans), where=chunk_count > 0
+    )
+    chunk_m2 = np.bincount(
+        scan, weights=(values - chunk_mean[scan]) ** 2, minlength=n_scans
+    )
+
+    total = count + chunk_count
+    has_data = total > 0
+    delta = chunk_mean - mean
+
+    fraction = np.divide(chunk_count, total, out=np.zeros(n_scans), where=has_data)
+    mean += delta * fraction
+    m2 += chunk_m2 + delta**2 * count * fraction
+    count += chunk_count
+
+
+def _times(timeseries: Timeseries, time_column: str) -> np.ndarray:
+    if isinstance(timeseries, ArrayTimeseries):
+        return timeseries.time
+
+    return to_nanoseconds(timeseries[time_column])
+
+
+def _values(timeseries: Timeseries, column: str) -> np.ndarray:
+    values = timeseries[column]
+    if isinstance(values, u.Quantity):
+        values = values.value
+
+    return np.asarray(values, dtype=np.float64)
+
+
+def _unit(timeseries: Timeseries, column: str) -> str:
+    if isinstance(timeseries, ArrayTimeseries):
+        return str(timeseries.units.get(column, ""))
+
+    return str(getattr(timeseries[column], "unit", ""))
@@ -0,0 +1,177 @@
+from enum import IntEnum
+
+import numpy as np
+from astropy import units as u
+
+from hermpy.utils import Constants
+
+
+class Winslow2013:
+    """
+    Average magnetopause and bow shock model parameters from Winslow et al.
+    (2013). Distances are in Mercury radii, in (aberrated) MSM coordinates.
+
+    The magnetopause follows the Shue et al. (1997) form, and the bow shock a
+    conic section with its focus at (INITIAL_X, 0, 0).
+    """
+
+    SUB_SOLAR_MAGNETOPAUSE = 1.45
+    ALPHA = 0.5
+
+    PSI = 1.04
+    P = 2.75
+    INITIAL_X = 0.5
+
+
+class Region(IntEnum):
+    MAGNETOSPHERE = 0
+    MAGNETOSHEATH = 1
+    SOLAR_WIND = 2
+
+
+def magnetopause_curve(
+    phi: np.ndarray,
+    sub_solar_magnetopause: float = Winslow2013.SUB_SOLAR_MAGNETOPAUSE,
+    alpha: float = Winslow2013.ALPHA,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the x and cylindrical radius (rho) of the model magnetopause at
+    angles phi from the +X axis.
+    """
+
+    rho = sub_solar_magnetopause * (2 / (1 + np.cos(phi))) ** alpha
+
+    return rho * np.cos(phi), rho * np.sin(phi)
+
+
+def bow_shock_curve(
+    phi: np.ndarray,
+    psi: float = Winslow2013.PSI,
+    p: float = Winslow2013.P,
+    initial_x: float = Winslow2013.INITIAL_X,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the x and cylindrical radius (rho) of the model bow shock at
+    angles phi from the +X axis, about the focus of the conic section.
+
+    Note that the functional form creates non-physical points far sunward of
+    Mercury, which should be removed before plotting.
+    """
+
+    rho = psi * p / (1 + psi * np.cos(phi))
+
+    return initial_x + rho * np.cos(phi), rho * np.sin(phi)
+
+
+def classify_regions(
+    x: np.ndarray | u.Quantity,
+    y: np.ndarray | u.Quantity,
+    z: np.ndarray | u.Quantity,
+    frame: str = "MSM",
+    sub_solar_magnetopause: float = Winslow2013.SUB_SOLAR_MAGNETOPAUSE,
+    alpha: float = Winslow2013.ALPHA,
+    psi: float = Winslow2013.PSI,
+    p: float = Winslow2013.P,
+    initial_x: float = Winslow2013.INITIAL_X,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Classify spacecraft positions as magnetosphere, magnetosheath, or solar
+    wind using the average boundaries of Winslow et al. (2013).
+
+    This is fully vectorised, and suitable for classifying entire missions of
+    positions at once, e.g. from the X MSO, Y MSO, and Z MSO columns of
+    parse_messenger_mag(). As the models are defined in aberrated
+    coordinates, aberrated positions (X MSO', etc.) should be used where
+    possible.
+
+
+    Parameters
+    ----------
+    x, y, z : numpy.ndarray | astropy.units.Quantity
+        Spacecraft position components. Plain arrays are assumed to be in
+        Mercury radii.
+
+    frame : str {`"MSM"`, `"MSO"`}, optional
+        The frame of the input positions. MSO positions are shifted by the
+        dipole offset to MSM.
+
+
+    Returns
+    -------
+    regions : numpy.ndarray
+        The Region of each position, as int8.
+
+    magnetopause_distance : numpy.ndarray
+        Signed distance from the magnetopause in Mercury radii, measured
+        radially from the planetary dipole. Negative inside the magnetosphere.
+
+    bow_shock_distance : numpy.ndarray
+        Signed distance from the bow shock in Mercury radii, measured radially
+        from the focus of the bow shock. Negative downstream of the bow shock.
+        Positions behind the asymptote of the bow shock never meet it, and
+        have a distance of -inf.
+    """
+
+    # Computed on (at least 1D) arrays of a common shape, so that
+    # temporaries can be reused in place, and reshaped back to the shape of
+    # the inputs, which may be scalars.
+    shape = np.broadcast_shapes(*(np.shape(c) for c in (x, y, z)))
+    x, y, z = np.broadcast_arrays(*(np.atleast_1d(_to_radii(c)) for c in (x, y, z)))
+
+    match frame:
+        case "MSM":
+            pass
+        case "MSO":
+            z = z - Constants.DIPOLE_OFFSET_RADII.to_value(u.dimensionless_unscaled)
+        case _:
+            raise ValueError(f"Unknown frame: {frame}. Expected MSO or MSM")
+
+    rho_squared = y * y
+    rho_squared += z * z
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Magnetopause: r < R_ss * (2 / (1 + cos(theta)))^alpha, with
+        # cos(theta) = x / r.
+        r = np.sqrt(x * x + rho_squared)
+
+        magnetopause_radius = np.divide(2 * r, r + x)
+        if alpha == 0.5:
+            np.sqrt(magnetopause_radius, out=magnetopause_radius)
+        else:
+            np.power(magnetopause_radius, alpha, out=magnetopause_radius)
+        magnetopause_radius *= sub_solar_magnetopause
+
+        magnetopause_distance = np.subtract(r, magnetopause_radius, out=r)
+        # At the origin the expression above is undefined, but it is inside.
+        magnetopause_distance[np.isnan(magnetopause_distance)] = -sub_solar_magnetopause
+
+        # Bow shock: r < L / (1 + psi * cos(theta)) about the focus, which
+        # rearranges to r + psi * dx < L, so classification needs no
+        # division. The distance, r - L / (1 + psi * cos(theta)), needs one.
+        dx = x - initial_x
+        r_focus = np.sqrt(dx * dx + rho_squared)
+
+        L = psi * p
+        denominator = np.multiply(psi, dx, out=dx)
+        denominator += r_focus
+
+        bow_shock_distance = r_focus * (denominator - L) / denominator
+        bow_shock_distance[denominator <= 0] = -np.inf
+
+        inside_bow_shock = denominator < L
+
+    regions = np.full(np.shape(inside_bow_shock), Region.SOLAR_WIND, dtype=np.int8)
+    regions[inside_bow_shock] = Region.MAGNETOSHEATH
+    regions[magnetopause_distance < 0] = Region.MAGNETOSPHERE
+
+    return (
+        regions.reshape(shape),
+        magnetopause_distance.reshape(shape),
+        bow_shock_distance.reshape(shape),
+    )
+
+
+def _to_radii(component: np.ndarray | u.Quantity) -> np.ndarray:
+    if isinstance(component, u.Quantity):
+        return component.to_value(Constants.MERCURY_RADIUS)
+
+    return np.asarray(component, dtype=float)
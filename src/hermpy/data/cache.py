@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from hermpy.utils import tracing
+
+
+@dataclass(frozen=True)
+class CacheStatistics:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ParsedFileCache:
+    """
+    An in-process least-recently-used cache of parsed data files, bounded by
+    the memory the parsed data takes (as reported by its nbytes), rather than
+    by the number of entries.
+
+    Entries are keyed by the resolved file path, modification time and size,
+    and by the reader function and its options (e.g. dtype), so a file which
+    is re-downloaded or updated is parsed again. Cached values are shared
+    between calls, and must not be modified in place.
+
+    The parsers use the module level instance hermpy.data.parse_cache, which
+    can be resized with e.g.:
+
+        parse_cache.max_bytes = 4 * 1024**3
+    """
+
+    def __init__(self, max_bytes: int = 1024**3):
+        self._entries: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+        self._nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int) -> None:
+        with self._lock:
+            self._max_bytes = value
+            self._evict()
+
+    def get(self, path: Path | str, reader: Callable[..., Any], **options: Any) -> Any:
+        """
+        Return reader(path, **options), parsing the file only if it isn't
+        already cached with the same options. Options must be hashable.
+        Values larger than max_bytes are returned without caching.
+        """
+
+        path = Path(path).resolve()
+        status = path.stat()
+        key = (
+            str(path),
+            status.st_mtime_ns,
+            status.st_size,
+            reader.__qualname__,
+            tuple(sorted(options.items())),
+        )
+
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                tracing.count("parse_cache.hits")
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+            self.misses += 1
+            tracing.count("parse_cache.misses")
+
+        # Parse outside of the lock, so other files can be read concurrently.
+        value = reader(path, **options)
+        nbytes = int(value.nbytes)
+
+        with self._lock:
+            if nbytes <= self._max_bytes and key not in self._entries:
+                self._entries[key] = (value, nbytes)
+                self._nbytes += nbytes
+                self._evict()
+
+        return value
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        with self._lock:
+            return CacheStatistics(
+                self.hits,
+                self.misses,
+                self.evictions,
+                len(self._entries),
+                self._nbytes,
+                self._max_bytes,
+            )
+
+    def _evict(self) -> None:
+        # Called with the lock held
+        while self._nbytes > self._max_bytes:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._nbytes -= nbytes
+            self.evictions += 1
+
+
+# Shared by all parsers
+parse_cache = ParsedFileCache()
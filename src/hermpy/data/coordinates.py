@@ -0,0 +1,152 @@
+import numpy as np
+from astropy import units as u
+
+from hermpy.utils import Constants
+
+# Frames are named as in hermpy's column names. Primes denote aberrated
+# coordinates, rotated about Z by the aberration angle.
+FRAMES = ("MSO", "MSM", "MSO'", "MSM'")
+
+
+def transform(
+    x: np.ndarray | u.Quantity,
+    y: np.ndarray | u.Quantity,
+    z: np.ndarray | u.Quantity,
+    from_frame: str,
+    to_frame: str,
+    aberration_angle: np.ndarray | u.Quantity | None = None,
+    position: bool = True,
+    unit: u.Unit = u.km,
+    out: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Transform vector components between MSO, MSM, and their aberrated
+    variants (MSO', MSM').
+
+    MSM is offset from MSO along Z by the dipole offset, and the aberrated
+    frames are rotated about Z by the aberration angle. As the offset and
+    rotation commute, any transformation is at most one rotation and one
+    shift, which are applied together in a single pass.
+
+
+    Parameters
+    ----------
+    x, y, z : numpy.ndarray | astropy.units.Quantity
+        Vector components. Plain arrays are assumed to be in unit.
+
+    from_frame, to_frame : str {`"MSO"`, `"MSM"`, `"MSO'"`, `"MSM'"`}
+        The frames to transform between.
+
+    aberration_angle : numpy.ndarray | astropy.units.Quantity, optional
+        Aberration angle, per sample or scalar. Plain arrays are in radians.
+        Required if transforming to or from an aberrated frame.
+
+    position : bool, optional
+        Whether the vectors are positions. Other vectors (e.g. the magnetic
+        field) are only rotated, not shifted.
+
+    unit : astropy.units.Unit, optional
+        Unit of plain array positions, used for the dipole offset.
+
+    out : tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray], optional
+        Preallocated arrays to write the result to. These may be the input
+        arrays themselves.
+
+
+    Returns
+    -------
+    x, y, z : numpy.ndarray | astropy.units.Quantity
+        The transformed components. Quantities if the input were Quantities.
+    """
+
+    for frame in (from_frame, to_frame):
+        if frame not in FRAMES:
+            raise ValueError(f"Unknown frame: {frame}. Expected one of {FRAMES}")
+
+    is_quantity = isinstance(x, u.Quantity)
+    if is_quantity:
+        unit = x.unit
+    x, y, z = (_values(c, unit) for c in (x, y, z))
+
+    if out is None:
+        out = (np.empty_like(x), np.empty_like(y), np.empty_like(z))
+    x_out, y_out, z_out = out
+
+    # Rotation, in units of the aberration angle: +1 into an aberrated frame,
+    # -1 out of one.
+    rotation = to_frame.endswith("'") - from_frame.endswith("'")
+
+    if rotation != 0:
+        if aberration_angle is None:
+            raise ValueError(
+                f"An aberration angle is required to transform from {from_frame} to {to_frame}"
+            )
+
+        angle = rotation * _values(aberration_angle, u.rad)
+        cos_angle = np.cos(angle)
+        sin_angle = np.sin(angle)
+
+        # Written so that out may be the input arrays
+        rotated_x = cos_angle * x
+        rotated_x -= sin_angle * y
+
+        rotated_y = sin_angle * x
+        rotated_y += cos_angle * y
+
+        x_out[...] = rotated_x
+        y_out[...] = rotated_y
+
+    else:
+        if x_out is not x:
+            x_out[...] = x
+        if y_out is not y:
+            y_out[...] = y
+
+    # Shift, in units of the dipole offset: -1 into MSM, +1 out of MSM.
+    shift = from_frame.startswith("MSM") - to_frame.startswith("MSM")
+
+    if position and shift != 0:
+        np.add(z, shift * Constants.DIPOLE_OFFSET.to_value(unit), out=z_out)
+    elif z_out is not z:
+        z_out[...] = z
+
+    if is_quantity:
+        return tuple(u.Quantity(c, unit, copy=False) for c in (x_out, y_out, z_out))
+
+    return x_out, y_out, z_out
+
+
+def derived_quantities(
+    x: np.ndarray,
+    y: np.ndarray,
+    z: np.ndarray,
+    out: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute radial distance, magnetic local time (hours), and magnetic
+    latitude (degrees) from MSM (or MSM') positions. Local noon is towards +X.
+    """
+
+    if out is None:
+        out = (np.empty_like(x), np.empty_like(x), np.empty_like(x))
+    radial_distance, local_time, latitude = out
+
+    cylindrical_radius = np.hypot(x, y)
+
+    np.arctan2(y, x, out=local_time)
+    local_time *= 12 / np.pi
+    local_time += 12
+    np.mod(local_time, 24, out=local_time)
+
+    np.arctan2(z, cylindrical_radius, out=latitude)
+    np.degrees(latitude, out=latitude)
+
+    np.hypot(cylindrical_radius, z, out=radial_distance)
+
+    return radial_distance, local_time, latitude
+
+
+def _values(component: np.ndarray | u.Quantity, unit: u.Unit) -> np.ndarray:
+    if isinstance(component, u.Quantity):
+        return component.to_value(unit)
+
+    return np.asarray(component, dtype=float)
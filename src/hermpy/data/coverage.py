@@ -0,0 +1,353 @@
+import datetime as dt
+import io
+from pathlib import Path
+
+import numpy as np
+from astropy.config import get_cache_dir_path
+from sunpy.time import TimeRange
+
+from hermpy.utils import (
+    day_of_year_strings_to_nanoseconds,
+    day_of_year_to_nanoseconds,
+    from_nanoseconds,
+    to_nanoseconds,
+)
+from hermpy.utils.compression import open_data_file, read_data_file
+
+_NS_PER_DAY = 86_400_000_000_000
+
+# The number of rows of a file checked against a constant cadence before
+# scanning all of its times
+_PROBES = 17
+
+
+class CoverageIndex:
+    """
+    An index of where an instrument has data: contiguous intervals of
+    samples, each with its sampling cadence, built by scanning only the time
+    column of each file.
+
+    Intervals are split at gaps longer than gap_factor times the local
+    cadence, and where the cadence changes for at least min_samples samples.
+    Queries are binary searches over the sorted intervals, so take
+    O(log n + k) for k intervals returned.
+
+    The index is stored beside the hermpy download cache (see save() and
+    load()), and can be passed to ClientMESSENGER so that query() skips files
+    with no data in the time range.
+    """
+
+    def __init__(
+        self,
+        instrument: str,
+        gap_factor: float = 2.0,
+        min_samples: int = 10,
+    ):
+        self.instrument = instrument
+        self.gap_factor = gap_factor
+        self.min_samples = min_samples
+
+        self.start = np.empty(0, dtype=np.int64)
+        self.end = np.empty(0, dtype=np.int64)
+        self.cadence = np.empty(0, dtype=np.int64)
+
+        # Days (as days since 1970-01-01) for which a file has been scanned,
+        # and keys of the scanned files (their paths, sizes, and times).
+        self.days = np.empty(0, dtype=np.int64)
+        self.files: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def update(self, paths: list[Path | str]) -> None:
+        """Scan files not yet in the index, and add their intervals."""
+
+        starts, ends, cadences, days = [], [], [], [self.days]
+
+        for path in paths:
+            path = Path(path)
+            key = _file_key(path)
+            if key in self.files:
+                continue
+
+            start, end, cadence = scan_intervals(
+                path, self.instrument, self.gap_factor, self.min_samples
+            )
+
+            starts.append(start)
+            ends.append(end)
+            cadences.append(cadence)
+            days.extend(
+                np.arange(a // _NS_PER_DAY, (b - 1) // _NS_PER_DAY + 1)
+                for a, b in zip(start, end)
+            )
+            self.files.add(key)
+
+        # A rescanned day (e.g. a new version of a file) replaces what was
+        # there before.
+        new_days = np.concatenate(days[1:]) if len(days) > 1 else np.empty(0, np.int64)
+        keep = ~np.isin(self.start // _NS_PER_DAY, new_days)
+        starts.insert(0, self.start[keep])
+        ends.insert(0, self.end[keep])
+        cadences.insert(0, self.cadence[keep])
+
+        start = np.concatenate(starts)
+        order = np.argsort(start, kind="stable")
+
+        self.start = start[order]
+        self.end = np.concatenate(ends)[order]
+        self.cadence = np.concatenate(cadences)[order]
+        self.days = np.unique(np.concatenate(days))
+
+    def coverage(self, time_range: TimeRange) -> np.ndarray:
+        """
+        The data intervals overlapping a time range, clipped to it, as a
+        structured array with fields 'start', 'end' (int64 nanoseconds, see
+        hermpy.utils.to_nanoseconds) and 'cadence' (nanoseconds).
+        """
+
+        start, end = _bounds(time_range)
+        first, last = self._overlapping(start, end)
+
+        intervals = np.empty(
+            last - first,
+            dtype=[("start", np.int64), ("end", np.int64), ("cadence", np.int64)],
+        )
+        intervals["start"] = np.maximum(self.start[first:last], start)
+        intervals["end"] = np.minimum(self.end[first:last], end)
+        intervals["cadence"] = self.cadence[first:last]
+
+        return intervals
+
+    def gaps(self, time_range: TimeRange) -> list[TimeRange]:
+        """The periods within a time range with no data."""
+
+        start, end = _bounds(time_range)
+        intervals = self.coverage(time_range)
+
+        gap_starts = np.concatenate([[start], intervals["end"]])
+        gap_ends = np.concatenate([intervals["start"], [end]])
+        keep = gap_ends > gap_starts
+
+        return [
+            TimeRange(a, b)
+            for a, b in zip(
+                from_nanoseconds(gap_starts[keep]), from_nanoseconds(gap_ends[keep])
+            )
+        ]
+
+    def has_data(self, time_range: TimeRange) -> bool:
+        start, end = _bounds(time_range)
+        first, last = self._overlapping(start, end)
+
+        return last > first
+
+    def is_scanned(self, day: dt.date) -> bool:
+        """Whether a file covering a day has been scanned."""
+
+        day_number = (day - dt.date(1970, 1, 1)).days
+        index = np.searchsorted(self.days, day_number)
+
+        return index < len(self.days) and self.days[index] == day_number
+
+    def save(self, path: Path | str | None = None) -> Path:
+        """Save the index, by default to the hermpy cache directory."""
+
+        path = Path(path) if path is not None else default_path(self.instrument)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(path, "wb") as file:
+            np.savez(
+                file,
+                start=self.start,
+                end=self.end,
+                cadence=self.cadence,
+                days=self.days,
+                files=np.array(sorted(self.files), dtype=str),
+                parameters=np.array([self.gap_factor, self.min_samples]),
+            )
+
+        return path
+
+    @classmethod
+    def load(cls, instrument: str, path: Path | str | None = None) -> "CoverageIndex":
+        """
+        Load a saved index. If there is none at the path, an empty index is
+        returned.
+        """
+
+        path = Path(path) if path is not None else default_path(instrument)
+        if not path.exists():
+            return cls(instrument)
+
+        with np.load(path) as saved:
+            gap_factor, min_samples = saved["parameters"]
+            index = cls(instrument, float(gap_factor), int(min_samples))
+
+            index.start = saved["start"]
+            index.end = saved["end"]
+            index.cadence = saved["cadence"]
+            index.days = saved["days"]
+            index.files = set(saved["files"].tolist())
+
+        return index
+
+    def _overlapping(self, start: int, end: int) -> tuple[int, int]:
+        # Intervals don't overlap each other, so both ends are sorted.
+        first = np.searchsorted(self.end, start, side="right")
+        last = np.searchsorted(self.start, end, side="left")
+
+        return int(first), int(max(first, last))
+
+
+def default_path(instrument: str) -> Path:
+    name = instrument.replace(" ", "_")
+    return get_cache_dir_path("hermpy") / "coverage" / f"{name}.npz"
+
+
+def scan_times(path: Path | str, instrument: str) -> np.ndarray:
+    """
+    Read only the time column of a MAG or FIPS file, as int64 nanoseconds.
+    """
+
+    text = read_data_file(path)
+    if len(text.strip()) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    return _line_times(io.StringIO(text), instrument)
+
+
+def scan_intervals(
+    path: Path | str, instrument: str, gap_factor: float = 2.0, min_samples: int = 10
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The contiguous intervals of a MAG or FIPS file, as found by
+    contiguous_intervals() from its sample times.
+
+    Most files are fixed width tables holding a single interval at a
+    constant cadence. These are recognised from the times of a few rows
+    (the first two, the last, and some evenly spaced between), found by
+    their byte offsets without parsing the rest. Otherwise, the whole time
+    column is scanned.
+    """
+
+    with open_data_file(path, "rb") as file:
+        data = file.read()
+
+    width = data.find(b"\n") + 1
+    n_rows = data.count(b"\n")
+
+    if n_rows > 2 and len(data) == n_rows * width:
+        rows = np.unique(
+            np.concatenate([[1], np.linspace(0, n_rows - 1, _PROBES).round()])
+        ).astype(int)
+        lines = [data[i * width : (i + 1) * width].decode("ascii") for i in rows]
+
+        if all(line.endswith("\n") for line in lines):
+            times = _line_times(lines, instrument)
+
+            # As in contiguous_intervals(), cadences are rounded to the
+            # millisecond. A gap or a change of cadence anywhere moves the
+            # later rows off this grid.
+            cadence = max(int(np.round(times[1] - times[0], -6)), 1)
+            expected = times[0] + rows * cadence
+            if np.all(np.abs(times - expected) < cadence / 2):
+                return times[:1], times[-1:] + cadence, np.array([cadence], np.int64)
+
+    text = data.decode("ascii")
+    if len(text.strip()) == 0:
+        times = np.empty(0, dtype=np.int64)
+    else:
+        times = _line_times(io.StringIO(text), instrument)
+
+    return contiguous_intervals(times, gap_factor, min_samples)
+
+
+def contiguous_intervals(
+    times: np.ndarray, gap_factor: float = 2.0, min_samples: int = 10
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split sorted sample times into contiguous intervals of constant cadence.
+    Each interval ends one cadence after its last sample.
+
+    Cadences are rounded to the millisecond, so that timing jitter doesn't
+    split intervals. Runs of a different cadence shorter than min_samples are
+    absorbed into the surrounding interval.
+    """
+
+    if len(times) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    if len(times) == 1:
+        return times[:1], times[:1] + 1, np.ones(1, dtype=np.int64)
+
+    steps = np.diff(times)
+    cadences = np.maximum(np.round(steps, -6).astype(np.int64), 1)
+
+    # Runs of equal (rounded) steps
+    run_starts = np.flatnonzero(np.diff(cadences, prepend=cadences[0] - 1))
+    run_lengths = np.diff(np.append(run_starts, len(steps)))
+    run_cadences = cadences[run_starts]
+
+    # Each run takes the cadence of the latest run of at least min_samples
+    # (or the first, for those before it), so that jitter and gaps don't
+    # count as cadence changes.
+    is_long = run_lengths >= min_samples
+    if is_long.any():
+        latest_long = np.maximum.accumulate(np.where(is_long, np.arange(len(is_long)), -1))
+        latest_long[latest_long < 0] = np.argmax(is_long)
+        run_cadences = run_cadences[latest_long]
+    else:
+        run_cadences = np.full(len(run_lengths), np.median(steps), dtype=np.int64)
+
+    step_cadence = np.repeat(run_cadences, run_lengths)
+
+    # Step i is between samples i and i + 1. A gap ends an interval at sample
+    # i, while a cadence change starts a new interval at sample i, with no
+    # gap between the two.
+    is_gap = steps > gap_factor * step_cadence
+    is_change = np.zeros(len(steps), dtype=bool)
+    is_change[1:] = (step_cadence[1:] != step_cadence[:-1]) & ~is_gap[:-1] & ~is_gap[1:]
+
+    gap_starts = np.flatnonzero(is_gap) + 1
+    change_starts = np.flatnonzero(is_change)
+
+    first_samples = np.unique(np.concatenate([[0], gap_starts, change_starts]))
+    next_first = np.append(first_samples[1:], len(times))
+
+    interval_cadence = step_cadence[np.minimum(first_samples, len(steps) - 1)]
+
+    ends_at_change = np.isin(next_first, change_starts)
+    interval_end = np.where(
+        ends_at_change,
+        times[np.minimum(next_first, len(times) - 1)],
+        times[next_first - 1] + interval_cadence,
+    )
+
+    return times[first_samples], interval_end, interval_cadence
+
+
+def _line_times(lines, instrument: str) -> np.ndarray:
+    # The times of the rows of a MAG or FIPS file, from any input np.loadtxt
+    # accepts (e.g. a list of lines).
+    if instrument.startswith("FIPS"):
+        strings = np.loadtxt(lines, dtype=str, usecols=[1], ndmin=1)
+        return day_of_year_strings_to_nanoseconds(strings)
+
+    components = np.loadtxt(lines, usecols=range(5), ndmin=2)
+    return day_of_year_to_nanoseconds(*components.T)
+
+
+def _bounds(time_range: TimeRange) -> tuple[int, int]:
+    return (
+        int(to_nanoseconds(time_range.start)[0]),
+        int(to_nanoseconds(time_range.end)[0]),
+    )
+
+
+def _file_key(path: Path) -> str:
+    # The full path, as files in the astropy download cache are all named
+    # 'contents'
+    status = path.stat()
+    return f"{path.resolve()}:{status.st_size}:{status.st_mtime_ns}"
@@ -0,0 +1,574 @@
+"""
+Fixed-length windows of data around events, for training classifiers, built
+into memory-mapped arrays on disk.
+
+A dataset directory holds:
+
+    dataset.json    settings, progress, and the layout of the arrays
+    mag.npy         MAG windows, (sample, lag, channel)
+    fips.npy        FIPS proton flux windows, (sample, lag, energy channel)
+    index/          one row per sample (an InstantEventList, see EventList.save)
+
+Load one with WindowDataset.load().
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+from astropy import units as u
+from astropy.table import QTable
+
+from hermpy.data.epochs import fill_windows
+from hermpy.data.lists import EventList, InstantEventList
+from hermpy.utils import (
+    day_of_year_strings_to_nanoseconds,
+    day_of_year_to_nanoseconds,
+    from_nanoseconds,
+)
+from hermpy.utils.compression import open_data_file
+from hermpy.utils.tracing import span, traced
+
+_NS_PER_DAY = 86_400_000_000_000
+
+# Bump if the layout of the dataset directory changes, so that an old
+# directory isn't resumed.
+_FORMAT_VERSION = 1
+
+# The number of samples to summarise at once when computing coverage
+_COVERAGE_BATCH = 4096
+
+
+class WindowDataset:
+    """
+    A dataset built by build_window_dataset(), with arrays memory-mapped from
+    disk.
+
+    index is an InstantEventList with a row per sample: its time ("UTC"),
+    "Label" (the crossing type, or "Negative"), "Crossing Index" (the row in
+    the crossing list, or -1), and "Coverage" (the fraction of the MAG
+    window with data). mag and fips are arrays of windows, in the same order
+    as the index, on the lags mag_lags and fips_lags (in seconds).
+    """
+
+    def __init__(self, path: Path, description: dict, mode: str = "r"):
+        self.path = path
+        self.description = description
+
+        self.index = EventList.load(path / "index")
+        self.columns: list[str] = description["columns"]
+        self.units: list[str] = description["units"]
+        self.mag_lags = np.array(description["mag_lags"]) / 1e9
+        self.mag = np.load(path / "mag.npy", mmap_mode=mode)
+
+        self.fips_lags = self.fips = None
+        if description["fips_lags"] is not None:
+            self.fips_lags = np.array(description["fips_lags"]) / 1e9
+            self.fips = np.load(path / "fips.npy", mmap_mode=mode)
+
+    def __len__(self) -> int:
+        return len(self.mag)
+
+    @classmethod
+    def load(cls, path: Path | str) -> "WindowDataset":
+        path = Path(path)
+        description = _read_description(path)
+
+        if description is None or not description["complete"]:
+            raise ValueError(
+                f"No complete dataset at {path}. Run build_window_dataset() to "
+                "build or resume it."
+            )
+
+        return cls(path, description)
+
+
+@traced("build_window_dataset")
+def build_window_dataset(
+    crossings: InstantEventList,
+    mag_paths: list[Path],
+    output: Path | str,
+    window: u.Quantity,
+    resolution: u.Quantity,
+    columns: tuple[str, ...] | list[str] = ("Bx", "By", "Bz"),
+    negatives: int = 0,
+    exclusion: u.Quantity | None = None,
+    fips_paths: list[Path] | None = None,
+    fips_resolution: u.Quantity = 10 * u.s,
+    label_column: str = "Type",
+    dtype: npt.DTypeLike = np.float32,
+    max_gap: u.Quantity | None = None,
+    seed: int = 0,
+    workers: int | None = None,
+) -> WindowDataset:
+    """
+    Extract windows of MAG (and optionally FIPS) data around each crossing,
+    and around randomly drawn negative samples, into memory-mapped arrays in
+    the directory output.
+
+    Windows are as in superposed_epoch(): data are linearly interpolated onto
+    lags between -window and +window, in steps of resolution (fips_resolution
+    for FIPS), and are NaN where there is no data, or a gap wider than
+    max_gap.
+
+    Each file is read once, by a pool of worker processes, and writes the
+    windows which overlap its day directly into the arrays. Windows are
+    planned by reading only the first line of each file. Progress is
+    recorded after each file, so an interrupted build is resumed by calling
+    this again with the same arguments. Given the same seed, the output is
+    identical however many workers are used.
+
+
+    Parameters
+    ----------
+    crossings : InstantEventList
+        Events to centre windows on, e.g. from CrossingList.from_csv()
+
+    mag_paths : list[Path]
+        MAG day files, e.g. from ClientMESSENGER.fetch(). Any product may be
+        used, though all files should be of the same product.
+
+    output : Path | str
+        Directory to write the dataset into.
+
+    window : astropy.units.Quantity
+        Half-width of the window around each sample.
+
+    resolution : astropy.units.Quantity
+        Spacing of the MAG lag grid.
+
+    columns : list[str]
+        MAG columns to extract, which may include "|B|".
+
+    negatives : int
+        Number of negative samples, drawn uniformly from the days of
+        mag_paths.
+
+    exclusion : astropy.units.Quantity, optional
+        Smallest distance between a negative sample and any crossing.
+        Defaults to window, so that no crossing is within a negative window.
+
+    fips_paths : list[Path], optional
+        FIPS day files. If given, windows of proton flux are also extracted.
+
+    label_column : str
+        Column of crossings to label samples with. If missing, crossings are
+        labelled "Crossing".
+
+    dtype : numpy.typing.DTypeLike
+        Precision of the arrays on disk.
+
+    seed : int
+        Seed for drawing negative samples.
+
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs. With one
+        worker, files are processed in this process.
+
+
+    Returns
+    -------
+    out : WindowDataset
+    """
+
+    output = Path(output)
+    columns = list(columns)
+    exclusion = window if exclusion is None else exclusion
+
+    lags = _lags(window, resolution)
+    fips_lags = _lags(window, fips_resolution) if fips_paths else None
+
+    crossing_times = crossings.time_index
+    if label_column in crossings.table.colnames:
+        crossing_labels = np.asarray(crossings.table[label_column], dtype=str)
+    else:
+        crossing_labels = np.full(len(crossings), "Crossing")
+
+    with span("build_window_dataset.plan"):
+        mag_days = {_file_day(path, "MAG"): Path(path) for path in mag_paths}
+        fips_days = {_file_day(path, "FIPS"): Path(path) for path in fips_paths or []}
+
+        negative_times = _draw_negatives(
+            crossing_times,
+            np.array(sorted(mag_days), dtype=np.int64),
+            negatives,
+            round(exclusion.to_value(u.ns)),
+            seed,
+        )
+
+        times = np.concatenate([crossing_times, negative_times])
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        crossing_index = np.concatenate(
+            [np.arange(len(crossing_times)), np.full(len(negative_times), -1)]
+        )[order]
+        labels = np.concatenate(
+            [crossing_labels, np.full(len(negative_times), "Negative")]
+        )[order]
+
+    settings = {
+        "format": _FORMAT_VERSION,
+        "columns": columns,
+        "mag_lags": lags.tolist(),
+        "fips_lags": None if fips_lags is None else fips_lags.tolist(),
+        "dtype": np.dtype(dtype).str,
+        "max_gap": None if max_gap is None else max_gap.to_value(u.ns),
+        "seed": seed,
+        "fingerprint": _fingerprint(
+            times, labels, list(mag_days.values()) + list(fips_days.values())
+        ),
+    }
+
+    description = _open(
+        output, settings, len(times), fips_days[min(fips_days)] if fips_days else None
+    )
+    if description["complete"]:
+        return WindowDataset(output, description)
+
+    # Files already processed by an interrupted build are skipped
+    tasks = []
+    for instrument, days, instrument_lags in (
+        ("MAG", mag_days, lags),
+        ("FIPS", fips_days, fips_lags),
+    ):
+        for day, path in sorted(days.items()):
+            if f"{instrument} {day}" in description["files"]:
+                continue
+
+            task = _plan(
+                instrument, path, day, output, times, instrument_lags, columns, max_gap
+            )
+            if task is not None:
+                tasks.append(task)
+
+    for name, result in _run(tasks, workers):
+        description["files"][name] = result
+        if len(description["units"]) == 0 and "units" in result:
+            description["units"] = result["units"]
+        _write_description(output, description)
+
+    with span("build_window_dataset.finish"):
+        _fill_boundaries(output / "mag.npy", description["files"], "MAG", lags, times)
+        if fips_paths:
+            _fill_boundaries(
+                output / "fips.npy", description["files"], "FIPS", fips_lags, times
+            )
+
+        index = QTable(
+            {
+                "UTC": from_nanoseconds(times),
+                "Label": labels,
+                "Crossing Index": crossing_index,
+                "Coverage": _coverage(np.load(output / "mag.npy", mmap_mode="r")),
+            }
+        )
+        InstantEventList(index, "UTC", copy=False).save(output / "index")
+
+        description["complete"] = True
+        _write_description(output, description)
+
+    return WindowDataset(output, description)
+
+
+@dataclass(frozen=True)
+class _FileTask:
+    instrument: str
+    path: Path
+    day: int
+    array_path: Path
+    # The samples whose windows overlap the file's day
+    first: int
+    stop: int
+    times: np.ndarray
+    lags: np.ndarray
+    columns: list[str]
+    max_gap: float | None
+
+
+def _plan(
+    instrument: str,
+    path: Path,
+    day: int,
+    output: Path,
+    times: np.ndarray,
+    lags: np.ndarray,
+    columns: list[str],
+    max_gap: u.Quantity | None,
+) -> _FileTask | None:
+    # Samples are sorted and windows are all the same length, so the samples
+    # with windows overlapping the day are contiguous.
+    day_start = day * _NS_PER_DAY
+    first = np.searchsorted(times, day_start - lags[-1], side="left")
+    stop = np.searchsorted(times, day_start + _NS_PER_DAY - lags[0], side="right")
+
+    if stop <= first:
+        return None
+
+    return _FileTask(
+        instrument,
+        path,
+        day,
+        output / f"{instrument.lower()}.npy",
+        int(first),
+        int(stop),
+        times[first:stop],
+        lags,
+        columns,
+        None if max_gap is None else max_gap.to_value(u.ns),
+    )
+
+
+def _run(tasks: list[_FileTask], workers: int | None):
+    # Yields (name, result) for each file as it completes
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield f"{task.instrument} {task.day}", _fill_file(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_fill_file, task): f"{task.instrument} {task.day}"
+            for task in tasks
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def _fill_file(task: _FileTask) -> dict:
+    # Runs in a worker process: read one file and write the windows which
+    # overlap it. Returns what's needed to fill across midnight later: the
+    # first and last samples of the file, and the largest gap interpolated.
+    times, values, units = _read(task)
+
+    if len(times) == 0:
+        return {}
+
+    if task.max_gap is None:
+        gap = 2 * float(np.median(np.diff(times))) if len(times) > 1 else 0.0
+    else:
+        gap = task.max_gap
+
+    windows = np.load(task.array_path, mmap_mode="r+")
+    fill_windows(
+        windows[task.first : task.stop], task.times, task.lags, times, values, gap
+    )
+    windows.flush()
+
+    result = {
+        "first": [int(times[0]), values[0].tolist()],
+        "last": [int(times[-1]), values[-1].tolist()],
+        "gap": gap,
+    }
+    if units is not None:
+        result["units"] = units
+
+    return result
+
+
+def _read(task: _FileTask) -> tuple[np.ndarray, np.ndarray, list[str] | None]:
+    # Imported here, as the parsers import this package's heavier modules.
+    # The whole file is wanted, so it's read directly, rather than through
+    # the parsers, which slice their files to a time range.
+    from hermpy.data.spectrograms import _read_messenger_fips_file
+    from hermpy.data.timeseries import _read_messenger_mag_file, add_field_magnitude
+
+    with span("build_window_dataset.read", instrument=task.instrument):
+        if task.instrument == "FIPS":
+            fips = _read_messenger_fips_file(task.path)
+            times = fips["UTC"].values.astype("datetime64[ns]").view(np.int64)
+            return times, fips["Proton Flux"].values, None
+
+        mag = _read_messenger_mag_file(task.path)
+        if "|B|" in task.columns:
+            mag = add_field_magnitude(mag)
+
+    values = np.column_stack([mag[c] for c in task.columns]).astype(np.float64)
+    units = [str(mag.units.get(c, "")) for c in task.columns]
+
+    return mag.time, values, units
+
+
+def _fill_boundaries(
+    array_path: Path,
+    files: dict[str, dict],
+    instrument: str,
+    lags: np.ndarray,
+    times: np.ndarray,
+) -> None:
+    # Each file only fills the lags within its own span, so lags between the
+    # last sample of one day and the first of the next are filled here.
+    days = sorted(
+        int(name.split(" ")[1])
+        for name, result in files.items()
+        if name.startswith(instrument + " ") and result
+    )
+
+    windows = np.load(array_path, mmap_mode="r+")
+    for day, next_day in zip(days[:-1], days[1:]):
+        if next_day != day + 1:
+            continue
+
+        before = files[f"{instrument} {day}"]
+        after = files[f"{instrument} {next_day}"]
+        fill_windows(
+            windows,
+            times,
+            lags,
+            np.array([before["last"][0], after["first"][0]], dtype=np.int64),
+            np.array([before["last"][1], after["first"][1]]),
+            max(before["gap"], after["gap"]),
+        )
+
+    windows.flush()
+
+
+def _draw_negatives(
+    crossing_times: np.ndarray,
+    days: np.ndarray,
+    n: int,
+    exclusion: int,
+    seed: int,
+) -> np.ndarray:
+    # Rejection sampling, in batches: draw times uniformly over the days,
+    # and keep those far enough from every crossing.
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if len(days) == 0:
+        raise ValueError("Negative samples need at least one MAG file to draw from")
+
+    rng = np.random.default_rng(seed)
+    accepted: list[np.ndarray] = []
+    remaining = n
+
+    for _ in range(100):
+        candidates = rng.choice(days, 2 * remaining) * _NS_PER_DAY + rng.integers(
+            0, _NS_PER_DAY, 2 * remaining
+        )
+
+        if len(crossing_times) > 0:
+            after = np.clip(np.searchsorted(crossing_times, candidates), 1, len(crossing_times))
+            distance = np.minimum(
+                np.abs(candidates - crossing_times[after - 1]),
+                np.abs(crossing_times[np.minimum(after, len(crossing_times) - 1)] - candidates),
+            )
+            candidates = candidates[distance > exclusion]
+
+        accepted.append(candidates[:remaining])
+        remaining -= len(accepted[-1])
+        if remaining == 0:
+            return np.sort(np.concatenate(accepted))
+
+    raise ValueError(
+        f"Could only draw {n - remaining} of {n} negative samples. Reduce the "
+        "exclusion, or provide more days of data."
+    )
+
+
+def _file_day(path: Path | str, instrument: str) -> int:
+    # The day of a file (as days since 1970-01-01), from its first line only
+    with open_data_file(path) as file:
+        line = file.readline().split()
+
+    if len(line) == 0:
+        raise ValueError(f"Cannot determine the day of empty file {path}")
+
+    if instrument == "FIPS":
+        nanoseconds = day_of_year_strings_to_nanoseconds(np.array([line[1]]))
+    else:
+        nanoseconds = day_of_year_to_nanoseconds(*np.array(line[:5], dtype=float)[:, None])
+
+    return int(nanoseconds[0] // _NS_PER_DAY)
+
+
+def _lags(window: u.Quantity, resolution: u.Quantity) -> np.ndarray:
+    half_width = round(window.to_value(u.ns))
+    return np.arange(
+        -half_width, half_width + 1, round(resolution.to_value(u.ns)), dtype=np.int64
+    )
+
+
+def _coverage(windows: np.ndarray) -> np.ndarray:
+    coverage = np.empty(len(windows))
+    for start in range(0, len(windows), _COVERAGE_BATCH):
+        batch = windows[start : start + _COVERAGE_BATCH]
+        coverage[start : start + len(batch)] = np.isfinite(batch).mean(axis=(1, 2))
+
+    return coverage
+
+
+def _fingerprint(times: np.ndarray, labels: np.ndarray, paths: list[Path]) -> str:
+    # Identifies the samples and input files, so that a directory is only
+    # resumed for the same inputs.
+    digest = hashlib.sha256(times.tobytes())
+    digest.update("\n".join(labels).encode())
+    for path in paths:
+        digest.update(f"{path.name} {path.stat().st_size}".encode())
+
+    return digest.hexdigest()
+
+
+def _open(output: Path, settings: dict, n_samples: int, fips_path: Path | None) -> dict:
+    # Resume the dataset in output if it was built with the same settings,
+    # otherwise create it, with NaN-filled arrays. The number of FIPS energy
+    # channels is taken from the data of one file, fips_path.
+    description = _read_description(output)
+
+    if description is not None:
+        if {key: description[key] for key in settings} != settings:
+            raise ValueError(
+                f"{output} holds a dataset built with different settings or "
+                "inputs. Choose another directory, or remove it."
+            )
+
+        return description
+
+    output.mkdir(parents=True, exist_ok=True)
+
+    arrays = {"mag.npy": (n_samples, len(settings["mag_lags"]), len(settings["columns"]))}
+    if fips_path is not None:
+        channels = _fips_channels(fips_path)
+        arrays["fips.npy"] = (n_samples, len(settings["fips_lags"]), channels)
+
+    for name, shape in arrays.items():
+        array = np.lib.format.open_memmap(
+            output / name, mode="w+", dtype=np.dtype(settings["dtype"]), shape=shape
+        )
+        array[:] = np.nan
+        array.flush()
+
+    description = settings | {"units": [], "files": {}, "complete": False}
+    _write_description(output, description)
+
+    return description
+
+
+def _fips_channels(path: Path) -> int:
+    from hermpy.data.spectrograms import _read_messenger_fips_file
+
+    return _read_messenger_fips_file(path).sizes["Energy Channel"]
+
+
+def _read_description(path: Path) -> dict | None:
+    if not (path / "dataset.json").exists():
+        return None
+
+    with open(path / "dataset.json") as file:
+        return json.load(file)
+
+
+def _write_description(path: Path, description: dict) -> None:
+    # Written to a temporary file, then moved into place, so that an
+    # interrupted write doesn't lose the progress so far.
+    temporary = path / "dataset.json.tmp"
+    with open(temporary, "w") as file:
+        json.dump(description, file, indent=4)
+
+    os.replace(temporary, path / "dataset.json")
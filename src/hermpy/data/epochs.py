@@ -0,0 +1,177 @@
+from collections.abc import Iterable
+
+import numpy as np
+import xarray as xr
+from astropy import units as u
+from astropy.table import QTable
+
+from hermpy.data.lists import InstantEventList
+from hermpy.utils import to_nanoseconds
+
+# The number of (event, lag) pairs to interpolate at once. This bounds the
+# size of the temporary arrays, independent of the number of events.
+_BATCH_SIZE = 2**21
+
+
+def superposed_epoch(
+    events: InstantEventList,
+    data: QTable | Iterable[QTable],
+    columns: list[str],
+    window: u.Quantity,
+    resolution: u.Quantity,
+    time_column: str = "UTC",
+    max_gap: u.Quantity | None = None,
+) -> xr.DataArray:
+    """Extract windows of data around each event, on a common lag grid.
+
+    Data are linearly interpolated onto times event + lag, for lags between
+    -window and +window in steps of resolution. Where the data have a gap
+    wider than max_gap, or don't cover a lag at all, the result is NaN.
+
+    Data may be a single sorted timeseries, or an iterable of sorted
+    timeseries chunks in time order (e.g. one parsed table per day file,
+    from a generator). Each chunk is visited once, and only one chunk need be
+    held in memory at a time.
+
+
+    Parameters
+    ----------
+    events : InstantEventList
+        Events to centre windows on, e.g. from CrossingList.from_csv()
+
+    data : QTable | Iterable[QTable]
+        Timeseries, or chunks of a timeseries.
+
+    columns : list[str]
+        Columns of data to extract. These form the channel dimension.
+
+    window : astropy.units.Quantity
+        Half-width of the window around each event.
+
+    resolution : astropy.units.Quantity
+        Spacing of the lag grid.
+
+    max_gap : astropy.units.Quantity, optional
+        Largest spacing between samples to interpolate across. Defaults to
+        twice the median sample spacing of each chunk.
+
+
+    Returns
+    -------
+    out : xarray.DataArray
+        Array with dimensions ("Event", "Lag", "Channel"). Lag is given in
+        seconds.
+    """
+
+    half_width = round(window.to_value(u.ns))
+    lags = np.arange(
+        -half_width, half_width + 1, round(resolution.to_value(u.ns)), dtype=np.int64
+    )
+
+    event_times = events.time_index
+
+    windows = np.full((len(event_times), len(lags), len(columns)), np.nan)
+    units: list[str] = []
+
+    if isinstance(data, QTable):
+        data = [data]
+
+    previous_time: np.ndarray | None = None
+    previous_values: np.ndarray | None = None
+
+    for chunk in data:
+        if len(chunk) == 0:
+            continue
+
+        times = to_nanoseconds(chunk[time_column])
+        values = np.column_stack([_column_values(chunk[c]) for c in columns])
+
+        if len(units) == 0:
+            units = [str(getattr(chunk[c], "unit", "")) for c in columns]
+
+        # We carry over the last sample of the previous chunk, so that lags
+        # which fall between two chunks can still be interpolated.
+        if previous_time is not None:
+            if times[0] < previous_time[0]:
+                raise ValueError("Data chunks must be sorted and in time order")
+
+            times = np.concatenate([previous_time, times])
+            values = np.concatenate([previous_values, values])
+
+        if max_gap is None:
+            gap = 2 * np.median(np.diff(times)) if len(times) > 1 else 0
+        else:
+            gap = max_gap.to_value(u.ns)
+
+        fill_windows(windows, event_times, lags, times, values, gap)
+
+        previous_time = times[-1:]
+        previous_values = values[-1:]
+
+    return xr.DataArray(
+        windows,
+        dims=("Event", "Lag", "Channel"),
+        coords={
+            "Event": event_times.view("datetime64[ns]"),
+            "Lag": lags / 1e9,
+            "Channel": columns,
+        },
+        attrs={"Lag Unit": "s", "Channel Units": units},
+    )
+
+
+def fill_windows(
+    windows: np.ndarray,
+    event_times: np.ndarray,
+    lags: np.ndarray,
+    times: np.ndarray,
+    values: np.ndarray,
+    max_gap: float,
+) -> None:
+    """
+    Interpolate one sorted chunk of samples (times, values) onto the times
+    event_times[:, None] + lags, writing into windows (events x lags x
+    channels) in place. Only lags within the span of the chunk are written.
+    All times are int64 nanoseconds.
+    """
+
+    if len(times) < 2:
+        return
+
+    # Only events whose windows overlap this chunk need to be considered.
+    first_event = np.searchsorted(event_times, times[0] - lags[-1], side="left")
+    last_event = np.searchsorted(event_times, times[-1] - lags[0], side="right")
+
+    batch = max(_BATCH_SIZE // len(lags), 1)
+
+    for start in range(first_event, last_event, batch):
+        stop = min(start + batch, last_event)
+
+        targets = event_times[start:stop, None] + lags[None, :]
+        in_span = (targets >= times[0]) & (targets <= times[-1])
+
+        event_index, lag_index = np.nonzero(in_span)
+        targets = targets[in_span]
+
+        right = np.clip(np.searchsorted(times, targets, side="right"), 1, len(times) - 1)
+        left = right - 1
+
+        spacing = times[right] - times[left]
+        weight = np.divide(
+            targets - times[left],
+            spacing,
+            out=np.zeros(len(targets)),
+            where=spacing > 0,
+        )[:, None]
+
+        interpolated = values[left] * (1 - weight) + values[right] * weight
+        interpolated[spacing > max_gap] = np.nan
+
+        windows[start + event_index, lag_index] = interpolated
+
+
+def _column_values(column) -> np.ndarray:
+    if isinstance(column, u.Quantity):
+        return column.value
+
+    return np.asarray(column, dtype=float)
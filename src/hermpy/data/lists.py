@@ -1,15 +1,26 @@
+import heapq
+import json
+import warnings
 from abc import ABC
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from astropy.table import QTable, Table
+from astropy import units as u
+from astropy.table import Column, MaskedColumn, QTable, Table
 from astropy.time import Time
+from sunpy.time import TimeRange
+
+from hermpy.utils import from_nanoseconds, nearest_indices, to_nanoseconds
 
 
 class EventList(ABC):
 
-    def __init__(self, table: QTable):
-        self.table = table.copy()
+    def __init__(self, table: QTable, copy: bool = True):
+        # The input table is copied so that later changes to it don't affect
+        # the list. If ownership of the table is being handed over to the
+        # list, as when loading from file, the copy can be skipped.
+        self.table = table.copy() if copy else table
 
         # Maybe perform some checks on the table here. Input tables for lists
         # should not be of length 1.
@@ -17,10 +28,132 @@ class EventList(ABC):
         # Maybe also some itteration logic? Though that can be handled directly
         # by the astropy table I'm sure
 
+    def _sort_by_time(self, time_column: str) -> np.ndarray:
+        # Sort the table by a time column, and return that column as int64
+        # nanoseconds. Tables which are already sorted (such as lists loaded
+        # from file) are left untouched, keeping any memory-mapped columns.
+        nanoseconds = to_nanoseconds(self.table[time_column])
+
+        if np.any(nanoseconds[1:] < nanoseconds[:-1]):
+            order = np.argsort(nanoseconds, kind="stable")
+            self.table = self.table[order]
+            nanoseconds = nanoseconds[order]
+
+        return nanoseconds
+
+    def _arguments(self) -> dict[str, str]:
+        # The constructor arguments (other than the table) needed to
+        # reconstruct this list.
+        return {}
+
+    def save(self, path: Path) -> None:
+        """
+        Save the list to a directory of binary numpy (.npy) files, one per
+        column, alongside a JSON description of the columns, metadata, and
+        list type. Time columns are stored as int64 nanoseconds since
+        1970-01-01 UTC.
+
+        This is much faster to load than a csv file, as no text or time
+        parsing is required, and columns can be memory-mapped.
+        """
+
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        columns: list[dict[str, str]] = []
+        for i, name in enumerate(self.table.colnames):
+            column = self.table[name]
+            description = {"name": name, "file": f"{i:03d}.npy"}
+
+            if isinstance(column, Time):
+                description["kind"] = "time"
+                data = to_nanoseconds(column)
+
+            elif isinstance(column, u.Quantity):
+                description["kind"] = "quantity"
+                description["unit"] = column.unit.to_string()
+                data = column.value
+
+            else:
+                description["kind"] = "column"
+                data = np.asarray(column)
+
+                if getattr(column, "mask", None) is not None and np.any(column.mask):
+                    description["mask"] = f"{i:03d}-mask.npy"
+                    np.save(path / description["mask"], np.asarray(column.mask))
+                    data = np.asarray(column.filled())
+
+            if data.dtype.hasobject:
+                raise ValueError(
+                    f"Column {name} has dtype object, which can't be saved. "
+                    "Convert it to a string or numeric type first."
+                )
+
+            np.save(path / description["file"], data, allow_pickle=False)
+            columns.append(description)
+
+        with open(path / "list.json", "w") as file:
+            json.dump(
+                {
+                    "type": type(self).__name__,
+                    "arguments": self._arguments(),
+                    "columns": columns,
+                    "meta": dict(self.table.meta),
+                },
+                file,
+                indent=4,
+                default=str,
+            )
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = False) -> "EventList":
+        """
+        Load a list saved with EventList.save(). The list is returned as the
+        type it was saved as.
+
+        If mmap, numeric (non-time) columns are memory-mapped from disk rather
+        than read into memory. The loaded table is handed to the list without
+        a defensive copy.
+        """
+
+        path = Path(path)
+
+        with open(path / "list.json") as file:
+            description = json.load(file)
+
+        list_types = {c.__name__: c for c in _all_subclasses(EventList)}
+        list_type = list_types[description["type"]]
+
+        columns = {}
+        for column in description["columns"]:
+            data = np.load(
+                path / column["file"], mmap_mode="r" if mmap else None, allow_pickle=False
+            )
+
+            match column["kind"]:
+                case "time":
+                    columns[column["name"]] = from_nanoseconds(data)
+
+                case "quantity":
+                    columns[column["name"]] = u.Quantity(
+                        data, column["unit"], copy=False
+                    )
+
+                case _:
+                    if "mask" in column:
+                        mask = np.load(path / column["mask"])
+                        columns[column["name"]] = MaskedColumn(data, mask=mask, copy=False)
+                    else:
+                        columns[column["name"]] = Column(data, copy=False)
+
+        table = QTable(columns, meta=description["meta"], copy=False)
+
+        return list_type(table, copy=False, **description["arguments"])
+
 
 class InstantEventList(EventList):
-    def __init__(self, table: QTable, time_column: str):
-        super().__init__(table)
+    def __init__(self, table: QTable, time_column: str, copy: bool = True):
+        super().__init__(table, copy=copy)
 
         if time_column not in self.table.colnames:
             raise ValueError(
@@ -28,12 +161,79 @@ class InstantEventList(EventList):
             )
 
         self.time_column = time_column
-        self.table.sort(self.time_column)
+
+        # Comparisons between astropy Time objects are slow, so we keep an
+        # int64 nanosecond copy of the (sorted) time column to search against.
+        # This is built once, and so will not reflect later edits to
+        # self.table.
+        self.time_index = self._sort_by_time(self.time_column)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _arguments(self) -> dict[str, str]:
+        return {"time_column": self.time_column}
+
+    def events_in(self, time_range: TimeRange) -> QTable:
+        """
+        Return the rows of the list with times in [time_range.start,
+        time_range.end).
+        """
+
+        start, end = self._window_bounds(
+            to_nanoseconds(time_range.start), to_nanoseconds(time_range.end)
+        )
+
+        return self.table[start[0] : end[0]]
+
+    def nearest(self, times) -> int | np.ndarray:
+        """
+        Find the row index of the event closest to each time. A single time
+        returns an int, while an array of times (e.g. the time column of a
+        timeseries) returns an array of indices, computed in one vectorised
+        call.
+        """
+
+        if len(self) == 0:
+            raise ValueError("Cannot find nearest event in an empty list")
+
+        indices = nearest_indices(self.time_index, to_nanoseconds(times))
+
+        if _is_scalar_time(times):
+            return int(indices[0])
+
+        return indices
+
+    def count_in_windows(self, starts, ends) -> np.ndarray:
+        """
+        Count the number of events within each window [starts[i], ends[i]).
+        """
+
+        start_indices, end_indices = self._window_bounds(
+            to_nanoseconds(starts), to_nanoseconds(ends)
+        )
+
+        return np.maximum(end_indices - start_indices, 0)
+
+    def _window_bounds(
+        self, starts: np.ndarray, ends: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # Row indices bounding the half-open windows [starts, ends)
+        return (
+            np.searchsorted(self.time_index, starts, side="left"),
+            np.searchsorted(self.time_index, ends, side="left"),
+        )
 
 
 class DurationEventList(EventList):
-    def __init__(self, table: QTable, start_time_column: str, end_time_column: str):
-        super().__init__(table)
+    def __init__(
+        self,
+        table: QTable,
+        start_time_column: str,
+        end_time_column: str,
+        copy: bool = True,
+    ):
+        super().__init__(table, copy=copy)
 
         for col in (start_time_column, end_time_column):
             if col not in self.table.colnames:
@@ -42,6 +242,90 @@ class DurationEventList(EventList):
         self.start_time_column = start_time_column
         self.end_time_column = end_time_column
 
+        # As with InstantEventList, we keep int64 nanosecond copies of the
+        # start and end times. To answer "which interval contains time t?" for
+        # many t at once, we also split the timeline into elementary segments
+        # at every start and end time, and label each segment with the
+        # interval covering it. Looking up a time is then a single binary
+        # search.
+        self.start_index = self._sort_by_time(self.start_time_column)
+        self.end_index = to_nanoseconds(self.table[self.end_time_column])
+
+        if np.any(self.end_index < self.start_index):
+            raise ValueError("Input table contains intervals which end before they start")
+
+        self._running_max_end = np.maximum.accumulate(self.end_index)
+        self._segment_edges, self._segment_labels = _label_segments(
+            self.start_index, self.end_index
+        )
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _arguments(self) -> dict[str, str]:
+        return {
+            "start_time_column": self.start_time_column,
+            "end_time_column": self.end_time_column,
+        }
+
+    def interval_at(self, times) -> int | np.ndarray:
+        """
+        Find the row index of the interval [start, end) containing each time,
+        or -1 where no interval does. Where intervals overlap, the one which
+        started most recently is chosen. An array of N times is labelled in
+        O(N log M) for M intervals.
+        """
+
+        nanoseconds = to_nanoseconds(times)
+
+        segments = (
+            np.searchsorted(self._segment_edges, nanoseconds, side="right") - 1
+        )
+        inside = (segments >= 0) & (segments < len(self._segment_labels))
+
+        indices = np.full(len(nanoseconds), -1, dtype=np.intp)
+        indices[inside] = self._segment_labels[segments[inside]]
+
+        if _is_scalar_time(times):
+            return int(indices[0])
+
+        return indices
+
+    def overlapping(self, time_range: TimeRange) -> QTable:
+        """
+        Return the intervals which overlap [time_range.start, time_range.end).
+        """
+
+        return self.table[
+            self._overlapping_indices(
+                to_nanoseconds(time_range.start)[0], to_nanoseconds(time_range.end)[0]
+            )
+        ]
+
+    def add_interval_column(
+        self, table: QTable, time_column: str = "UTC", column_name: str = "Interval"
+    ) -> QTable:
+        """
+        Add a column to a timeseries table with the row index of the interval
+        in this list containing each sample (-1 if none).
+        """
+
+        table[column_name] = self.interval_at(table[time_column])
+
+        return table
+
+    def _overlapping_indices(self, start: int, end: int) -> np.ndarray:
+        # Intervals are sorted by start time, so only those before
+        # last_candidate can start before the window ends. The running maximum
+        # of end times is sorted too, and lets us skip all intervals before
+        # first_candidate, which certainly end before the window starts.
+        last_candidate = np.searchsorted(self.start_index, end, side="left")
+        first_candidate = np.searchsorted(self._running_max_end, start, side="right")
+
+        candidates = np.arange(first_candidate, max(first_candidate, last_candidate))
+
+        return candidates[self.end_index[candidates] > start]
+
 
 class CrossingList:
 
@@ -56,8 +340,204 @@ class CrossingList:
 
         table = QTable(table)
 
-        return InstantEventList(table, time_column=time_column)
+        return InstantEventList(table, time_column=time_column, copy=False)
 
 
 class CrossingIntervalList:
-    pass
+    """
+    Pair boundary crossings into the intervals between them. By default,
+    bow shock crossings are paired into intervals downstream of the bow shock
+    (BS_IN to BS_OUT), and magnetopause crossings into intervals within the
+    magnetosphere (MP_IN to MP_OUT).
+    """
+
+    DEFAULT_PAIRS: dict[str, tuple[str, str]] = {
+        "Bow Shock": ("BS_IN", "BS_OUT"),
+        "Magnetopause": ("MP_IN", "MP_OUT"),
+    }
+
+    @classmethod
+    def from_crossings(
+        cls,
+        crossings: InstantEventList,
+        type_column: str = "Type",
+        pairs: dict[str, tuple[str, str]] | None = None,
+        strict: bool = False,
+    ) -> DurationEventList:
+        """
+        Pair each start crossing with the next crossing of the same boundary,
+        if that crossing is the matching end type.
+
+        Crossings which can't be paired (e.g. two inbound crossings in a row,
+        or an outbound crossing with no inbound crossing before it) are
+        skipped. All such crossings are reported together in a single warning
+        or, if strict, a single ValueError. See CrossingIntervalList.validate()
+        to get these as a table.
+
+
+        Returns
+        -------
+        out : DurationEventList
+            A list with columns "Start", "End", "Label", and "Start Index" and
+            "End Index", the rows of the crossings in the input list.
+        """
+
+        intervals, issues = _pair_crossings(
+            crossings, type_column, pairs or cls.DEFAULT_PAIRS
+        )
+
+        if len(issues) > 0:
+            counts = dict(zip(*np.unique(issues["Issue"], return_counts=True)))
+            message = f"{len(issues)} crossings could not be paired: " + ", ".join(
+                f"{n} x {issue}" for issue, n in counts.items()
+            )
+
+            if strict:
+                raise ValueError(message)
+
+            warnings.warn(message)
+
+        return DurationEventList(intervals, "Start", "End", copy=False)
+
+    @classmethod
+    def validate(
+        cls,
+        crossings: InstantEventList,
+        type_column: str = "Type",
+        pairs: dict[str, tuple[str, str]] | None = None,
+    ) -> QTable:
+        """
+        Return a table of all crossings which can't be paired, with the reason
+        in column "Issue". An empty table means every crossing is paired.
+        """
+
+        _, issues = _pair_crossings(crossings, type_column, pairs or cls.DEFAULT_PAIRS)
+
+        return issues
+
+
+def _pair_crossings(
+    crossings: InstantEventList,
+    type_column: str,
+    pairs: dict[str, tuple[str, str]],
+) -> tuple[QTable, QTable]:
+    # Returns a table of paired intervals and a table of problem crossings
+
+    if type_column not in crossings.table.colnames:
+        raise ValueError(f"Crossing list is missing declared type column: {type_column}")
+
+    types = np.asarray(crossings.table[type_column]).astype(str)
+    times = crossings.table[crossings.time_column]
+
+    start_rows: list[np.ndarray] = []
+    end_rows: list[np.ndarray] = []
+    labels: list[np.ndarray] = []
+
+    issue_rows: list[np.ndarray] = []
+    issue_names: list[np.ndarray] = []
+
+    for label, (start_type, end_type) in pairs.items():
+        # The rows of this boundary's crossings, in time order
+        rows = np.flatnonzero((types == start_type) | (types == end_type))
+        is_start = types[rows] == start_type
+
+        # Whether the neighbouring crossings of this boundary are starts
+        next_is_start = np.append(is_start[1:], True)
+        previous_is_start = np.insert(is_start[:-1], 0, False)
+
+        paired = is_start & ~next_is_start
+
+        start_rows.append(rows[paired])
+        end_rows.append(rows[np.flatnonzero(paired) + 1])
+        labels.append(np.full(np.count_nonzero(paired), label))
+
+        # A start followed by another start leaves the first interval open
+        # while a second one begins. An end without a start before it closes
+        # an interval which was never opened.
+        for issue, mask in (
+            (f"Unmatched {start_type}", is_start & next_is_start),
+            (f"Unmatched {end_type}", ~is_start & ~previous_is_start),
+        ):
+            issue_rows.append(rows[mask])
+            issue_names.append(np.full(np.count_nonzero(mask), issue))
+
+    start_index = np.concatenate(start_rows).astype(int)
+    end_index = np.concatenate(end_rows).astype(int)
+
+    intervals = QTable(
+        {
+            "Start": times[start_index],
+            "End": times[end_index],
+            "Label": np.concatenate(labels).astype(str),
+            "Start Index": start_index,
+            "End Index": end_index,
+        }
+    )
+
+    issue_index = np.concatenate(issue_rows).astype(int)
+    issue_order = np.argsort(issue_index, kind="stable")
+    issue_index = issue_index[issue_order]
+
+    issues = QTable(
+        {
+            crossings.time_column: times[issue_index],
+            type_column: types[issue_index],
+            "Index": issue_index,
+            "Issue": np.concatenate(issue_names).astype(str)[issue_order],
+        }
+    )
+
+    return intervals, issues
+
+
+def _label_segments(
+    starts: np.ndarray, ends: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Split the timeline at every start and end time. Returns the segment edges,
+    and for each segment [edges[i], edges[i + 1]) the index of the most
+    recently started interval covering it (or -1). Intervals must be sorted by
+    start time.
+    """
+
+    edges = np.unique(np.concatenate([starts, ends]))
+    labels = np.full(max(len(edges) - 1, 0), -1, dtype=np.intp)
+
+    non_empty = np.flatnonzero(ends > starts)
+
+    # Most lists (e.g. of regions) do not overlap, in which case each interval
+    # covers exactly one segment.
+    if np.all(starts[non_empty][1:] >= ends[non_empty][:-1]):
+        labels[np.searchsorted(edges, starts[non_empty])] = non_empty
+        return edges, labels
+
+    # Otherwise sweep through the segments, keeping a heap of the intervals
+    # which have started, ordered by most recent start.
+    active: list[tuple[int, int, int]] = []
+    next_interval = 0
+    for i, edge in enumerate(edges[:-1]):
+        while next_interval < len(non_empty) and starts[non_empty[next_interval]] <= edge:
+            j = non_empty[next_interval]
+            heapq.heappush(active, (-starts[j], -j, ends[j]))
+            next_interval += 1
+
+        # Discard intervals which have already ended
+        while active and active[0][2] <= edge:
+            heapq.heappop(active)
+
+        if active:
+            labels[i] = -active[0][1]
+
+    return edges, labels
+
+
+def _all_subclasses(cls: type) -> list[type]:
+    subclasses = cls.__subclasses__()
+    return subclasses + [s for c in subclasses for s in _all_subclasses(c)]
+
+
+def _is_scalar_time(times) -> bool:
+    if isinstance(times, Time):
+        return times.isscalar
+
+    return np.ndim(times) == 0
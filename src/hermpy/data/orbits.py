@@ -0,0 +1,223 @@
+import numpy as np
+from astropy import units as u
+from astropy.table import QTable
+from sunpy.time import TimeRange
+
+from hermpy.data.lists import DurationEventList
+from hermpy.data.trajectories import get_positions
+from hermpy.utils import from_nanoseconds, to_nanoseconds
+
+
+class OrbitList(DurationEventList):
+    """
+    A list of spacecraft orbits, each running from one apoapsis to the next,
+    with the periapsis between. Orbits are numbered such that a data gap
+    spanning whole orbits still advances the orbit number.
+
+    The table has columns "Orbit", "Start", "Periapsis", "End", "Periapsis
+    Distance", "Apoapsis Distance", and "Start Offset" and "End Offset", the
+    sample indices of the orbit in the timeseries it was built from. As with
+    any EventList, the index can be persisted with OrbitList.save().
+    """
+
+    def __init__(
+        self,
+        table: QTable,
+        start_time_column: str = "Start",
+        end_time_column: str = "End",
+        copy: bool = True,
+    ):
+        super().__init__(table, start_time_column, end_time_column, copy=copy)
+
+        # Orbit numbers to rows, for constant time lookup.
+        self._rows = {int(orbit): row for row, orbit in enumerate(self.table["Orbit"])}
+
+    @classmethod
+    def from_positions(
+        cls,
+        times,
+        x: np.ndarray | u.Quantity,
+        y: np.ndarray | u.Quantity,
+        z: np.ndarray | u.Quantity,
+        first_orbit: int = 1,
+        max_gap: u.Quantity = 1 * u.hour,
+    ) -> "OrbitList":
+        """
+        Segment a sorted trajectory into orbits. Times may be anything
+        accepted by hermpy.utils.to_nanoseconds(). Plain position arrays are
+        assumed to be in km.
+
+        The first and last orbits may be partial, starting or ending with the
+        data rather than at apoapsis. Orbits never span a data gap longer
+        than max_gap: the orbits either side of it end and start with the
+        data instead, as at the edges.
+        """
+
+        times = to_nanoseconds(times)
+        positions = [_to_km(c) for c in (x, y, z)]
+        radius = np.sqrt(sum(c**2 for c in positions))
+
+        # The data either side of each gap is segmented separately, but
+        # passes are found with the same threshold, as a short segment may
+        # not cover the whole radial range.
+        threshold = (radius.min() + radius.max()) / 2
+        gaps = np.flatnonzero(np.diff(times) > max_gap.to_value(u.ns)) + 1
+        segment_bounds = np.concatenate([[0], gaps, [len(radius)]])
+
+        periapses = []
+        starts = []
+        ends = []
+        for a, b in zip(segment_bounds[:-1], segment_bounds[1:]):
+            segment_periapses = a + _find_periapses(radius[a:b], threshold)
+            if len(segment_periapses) == 0:
+                continue
+
+            # Apoapses are the furthest points between periapses, with the
+            # segment edges bounding its first and last orbits.
+            bounds = np.concatenate([[a], segment_periapses, [b - 1]])
+            apoapses = np.array(
+                [i + np.argmax(radius[i : j + 1]) for i, j in zip(bounds[:-1], bounds[1:])]
+            )
+
+            periapses.append(segment_periapses)
+            starts.append(apoapses[:-1])
+            ends.append(apoapses[1:])
+
+        if len(periapses) == 0:
+            raise ValueError("No complete periapsis passes found in trajectory")
+
+        periapses = np.concatenate(periapses)
+        starts = np.concatenate(starts)
+        ends = np.concatenate(ends)
+
+        # If there are gaps in the data, we may miss entire orbits. We
+        # number orbits by the number of (median) orbital periods between
+        # periapses.
+        periapsis_times = times[periapses]
+        if len(periapses) > 1:
+            period = np.median(np.diff(periapsis_times))
+            orbit_steps = np.maximum(np.round(np.diff(periapsis_times) / period), 1)
+            orbits = first_orbit + np.concatenate([[0], np.cumsum(orbit_steps)])
+        else:
+            orbits = np.array([first_orbit])
+
+        table = QTable(
+            {
+                "Orbit": orbits.astype(int),
+                "Start": from_nanoseconds(times[starts]),
+                "Periapsis": from_nanoseconds(periapsis_times),
+                "End": from_nanoseconds(times[ends]),
+                "Periapsis Distance": radius[periapses] * u.km,
+                "Apoapsis Distance": radius[ends] * u.km,
+                "Start Offset": starts,
+                "End Offset": ends,
+            }
+        )
+
+        return cls(table, copy=False)
+
+    @classmethod
+    def from_timeseries(
+        cls,
+        table: QTable,
+        time_column: str = "UTC",
+        position_columns: tuple[str, str, str] = ("X MSO", "Y MSO", "Z MSO"),
+        first_orbit: int = 1,
+        max_gap: u.Quantity = 1 * u.hour,
+    ) -> "OrbitList":
+        """
+        Segment the positions of a timeseries table (e.g. from
+        parse_messenger_mag()) into orbits. See from_positions().
+        """
+
+        return cls.from_positions(
+            table[time_column],
+            *(table[c] for c in position_columns),
+            first_orbit=first_orbit,
+            max_gap=max_gap,
+        )
+
+    @classmethod
+    def from_ephemeris(
+        cls,
+        time_range: TimeRange,
+        resolution: u.Quantity = 1 * u.min,
+        first_orbit: int = 1,
+    ) -> "OrbitList":
+        """
+        Segment the MESSENGER trajectory from SPICE into orbits. Requires
+        SPICE kernels to be loaded (see ClientSPICE).
+        """
+
+        times = time_range.start + np.arange(
+            0, time_range.seconds.to_value(u.s), resolution.to_value(u.s)
+        ) * u.s
+        positions = get_positions(times)
+
+        return cls.from_positions(times, *positions.T, first_orbit=first_orbit)
+
+    def __getitem__(self, orbit: int):
+        return self.table[self._rows[orbit]]
+
+    def time_range(self, orbit: int) -> TimeRange:
+        """
+        The TimeRange of an orbit. This can be passed to
+        ClientMESSENGER.query() to fetch only the files the orbit touches.
+        """
+
+        row = self[orbit]
+
+        return TimeRange(row[self.start_time_column], row[self.end_time_column])
+
+    def sample_slice(self, orbit: int) -> slice:
+        """
+        The slice of the timeseries this list was built from which covers
+        an orbit.
+        """
+
+        row = self[orbit]
+
+        return slice(int(row["Start Offset"]), int(row["End Offset"]))
+
+    def select(self, table: QTable, orbit: int, time_column: str = "UTC") -> QTable:
+        """
+        Return the samples of any sorted timeseries table within an orbit.
+        """
+
+        row = self._rows[orbit]
+
+        start, end = np.searchsorted(
+            to_nanoseconds(table[time_column]),
+            [self.start_index[row], self.end_index[row]],
+        )
+
+        return table[start:end]
+
+
+def _find_periapses(radius: np.ndarray, threshold: float) -> np.ndarray:
+    # Passes close to the planet are contiguous runs of samples below the
+    # threshold (the midpoint of the radial range). The periapsis of each
+    # pass is its closest point. Runs truncated by the edges of the data are
+    # dropped, as their closest point may not be the periapsis.
+    close = radius < threshold
+
+    change = np.diff(close.astype(np.int8))
+    run_starts = np.flatnonzero(change == 1) + 1
+    run_ends = np.flatnonzero(change == -1) + 1
+
+    if close[0]:
+        run_ends = run_ends[1:]
+    if close[-1]:
+        run_starts = run_starts[:-1]
+
+    return np.array(
+        [a + np.argmin(radius[a:b]) for a, b in zip(run_starts, run_ends)],
+        dtype=np.intp,
+    )
+
+
+def _to_km(component: np.ndarray | u.Quantity) -> np.ndarray:
+    if isinstance(component, u.Quantity):
+        return component.to_value(u.km)
+
+    return np.asarray(component, dtype=float)
@@ -0,0 +1,109 @@
+import numpy as np
+import numpy.typing as npt
+import xarray as xr
+from astropy import units as u
+from astropy.table import QTable
+
+from hermpy.data.arrays import ArrayTimeseries
+
+
+def reduced_dtype(dtype: npt.DTypeLike) -> np.dtype:
+    """
+    Validate a floating point dtype for the parsers' data columns, e.g.
+    float32 to halve memory.
+    """
+
+    dtype = np.dtype(dtype)
+    if dtype.kind != "f":
+        raise ValueError(f"Expected a floating point dtype, got {dtype}")
+
+    return dtype
+
+
+def precision_report(
+    reduced: ArrayTimeseries | QTable | xr.Dataset,
+    reference: ArrayTimeseries | QTable | xr.Dataset,
+) -> QTable:
+    """
+    Compare data parsed in reduced precision against the same data parsed as
+    float64, e.g.:
+
+        reduced = parse_messenger_mag(paths, time_range, dtype=np.float32)
+        reference = parse_messenger_mag(paths, time_range)
+
+        print(precision_report(reduced, reference))
+
+    Returns a QTable with the maximum absolute error (in each column's unit)
+    and maximum relative error of each floating point column, along with the
+    memory each takes in both precisions.
+    """
+
+    reduced_columns = _float_columns(reduced)
+    reference_columns = _float_columns(reference)
+
+    rows = []
+    for name, (values, unit) in reduced_columns.items():
+        if name not in reference_columns:
+            continue
+
+        expected = reference_columns[name][0]
+        if values.shape != expected.shape:
+            raise ValueError(
+                f"Column {name} has shape {values.shape}, expected {expected.shape}"
+            )
+
+        error = np.abs(values.astype(np.float64) - expected)
+        magnitude = np.abs(expected)
+        relative = np.divide(error, magnitude, out=np.zeros_like(error), where=magnitude > 0)
+
+        rows.append(
+            (
+                name,
+                str(values.dtype),
+                unit,
+                float(np.nanmax(error, initial=0)),
+                float(np.nanmax(relative, initial=0)),
+                values.nbytes,
+                expected.nbytes,
+            )
+        )
+
+    return QTable(
+        rows=rows,
+        names=(
+            "Column",
+            "Dtype",
+            "Unit",
+            "Max absolute error",
+            "Max relative error",
+            "Bytes",
+            "Reference bytes",
+        ),
+        dtype=(str, str, str, float, float, int, int),
+    )
+
+
+def _float_columns(
+    data: ArrayTimeseries | QTable | xr.Dataset,
+) -> dict[str, tuple[np.ndarray, str]]:
+
+    if isinstance(data, xr.Dataset):
+        columns = {
+            name: (variable.values, variable.attrs.get("units", ""))
+            for name, variable in data.data_vars.items()
+        }
+
+    else:
+        if isinstance(data, QTable):
+            data = ArrayTimeseries.from_qtable(data)
+
+        columns = {
+            name: (data[name], data.units[name].to_string() if name in data.units else "")
+            for name in data.colnames
+        }
+
+    return {
+        name: (np.asarray(values), unit)
+        for name, (values, unit) in columns.items()
+        if np.asarray(values).dtype.kind == "f"
+    }
@@ -0,0 +1,595 @@
+"""
+Rolling-window statistics of timeseries columns, e.g. for boundary
+identification and machine learning features:
+
+    features = rolling_statistics(mag, ["|B|", "Bx"], [10, 60, 300] * u.s)
+    features["|B| std 60 s"]
+
+Windows are defined in time rather than in samples, so data gaps are
+handled correctly, and any number of window lengths are found from the same
+pass over the data. Each statistic takes O(1) per sample and window, after
+O(n) preparation:
+
+    count, mean, var, std   prefix sums
+    min, max                van Herk/Gil-Werman blocks
+    quantiles               prefix histograms, approximate to within a bin
+
+Data may be streamed in chunks with RollingStatistics, which carries the
+samples needed by the next chunk's windows.
+"""
+
+from collections.abc import Iterable
+
+import numpy as np
+from astropy import units as u
+from astropy.table import QTable
+
+from hermpy.data.arrays import ArrayTimeseries
+from hermpy.utils import to_nanoseconds
+
+STATISTICS = ("count", "mean", "var", "std", "min", "max")
+
+# Bounds the temporary memory of each block of output samples, in elements
+# (e.g. of the prefix histograms), and in samples.
+_BLOCK_ELEMENTS = 2**19
+_BLOCK_SAMPLES = 2**16
+
+
+class RollingStatistics:
+    """
+    Rolling statistics over streamed chunks of a timeseries. Each call to
+    update() returns the statistics of the samples whose windows are
+    complete, and finish() returns any remaining samples.
+
+        rolling = RollingStatistics(["|B|"], [10, 60] * u.s)
+        for chunk in chunks:
+            features = rolling.update(chunk)
+            ...
+        features = rolling.finish()
+
+    Windows are trailing, (t - window, t], or centred, [t - window / 2,
+    t + window / 2). Statistics with fewer than min_samples finite samples in
+    the window are NaN. The variance is the sample variance (ddof=1).
+
+    Quantiles are found from a histogram of quantile_bins bins between
+    limits set for each column by quantile_range, or by default by the range
+    of the first chunk. Values outside the limits are counted in the end
+    bins.
+
+
+    Parameters
+    ----------
+    columns : list[str]
+        Columns to summarise.
+
+    windows : astropy.units.Quantity
+        Window lengths.
+
+    statistics : tuple[str, ...]
+        Any of "count", "mean", "var", "std", "min", and "max".
+
+    quantiles : tuple[float, ...]
+        Quantiles to estimate, between 0 and 1.
+
+    alignment : str
+        "trailing" or "centred".
+    """
+
+    def __init__(
+        self,
+        columns: list[str],
+        windows: u.Quantity,
+        statistics: tuple[str, ...] | list[str] = ("mean", "std", "min", "max"),
+        quantiles: tuple[float, ...] | list[float] = (),
+        alignment: str = "trailing",
+        min_samples: int = 1,
+        quantile_bins: int = 64,
+        quantile_range: dict[str, tuple[float, float]] | None = None,
+        time_column: str = "UTC",
+    ):
+        unknown = set(statistics) - set(STATISTICS)
+        if len(unknown) > 0:
+            raise ValueError(
+                f"Unknown statistics: {sorted(unknown)}. Expected any of {STATISTICS}"
+            )
+
+        if alignment not in ("trailing", "centred"):
+            raise ValueError(
+                f"Unknown alignment: {alignment}. Expected 'trailing' or 'centred'"
+            )
+
+        if any(not 0 <= q <= 1 for q in quantiles):
+            raise ValueError("Quantiles must be between 0 and 1")
+
+        self.columns = list(columns)
+        self.windows = np.atleast_1d(windows)
+        self.statistics = tuple(statistics)
+        self.quantiles = tuple(quantiles)
+        self.alignment = alignment
+        self.min_samples = min_samples
+        self.quantile_bins = quantile_bins
+        self.time_column = time_column
+
+        lengths = np.round(self.windows.to_value(u.ns)).astype(np.int64)
+        if alignment == "trailing":
+            self._before, self._after = lengths, np.zeros_like(lengths)
+        else:
+            self._before, self._after = lengths // 2, lengths - lengths // 2
+
+        self._edges: dict[str, np.ndarray] = {
+            name: np.linspace(low, high, quantile_bins + 1)
+            for name, (low, high) in (quantile_range or {}).items()
+        }
+
+        self._units: dict[str, u.UnitBase] = {}
+        self._times = np.empty(0, dtype=np.int64)
+        self._values = np.empty((0, len(self.columns)))
+        # The first sample in the buffer without output
+        self._next = 0
+
+    @property
+    def names(self) -> list[str]:
+        """Names of the output columns."""
+
+        return [
+            _name(column, statistic, window)
+            for column in self.columns
+            for window in self.windows
+            for statistic in self.statistics
+            + tuple(_quantile_name(q) for q in self.quantiles)
+        ]
+
+    def update(self, chunk: ArrayTimeseries | QTable) -> ArrayTimeseries:
+        """
+        Add a chunk, following on in time from the last, and return the
+        statistics of the samples whose windows are now complete.
+        """
+
+        if len(chunk) == 0:
+            return self._output(self._next, self._next)
+
+        times, values = self._read(chunk)
+
+        if len(self._times) > 0 and times[0] <= self._times[-1]:
+            raise ValueError("Chunks must be sorted and in time order")
+
+        self._times = np.concatenate([self._times, times])
+        self._values = np.concatenate([self._values, values])
+
+        # Samples whose windows end before the latest sample are complete.
+        # Trailing windows end at their own sample, so all are.
+        ready = len(self._times)
+        if self.alignment == "centred":
+            ready = np.searchsorted(
+                self._times, self._times[-1] - self._after.max(), side="right"
+            )
+
+        return self._advance(int(ready))
+
+    def finish(self) -> ArrayTimeseries:
+        """Return the statistics of any remaining samples."""
+        return self._advance(len(self._times))
+
+    def _read(self, chunk: ArrayTimeseries | QTable) -> tuple[np.ndarray, np.ndarray]:
+        if isinstance(chunk, ArrayTimeseries):
+            times = chunk.time
+            for name in self.columns:
+                if name in chunk.units:
+                    self._units.setdefault(name, chunk.units[name])
+        else:
+            times = to_nanoseconds(chunk[self.time_column])
+            for name in self.columns:
+                if isinstance(chunk[name], u.Quantity):
+                    self._units.setdefault(name, chunk[name].unit)
+
+        values = np.column_stack(
+            [
+                np.asarray(getattr(chunk[name], "value", chunk[name]), dtype=np.float64)
+                for name in self.columns
+            ]
+        )
+
+        # Histogram limits default to the range of the first chunk
+        for i, name in enumerate(self.columns):
+            if name not in self._edges and len(self.quantiles) > 0:
+                finite = values[np.isfinite(values[:, i]), i]
+                low, high = (finite.min(), finite.max()) if len(finite) else (0.0, 1.0)
+                if high <= low:
+                    high = low + 1
+                self._edges[name] = np.linspace(low, high, self.quantile_bins + 1)
+
+        return times, values
+
+    def _advance(self, ready: int) -> ArrayTimeseries:
+        # Find the statistics of buffered samples [self._next, ready), in
+        # blocks, then drop samples no later window needs.
+        start = self._next
+        times = self._times
+
+        # Blocks of output are sized so that their temporaries, and the
+        # prefix histograms (a row of bins per sample), stay small enough to
+        # be cached, as the lookups are bound by memory access. Blocks span
+        # at least a few windows, so that the samples reached from outside
+        # the block are few.
+        window_samples = self._window_samples()
+        per_sample = self.quantile_bins if self.quantiles else 1
+        block = min(_BLOCK_SAMPLES, _BLOCK_ELEMENTS // per_sample)
+        block = max(block, 4 * window_samples, 1024)
+
+        outputs: dict[str, list[np.ndarray]] = {name: [] for name in self.names}
+        for a in range(start, ready, block):
+            b = min(a + block, ready)
+            for name, values in self._block(a, b).items():
+                outputs[name].append(values)
+
+        result = self._output(start, ready, outputs)
+
+        self._next = ready
+        if len(times) > 0:
+            # The next sample's windows start no earlier than this
+            earliest = times[min(ready, len(times) - 1)] - self._before.max()
+            keep = int(np.searchsorted(times, earliest, "left"))
+            keep = min(keep, ready)
+
+            self._times = times[keep:]
+            self._values = self._values[keep:]
+            self._next -= keep
+
+        return result
+
+    def _window_samples(self) -> int:
+        # Roughly the number of samples in the longest window
+        times = self._times
+        if len(times) < 2 or times[-1] == times[0]:
+            return 1
+
+        span = self._before.max() + self._after.max()
+        return int(len(times) * span // (times[-1] - times[0])) + 1
+
+    def _block(self, a: int, b: int) -> dict[str, np.ndarray]:
+        # Statistics of buffered samples [a, b), from the samples within
+        # reach of their windows.
+        times = self._times
+        low = int(np.searchsorted(times, times[a] - self._before.max(), "left"))
+        high = int(np.searchsorted(times, times[b - 1] + self._after.max(), "right"))
+
+        block_times = times[low:high]
+        targets = times[a:b]
+        indices = np.arange(a - low, b - low)
+
+        # Without repeated times, a trailing window ends at its own sample
+        distinct = bool(np.all(block_times[1:] > block_times[:-1]))
+
+        bounds = []
+        for before, after in zip(self._before, self._after):
+            if self.alignment == "trailing":
+                lower = _search(block_times, targets - before, "right", indices)
+                if distinct:
+                    upper = indices + 1
+                else:
+                    upper = _search(block_times, targets, "right", indices)
+            else:
+                lower = _search(block_times, targets - before, "left", indices)
+                upper = _search(block_times, targets + after, "left", indices)
+            bounds.append((lower, upper))
+
+        result: dict[str, np.ndarray] = {}
+        for i, column in enumerate(self.columns):
+            values = self._values[low:high, i]
+            result.update(self._column_statistics(column, values, bounds))
+
+        return result
+
+    def _column_statistics(
+        self,
+        column: str,
+        values: np.ndarray,
+        bounds: list[tuple[np.ndarray, np.ndarray]],
+    ) -> dict[str, np.ndarray]:
+
+        finite = np.isfinite(values)
+        statistics = set(self.statistics)
+
+        # Prefix sums, shifted by the mean to limit cancellation in the
+        # variance.
+        shift = np.mean(values[finite]) if finite.any() else 0.0
+        shifted = np.where(finite, values - shift, 0.0)
+
+        counts = _prefix(finite.astype(np.int64))
+        sums = _prefix(shifted) if statistics & {"mean", "var", "std"} else None
+        squares = _prefix(shifted * shifted) if statistics & {"var", "std"} else None
+
+        # Counts of samples in or below each histogram bin (columns) before
+        # each sample (rows), from which the number of samples of any window
+        # in or below any bin is a difference of two rows. Windows advance
+        # through the rows in order, so the bisection's lookups stay close
+        # in memory.
+        below = edges = None
+        if len(self.quantiles) > 0:
+            edges = self._edges[column]
+            bins = np.clip(
+                np.searchsorted(edges, values, "right") - 1, 0, len(edges) - 2
+            )
+            below = np.zeros((len(values) + 1, len(edges) - 1), dtype=np.int32)
+            below[np.flatnonzero(finite) + 1, bins[finite]] = 1
+            np.cumsum(below, axis=1, out=below)
+            np.cumsum(below, axis=0, out=below)
+
+        # Missing values never win a min or max
+        lowest = np.where(finite, values, np.inf) if "min" in statistics else None
+        highest = np.where(finite, values, -np.inf) if "max" in statistics else None
+
+        result = {}
+        for window, (lower, upper) in zip(self.windows, bounds):
+            count = counts.take(upper) - counts.take(lower)
+            valid = count >= max(self.min_samples, 1)
+            computed: dict[str, np.ndarray] = {"count": count}
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                if sums is not None:
+                    total = sums.take(upper) - sums.take(lower)
+                    computed["mean"] = np.where(valid, total / count + shift, np.nan)
+
+                if squares is not None:
+                    variance = (
+                        squares.take(upper)
+                        - squares.take(lower)
+                        - total * total / count
+                    ) / (count - 1)
+                    variance = np.where(
+                        valid & (count > 1), np.maximum(variance, 0), np.nan
+                    )
+                    computed["var"] = variance
+                    computed["std"] = np.sqrt(variance)
+
+            if "min" in statistics:
+                computed["min"] = np.where(
+                    valid, _rolling_extreme(lowest, lower, upper, np.minimum), np.nan
+                )
+            if "max" in statistics:
+                computed["max"] = np.where(
+                    valid, _rolling_extreme(highest, lower, upper, np.maximum), np.nan
+                )
+
+            for statistic in self.statistics:
+                result[_name(column, statistic, window)] = computed[statistic]
+
+            for q in self.quantiles:
+                estimate = _histogram_quantile(below, lower, upper, count, q, edges)
+                result[_name(column, _quantile_name(q), window)] = np.where(
+                    valid, estimate, np.nan
+                )
+
+        return result
+
+    def _output(
+        self, start: int, stop: int, outputs: dict[str, list[np.ndarray]] | None = None
+    ) -> ArrayTimeseries:
+
+        columns = {
+            name: (
+                np.concatenate(outputs[name])
+                if outputs and outputs[name]
+                else np.empty(0)
+            )
+            for name in self.names
+        }
+
+        units = {}
+        for name in self.names:
+            column, statistic = _parse_name(name, self.columns)
+            unit = self._units.get(column)
+            if unit is None or statistic == "count":
+                continue
+            units[name] = unit**2 if statistic == "var" else unit
+
+        return ArrayTimeseries(
+            self._times[start:stop].copy(), columns, units, time_column=self.time_column
+        )
+
+
+def rolling_statistics(
+    timeseries: ArrayTimeseries | QTable | Iterable[ArrayTimeseries | QTable],
+    columns: list[str],
+    windows: u.Quantity,
+    statistics: tuple[str, ...] | list[str] = ("mean", "std", "min", "max"),
+    quantiles: tuple[float, ...] | list[float] = (),
+    alignment: str = "trailing",
+    min_samples: int = 1,
+    **kwargs,
+) -> ArrayTimeseries:
+    """
+    Rolling statistics of the columns of a timeseries (or of chunks of one,
+    in time order), for each window length. See RollingStatistics for the
+    options.
+
+    Returns an ArrayTimeseries on the same times, with columns named
+    "<column> <statistic> <window>", e.g. "|B| std 60 s", or for quantiles,
+    e.g. "|B| q90 60 s".
+    """
+
+    rolling = RollingStatistics(
+        columns, windows, statistics, quantiles, alignment, min_samples, **kwargs
+    )
+
+    if isinstance(timeseries, (ArrayTimeseries, QTable)):
+        timeseries = [timeseries]
+
+    parts = [rolling.update(chunk) for chunk in timeseries]
+    parts.append(rolling.finish())
+
+    return ArrayTimeseries.concatenate(parts)
+
+
+def _name(column: str, statistic: str, window: u.Quantity) -> str:
+    return f"{column} {statistic} {window.value:g} {window.unit}"
+
+
+def _quantile_name(q: float) -> str:
+    return f"q{100 * q:g}"
+
+
+def _parse_name(name: str, columns: list[str]) -> tuple[str, str]:
+    for column in columns:
+        if name.startswith(column + " "):
+            return column, name[len(column) + 1 :].split(" ", 1)[0]
+
+    raise ValueError(f"Unknown column {name}")
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    # Cumulative sums with a leading zero, so that the sum over [i, j) is
+    # prefix[j] - prefix[i].
+    prefix = np.empty(len(values) + 1, dtype=values.dtype)
+    prefix[0] = 0
+    np.cumsum(values, out=prefix[1:])
+
+    return prefix
+
+
+def _search(
+    times: np.ndarray, keys: np.ndarray, side: str, indices: np.ndarray
+) -> np.ndarray:
+    # np.searchsorted(times, keys, side), for keys offset from times[indices].
+    # At a regular cadence, windows hold the same number of samples, so the
+    # offset in samples of the first key is right for almost all the others,
+    # and checking a guess is much cheaper than a binary search.
+    n = len(times)
+    if len(keys) == 0 or n == 0:
+        return np.searchsorted(times, keys, side)
+
+    offset = int(np.searchsorted(times, keys[0], side)) - int(indices[0])
+    guess = np.clip(indices + offset, 0, n)
+
+    below = times.take(np.maximum(guess - 1, 0))
+    above = times.take(np.minimum(guess, n - 1))
+    if side == "left":
+        correct = ((guess == 0) | (below < keys)) & ((guess == n) | (keys <= above))
+    else:
+        correct = ((guess == 0) | (below <= keys)) & ((guess == n) | (keys < above))
+
+    wrong = np.flatnonzero(~correct)
+    guess[wrong] = np.searchsorted(times, keys[wrong], side)
+
+    return guess
+
+
+def _rolling_extreme(
+    values: np.ndarray, lower: np.ndarray, upper: np.ndarray, function: np.ufunc
+) -> np.ndarray:
+    # function (np.minimum or np.maximum) over [lower, upper) for each window,
+    # with van Herk/Gil-Werman blocks: values are split into blocks of a
+    # window's length, and each window is the union of a suffix of one
+    # block, a prefix of another, and at most one whole block between them,
+    # each found from a running accumulation within blocks. As time-based
+    # windows vary in length (e.g. at gaps), windows are grouped by length
+    # to within a factor of two, and each group uses its own block size,
+    # over only the blocks its windows touch. Each sample is in O(1) blocks
+    # for each group it is near, so this takes O(n).
+    # Missing values are expected as the identity, +inf for the minimum and
+    # -inf for the maximum, which is also the result for windows without a
+    # finite value.
+    identity = np.inf if function is np.minimum else -np.inf
+
+    result = np.full(len(lower), identity)
+    length = upper - lower
+    level = np.frexp(np.maximum(length, 1))[1] - 1
+    level[length <= 0] = -1
+
+    levels = np.flatnonzero(np.bincount(level + 1)[1:])
+    for k in levels:
+        size = 1 << int(k)
+        if len(levels) == 1 and level.min() == k:
+            # Typically, at a regular cadence, all windows are in one group
+            selected = slice(None)
+            first = lower
+            last = upper - 1
+        else:
+            selected = np.flatnonzero(level == k)
+            first = lower[selected]
+            last = upper[selected] - 1
+
+        # Sizes are powers of two, so blocks and offsets are shifts and masks
+        first_block = first >> k
+        last_block = last >> k
+
+        # The blocks touched, as rows padded with the identity
+        n_blocks = -(-len(values) // size)
+        touched = np.zeros(n_blocks, dtype=bool)
+        touched[first_block] = True
+        touched[last_block] = True
+        touched[np.minimum(first_block + 1, last_block)] = True
+
+        if touched.all():
+            rows = np.full(n_blocks * size, identity)
+            rows[: len(values)] = values
+            first_row = first_block
+            # Positions in the flattened rows are those in values
+            first_position, last_position = first, last
+        else:
+            blocks = np.flatnonzero(touched)
+            positions = (blocks[:, np.newaxis] << k) + np.arange(size)
+            rows = values.take(positions.reshape(-1), mode="clip")
+            rows[positions.reshape(-1) >= len(values)] = identity
+
+            row_of_block = np.cumsum(touched) - 1
+            first_row = row_of_block[first_block]
+            first_position = (first_row << k) + (first & (size - 1))
+            last_position = (row_of_block[last_block] << k) + (last & (size - 1))
+
+        # Suffixes are accumulated over the reversed rows, which leaves them
+        # reversed in the flattened output; gathers from the flattened rows
+        # are much faster than 2D indexing.
+        prefix = function.accumulate(rows.reshape(-1, size), axis=1).reshape(-1)
+        suffix = function.accumulate(rows[::-1].reshape(-1, size), axis=1).reshape(-1)
+        extreme = function(
+            suffix.take(len(rows) - 1 - first_position), prefix.take(last_position)
+        )
+
+        spans_block = np.flatnonzero(last_block - first_block == 2)
+        if len(spans_block) > 0:
+            middle = ((first_row[spans_block] + 2) << k) - 1
+            extreme[spans_block] = function(extreme[spans_block], prefix.take(middle))
+
+        result[selected] = extreme
+
+    return result
+
+
+def _histogram_quantile(
+    below: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    count: np.ndarray,
+    q: float,
+    edges: np.ndarray,
+) -> np.ndarray:
+    # Bisect for the first bin with at least q of the window's samples in or
+    # below it, then interpolate linearly within that bin.
+    target = q * count
+    n_bins = below.shape[1]
+
+    # Gathers from the flattened table are much faster than 2D indexing
+    flat = below.reshape(-1)
+    upper_offset = upper * n_bins
+    lower_offset = lower * n_bins
+
+    def in_or_below(bins: np.ndarray) -> np.ndarray:
+        return flat.take(upper_offset + bins) - flat.take(lower_offset + bins)
+
+    low = np.zeros(len(count), dtype=np.int64)
+    high = np.full(len(count), n_bins - 1, dtype=np.int64)
+
+    while np.any(low < high):
+        middle = (low + high) // 2
+        enough = in_or_below(middle) >= target
+        high = np.where(enough, middle, high)
+        low = np.where(enough, low, middle + 1)
+
+    before = np.where(low > 0, in_or_below(np.maximum(low - 1, 0)), 0)
+    in_bin = in_or_below(low) - before
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = np.clip(np.where(in_bin > 0, (target - before) / in_bin, 0.5), 0, 1)
+
+    return edges[low] + fraction * (edges[low + 1] - edges[low])
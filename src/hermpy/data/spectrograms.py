@@ -1,89 +1,194 @@
 from pathlib import Path
 
 import numpy as np
+import numpy.typing as npt
 import xarray as xr
-from astropy.time import Time
 from sunpy.time import TimeRange
 
+from hermpy.data.cache import parse_cache
+from hermpy.data.precision import reduced_dtype
+from hermpy.utils import day_of_year_strings_to_nanoseconds, to_nanoseconds
+from hermpy.utils.compression import read_data_file
+from hermpy.utils.tracing import span, traced
 
-def parse_messenger_fips(file_paths: list[Path], time_range: TimeRange) -> xr.Dataset:
-    file_data: list[xr.Dataset] = []
-    for path in file_paths:
+# Roughly the shortest row of the FIPS scan files, in bytes, from which the
+# scans of a file are estimated.
+_FIPS_ROW_BYTES = 3000
+
+
+@traced()
+def parse_messenger_fips(
+    file_paths: list[Path],
+    time_range: TimeRange,
+    use_cache: bool = True,
+    dtype: npt.DTypeLike = np.float64,
+) -> xr.Dataset:
+    """
+    Parse MESSENGER FIPS scan files to a Dataset, sliced to the time range.
+    Parsed files are kept in hermpy.data.parse_cache (see
+    parse_messenger_mag()).
+
+    dtype sets the precision of the flux arrays. Fluxes are given to 4
+    significant figures, so float32 halves the memory of the Dataset without
+    loss (see hermpy.data.precision_report()).
+    """
+
+    dtype = reduced_dtype(dtype)
+
+    # Both ends are inclusive
+    selection = slice(
+        to_nanoseconds(time_range.start).view("datetime64[ns]")[0],
+        to_nanoseconds(time_range.end).view("datetime64[ns]")[0],
+    )
+
+    # As in parse_messenger_mag(), cached files are parsed up front and the
+    # output sized exactly, while uncached files are parsed one at a time,
+    # with the output sized from the file sizes.
+    if use_cache:
+        file_data = [
+            parse_cache.get(path, _read_messenger_fips_file, dtype=dtype).sel(
+                UTC=selection
+            )
+            for path in file_paths
+        ]
+        capacity = sum(ds.sizes["UTC"] for ds in file_data)
+    else:
+        file_data = (
+            _read_messenger_fips_file(path, dtype).sel(UTC=selection)
+            for path in file_paths
+        )
+        file_bytes = sum(Path(path).stat().st_size for path in file_paths)
+        capacity = file_bytes // _FIPS_ROW_BYTES
+
+    with span("parse_messenger_fips.concatenate"):
+        return _concatenate_scans(file_data, capacity)
+
+
+def _concatenate_scans(file_data, capacity: int) -> xr.Dataset:
+    # Copy each file's scans into preallocated arrays, rather than with
+    # xr.concat(), which holds every file and the result in memory at once.
+    buffers: dict[str, np.ndarray] | None = None
+    rows = 0
+
+    for ds in file_data:
+        if buffers is None:
+            template = ds
+            buffers = {
+                name: np.empty((capacity,) + ds[name].shape[1:], ds[name].dtype)
+                for name in ["UTC", *ds.data_vars]
+            }
+
+        n = ds.sizes["UTC"]
+        if rows + n > capacity:
+            # The estimate was too small (e.g. for compressed files), so the
+            # buffers grow geometrically
+            capacity = max(2 * capacity, rows + n)
+            for name, buffer in buffers.items():
+                buffers[name] = np.empty((capacity,) + buffer.shape[1:], buffer.dtype)
+                buffers[name][:rows] = buffer[:rows]
+
+        for name, buffer in buffers.items():
+            buffer[rows : rows + n] = ds[name].values
+
+        rows += n
+        del ds
+
+    if buffers is None:
+        raise ValueError("No files to parse")
+
+    # Unused rows are released by shrinking the buffers in place (see
+    # ArrayTimeseries.concatenate).
+    if rows < capacity:
+        for buffer in buffers.values():
+            buffer.resize((rows,) + buffer.shape[1:], refcheck=False)
+
+    return xr.Dataset(
+        data_vars={
+            name: (template[name].dims, buffers[name]) for name in template.data_vars
+        },
+        coords={
+            "UTC": buffers["UTC"],
+            "Energy Channel": template["Energy Channel"].values,
+        },
+    )
+
+
+def _read_messenger_fips_file(
+    path: Path, dtype: np.dtype = np.dtype(np.float64)
+) -> xr.Dataset:
+    # Files may be compressed in the cache (see ClientMESSENGER). We
+    # decompress once in memory, rather than for each column group.
+    with span("parse_messenger_fips.read", bytes=lambda: Path(path).stat().st_size):
+        lines = read_data_file(path).splitlines()
+
+    with span("parse_messenger_fips.time"):
         # Parse the time
         time_strings = np.genfromtxt(
-            path,
+            lines,
             dtype=str,
             usecols=[1],
         )
-        times = Time.strptime(
-            time_strings,
-            format_string="%Y-%jT%H:%M:%S.%f",
-            scale="utc",
-        ).to_datetime(leap_second_strict="warn")
+        # Times are kept as datetime64[ns], as used by xarray, with any leap
+        # second clamped as in hermpy.utils.to_nanoseconds.
+        times = day_of_year_strings_to_nanoseconds(time_strings).view(
+            "datetime64[ns]"
+        )
 
+    with span("parse_messenger_fips.tokenise", rows=len(lines)):
         # Parse the data
         # Unit: counts/(s*(keV/e)*cm**2*sr)
         valid_event_flux = np.genfromtxt(
-            path, dtype=float, usecols=np.arange(130, 193).tolist()
+            lines, dtype=float, usecols=np.arange(130, 193).tolist()
         )
         # Proton Flux
         proton_flux = np.genfromtxt(
-            path, dtype=float, usecols=np.arange(193, 256).tolist()
+            lines, dtype=float, usecols=np.arange(193, 256).tolist()
         )
         # Total Event Flux
         total_event_flux = np.genfromtxt(
-            path, dtype=float, usecols=np.arange(256, 319).tolist()
+            lines, dtype=float, usecols=np.arange(256, 319).tolist()
         )
 
         # Parse metadata
         # A quality value other than zero is indicative of bad data.
-        quality = np.genfromtxt(path, dtype=int, usecols=[2])
+        quality = np.genfromtxt(lines, dtype=int, usecols=[2])
 
         # Indicates the FIPS Scan Mode. Tables referenced here are one of the
         # eight E/q stepping tables loaded into the instrument. See the EPPS
         # CDR SIS in the EPPS Document Archive Volume for details. =0 Normal
         # Scan, =1 High Temp Scan, =2 Burst Scan, =3 Test Scan, =4 Table 4, =5
         # Table 5, =6 Table 6, =7 Table 7.
-        mode = np.genfromtxt(path, dtype=int, usecols=[3])
-
-        # Remove bad quality data
-        if quality.any() != 0:
-            # A quality value != 0 is bad, we should ignore these
-            # First get the indices, then only keep the rows
-            good_quality_indices = np.where(quality == 0)
-
-            times = times[good_quality_indices]
-            valid_event_flux = valid_event_flux[good_quality_indices]
-            proton_flux = proton_flux[good_quality_indices]
-            total_event_flux = total_event_flux[good_quality_indices]
-
-        ds = xr.Dataset(
-            data_vars={
-                "Proton Flux": (("UTC", "Energy Channel"), proton_flux),
-                "Non-Proton Flux": (
-                    ("UTC", "Energy Channel"),
-                    valid_event_flux - proton_flux,
-                ),
-                "Mode": mode,
-            },
-            coords={
-                "UTC": times,
-                "Energy Channel": np.arange(valid_event_flux.shape[1]),
-            },
-        )
+        mode = np.genfromtxt(lines, dtype=int, usecols=[3])
 
-        file_data.append(ds)
+    # Remove bad quality data
+    if quality.any() != 0:
+        # A quality value != 0 is bad, we should ignore these
+        # First get the indices, then only keep the rows
+        good_quality_indices = np.where(quality == 0)
 
-    multi_file_data = xr.concat(file_data, dim="UTC")
+        times = times[good_quality_indices]
+        valid_event_flux = valid_event_flux[good_quality_indices]
+        proton_flux = proton_flux[good_quality_indices]
+        total_event_flux = total_event_flux[good_quality_indices]
+        mode = mode[good_quality_indices]
 
-    stripped_multi_file_data = multi_file_data.sel(
-        UTC=slice(
-            time_range.start.to_datetime(leap_second_strict="warn"),
-            time_range.end.to_datetime(leap_second_strict="warn"),
-        )
+    # Non-proton flux is found at full precision, before reducing to dtype
+    ds = xr.Dataset(
+        data_vars={
+            "Proton Flux": (("UTC", "Energy Channel"), proton_flux.astype(dtype)),
+            "Non-Proton Flux": (
+                ("UTC", "Energy Channel"),
+                (valid_event_flux - proton_flux).astype(dtype),
+            ),
+            "Mode": ("UTC", mode),
+        },
+        coords={
+            "UTC": times,
+            "Energy Channel": np.arange(valid_event_flux.shape[1]),
+        },
     )
 
-    return stripped_multi_file_data
+    return ds
 
 
 def fips_energy_bin_edges() -> list[float]:
@@ -1,22 +1,47 @@
 from pathlib import Path
 
 import numpy as np
+import numpy.typing as npt
 from astropy import units as u
 from astropy.io import ascii
-from astropy.table import QTable, Table, vstack
-from astropy.time import Time
+from astropy.table import QTable, Table
 from sunpy.time import TimeRange
 
+from hermpy.data.arrays import ArrayTimeseries
+from hermpy.data.cache import parse_cache
+from hermpy.data.coordinates import derived_quantities, transform
+from hermpy.data.precision import reduced_dtype
 from hermpy.data.trajectories import get_aberration_angle
+from hermpy.utils import day_of_year_to_nanoseconds, to_nanoseconds
+from hermpy.utils.compression import read_data_file
+from hermpy.utils.tracing import span, traced
 
+# Roughly the shortest row of the MAG products, in bytes, from which the rows
+# of a file are estimated.
+_MAG_ROW_BYTES = 90
 
-def add_field_magnitude(table: QTable) -> QTable:
+
+def add_field_magnitude(
+    table: QTable | ArrayTimeseries,
+) -> QTable | ArrayTimeseries:
     """
     A function to add magnetic field magnitude to any QTable with columns 'Bx',
     'By', and 'Bz'.
     Column '|B|' is added to the table.
+
+    An ArrayTimeseries is not copied, instead a new container sharing the
+    existing columns is returned, with '|B|' registered as a derived column,
+    computed when first accessed.
     """
 
+    if isinstance(table, ArrayTimeseries):
+        new_timeseries = table.shallow_copy()
+        new_timeseries.register_derived(
+            "|B|", _field_magnitude, ("Bx", "By", "Bz"), table.units.get("Bx")
+        )
+
+        return new_timeseries
+
     new_table = table.copy()
 
     components = ["Bx", "By", "Bz"]
@@ -25,7 +50,10 @@ def add_field_magnitude(table: QTable) -> QTable:
     return new_table
 
 
-def rotate_to_aberrated_coordinates(table: QTable, time_column="UTC") -> QTable:
+@traced()
+def rotate_to_aberrated_coordinates(
+    table: QTable | ArrayTimeseries, time_column="UTC"
+) -> QTable | ArrayTimeseries:
     """
     Add aberrated terms to a timeseries table, rotating around the Z axis by
     the aberration angle (updated daily). Caching of the aberration angle is
@@ -33,121 +61,343 @@ def rotate_to_aberrated_coordinates(table: QTable, time_column="UTC") -> QTable:
     km/s.
     """
 
-    times = table[time_column].to_datetime(leap_second_strict="warn")
-    aberration_angles: u.Quantity = get_aberration_angle(times)
+    if isinstance(table, ArrayTimeseries):
+        times = table.time
+    else:
+        times = to_nanoseconds(table[time_column])
 
-    # Create rotation matrices
-    cos_angles = np.cos(aberration_angles)
-    sin_angles = np.sin(aberration_angles)
-
-    rotation_matrices = np.array(
-        [
-            [
-                [c, -s, 0],
-                [s, c, 0],
-                [0, 0, 1],
-            ]
-            for c, s in zip(cos_angles, sin_angles)
-        ]
-    )
+    aberration_angles: u.Quantity = get_aberration_angle(times)
 
     # We want this to work no matter which columns this table includes.
     column_sets = [
-        ["X MSO", "Y MSO", "Z MSO"],
-        ["X MSM", "Y MSM", "Z MSM"],
-        ["Bx", "By", "Bz"],
+        (["X MSO", "Y MSO", "Z MSO"], "MSO", True),
+        (["X MSM", "Y MSM", "Z MSM"], "MSM", True),
+        (["Bx", "By", "Bz"], "MSO", False),
     ]
 
-    for cols in column_sets:
+    for cols, frame, is_position in column_sets:
         # Only process if *all* columns of that exist
         if not all(c in table.colnames for c in cols):
             continue
 
         # Perform rotation
-        data = np.vstack([table[c] for c in cols]).T
-        rotated = np.einsum("nij,nj->ni", rotation_matrices, data)
+        rotated = transform(
+            *(_quantity(table, c) for c in cols),
+            from_frame=frame,
+            to_frame=f"{frame}'",
+            aberration_angle=aberration_angles,
+            position=is_position,
+        )
 
         # Add new columns
-        for i, col in enumerate(cols):
+        for col, values in zip(cols, rotated):
             new_name = f"{col}'"
 
             # We round to 3 decimals to match the data. Its nice to stay
             # consistent, an we don't want to overstate our accuracy.
-            table[new_name] = np.round(rotated[:, i], 3)
+            table[new_name] = np.round(values, 3)
 
     table["Aberration Angle"] = np.round(aberration_angles, 3)
 
     return table
 
 
-def parse_messenger_mag(file_paths: list[Path], time_range: TimeRange) -> QTable:
-    file_data: list[QTable] = []
-    for path in file_paths:
-        table = ascii.read(path)
-        assert type(table) == Table
-
-        # Extract time information
-        year = table.columns[0]
-        doy = table.columns[1]
-        hour = table.columns[2]
-        minute = table.columns[3]
-        second = table.columns[4]
-
-        yday = [
-            f"{y}:{d:03d}:{h:02d}:{m:02d}:{s}"
-            for y, d, h, m, s in zip(year, doy, hour, minute, second)
-        ]
-        time = Time(yday, format="yday", scale="utc")
-
-        # For MESSENGER MAG at full cadence, the files contain 12 columns. Time
-        # averaged products contain 16 columns.
-        match len(table.colnames):
-            # Full Cadence
-            case 12:
-                file_data.append(
-                    QTable(
-                        {
-                            "UTC": time,
-                            "X MSO": table.columns[6] * u.kilometer,
-                            "Y MSO": table.columns[7] * u.kilometer,
-                            "Z MSO": table.columns[8] * u.kilometer,
-                            "Bx": table.columns[9] * u.nanotesla,
-                            "By": table.columns[10] * u.nanotesla,
-                            "Bz": table.columns[11] * u.nanotesla,
-                        }
-                    )
-                )
+@traced()
+def add_coordinate_frames(
+    table: QTable | ArrayTimeseries,
+    frames: tuple[str, ...] = ("MSM", "MSM'"),
+    derived_frame: str | None = "MSM'",
+    time_column: str = "UTC",
+) -> QTable | ArrayTimeseries:
+    """
+    Add spacecraft position columns (e.g. 'X MSM', 'Y MSM', 'Z MSM') to a
+    timeseries table with MSO position columns, for each frame in frames. If
+    any frame is aberrated, aberrated magnetic field columns ('Bx'', etc.) are
+    also added.
+
+    If derived_frame is set, columns 'Radial Distance', 'Magnetic Local Time',
+    and 'Magnetic Latitude' are added, computed in that frame.
+
+    Each new column is computed in a single vectorised pass, and added to the
+    table without copying. The aberration angle is taken from column
+    'Aberration Angle' if present, and otherwise computed, which requires SPICE
+    kernels to be loaded.
+
+    For an ArrayTimeseries, the columns are instead registered as derived
+    columns, so that nothing is computed (nor SPICE needed) until they are
+    accessed. The timeseries is modified in place.
+    """
+
+    if isinstance(table, ArrayTimeseries):
+        _register_coordinate_frames(table, frames, derived_frame)
+        return table
+
+    positions = [table[c] for c in ("X MSO", "Y MSO", "Z MSO")]
+    requested = list(dict.fromkeys([*frames, derived_frame] if derived_frame else frames))
+
+    aberration_angles = None
+    if any(frame.endswith("'") for frame in requested):
+        if "Aberration Angle" in table.colnames:
+            aberration_angles = table["Aberration Angle"]
+        else:
+            aberration_angles = get_aberration_angle(to_nanoseconds(table[time_column]))
+
+    def add_column(name: str, values: u.Quantity) -> None:
+        if name not in table.colnames:
+            table.add_column(values, name=name, copy=False)
+
+    for frame in requested:
+        if frame == "MSO":
+            continue
+
+        transformed = transform(*positions, "MSO", frame, aberration_angles)
+
+        for axis, values in zip("XYZ", transformed):
+            add_column(f"{axis} {frame}", values)
+
+    if aberration_angles is not None and all(
+        c in table.colnames for c in ("Bx", "By", "Bz")
+    ):
+        field = transform(
+            table["Bx"],
+            table["By"],
+            table["Bz"],
+            "MSO",
+            "MSO'",
+            aberration_angles,
+            position=False,
+        )
+        for component, values in zip(("Bx", "By", "Bz"), field):
+            add_column(f"{component}'", values)
+
+    if derived_frame is not None:
+        x, y, z = (table[f"{axis} {derived_frame}"] for axis in "XYZ")
+        radial_distance, local_time, latitude = derived_quantities(
+            x.value, y.value, z.value
+        )
+
+        add_column("Radial Distance", u.Quantity(radial_distance, x.unit, copy=False))
+        add_column("Magnetic Local Time", u.Quantity(local_time, u.hour, copy=False))
+        add_column("Magnetic Latitude", u.Quantity(latitude, u.deg, copy=False))
+
+    return table
+
+
+def _register_coordinate_frames(
+    timeseries: ArrayTimeseries,
+    frames: tuple[str, ...],
+    derived_frame: str | None,
+) -> None:
+    requested = list(dict.fromkeys([*frames, derived_frame] if derived_frame else frames))
+    positions = ("X MSO", "Y MSO", "Z MSO")
+    unit = timeseries.units.get("X MSO", u.km)
+
+    if any(frame.endswith("'") for frame in requested):
+        if "Aberration Angle" not in timeseries:
+            timeseries.register_derived(
+                "Aberration Angle",
+                lambda ts: get_aberration_angle(ts.time),
+                (timeseries.time_column,),
+            )
+
+        if all(c in timeseries for c in ("Bx", "By", "Bz")):
+            timeseries.register_derived(
+                ("Bx'", "By'", "Bz'"),
+                lambda ts: transform(
+                    ts["Bx"],
+                    ts["By"],
+                    ts["Bz"],
+                    "MSO",
+                    "MSO'",
+                    ts.quantity("Aberration Angle"),
+                    position=False,
+                ),
+                ("Bx", "By", "Bz", "Aberration Angle"),
+                timeseries.units.get("Bx"),
+            )
+
+    def frame_function(frame: str):
+        def function(ts: ArrayTimeseries):
+            angle = ts.quantity("Aberration Angle") if frame.endswith("'") else None
+            return transform(*(ts[c] for c in positions), "MSO", frame, angle, unit=unit)
+
+        return function
+
+    for frame in requested:
+        names = tuple(f"{axis} {frame}" for axis in "XYZ")
+        if frame == "MSO" or all(name in timeseries for name in names):
+            continue
+
+        depends_on = positions + (("Aberration Angle",) if frame.endswith("'") else ())
+        timeseries.register_derived(names, frame_function(frame), depends_on, unit)
+
+    if derived_frame is not None:
+        timeseries.register_derived(
+            ("Radial Distance", "Magnetic Local Time", "Magnetic Latitude"),
+            lambda ts: _derived_quantities(ts, derived_frame, unit),
+            tuple(f"{axis} {derived_frame}" for axis in "XYZ"),
+        )
+
+
+def _derived_quantities(
+    timeseries: ArrayTimeseries, frame: str, unit: u.UnitBase
+) -> tuple[u.Quantity, u.Quantity, u.Quantity]:
+    radial_distance, local_time, latitude = derived_quantities(
+        *(timeseries[f"{axis} {frame}"] for axis in "XYZ")
+    )
+
+    return (
+        u.Quantity(radial_distance, unit, copy=False),
+        u.Quantity(local_time, u.hour, copy=False),
+        u.Quantity(latitude, u.deg, copy=False),
+    )
+
+
+def _field_magnitude(timeseries: ArrayTimeseries) -> np.ndarray:
+    bx, by, bz = (timeseries[c] for c in ("Bx", "By", "Bz"))
+    return np.sqrt(bx * bx + by * by + bz * bz)
+
+
+def parse_messenger_mag(
+    file_paths: list[Path],
+    time_range: TimeRange,
+    as_arrays: bool = False,
+    use_cache: bool = True,
+    dtype: npt.DTypeLike = np.float64,
+) -> QTable | ArrayTimeseries:
+    """
+    Parse MESSENGER MAG files (full cadence or averaged products) to a
+    timeseries, sliced to the time range.
+
+    If as_arrays, an ArrayTimeseries is returned instead of a QTable, which
+    avoids constructing astropy Time and Quantity objects entirely.
+
+    Parsed files are kept in hermpy.data.parse_cache, so repeated calls over
+    the same files (e.g. sliding windows around events) parse each file only
+    once. The returned timeseries never shares memory with the cache.
+
+    dtype sets the precision of the field columns (Bx, By, Bz, and their
+    standard deviations). Values are given to 3 decimal places, so float32
+    halves their memory without loss (see hermpy.data.precision_report()).
+    Time and position columns are always stored at full precision.
+    """
+
+    dtype = reduced_dtype(dtype)
 
-            # Averaged Product
-            # Note: the time column for averaged data products is at the centre
-            # of the averaging window.
-            case 16:
-                file_data.append(
-                    QTable(
-                        {
-                            "UTC": time,
-                            "N Observations": table.columns[6],
-                            "X MSO": table.columns[7] * u.kilometer,
-                            "Y MSO": table.columns[8] * u.kilometer,
-                            "Z MSO": table.columns[9] * u.kilometer,
-                            "Bx": table.columns[10] * u.nanotesla,
-                            "By": table.columns[11] * u.nanotesla,
-                            "Bz": table.columns[12] * u.nanotesla,
-                            "SD(Bx)": table.columns[13] * u.nanotesla,
-                            "SD(By)": table.columns[14] * u.nanotesla,
-                            "SD(Bz)": table.columns[15] * u.nanotesla,
-                        },
-                        meta={
-                            "Notes": "This is an averaged data product. Several observations within a window of time are averaged, with their mean recorded as Bx, By, Bz, and their standard deviation as SD(Bx), etc. UTC marks the centre time of that window, and N Observations details the number of observations in that window."
-                        },
-                    )
+    with span("parse_messenger_mag", files=len(file_paths)) as parse_span:
+        if use_cache:
+            # Cached files are held in memory regardless, so they are all
+            # parsed first, and the output sized exactly.
+            file_data = [
+                parse_cache.get(path, _read_messenger_mag_file, dtype=dtype).between(
+                    time_range
                 )
-    merged_table = vstack(file_data)
+                for path in file_paths
+            ]
+            capacity = None
+        else:
+            # Otherwise, files are parsed one at a time as the output is
+            # filled, so only one is in memory at once. The output is sized
+            # from the file sizes, without reading them, and grows if that
+            # falls short (e.g. for compressed files).
+            file_data = (
+                _read_messenger_mag_file(path, dtype).between(time_range)
+                for path in file_paths
+            )
+            file_bytes = sum(Path(path).stat().st_size for path in file_paths)
+            capacity = file_bytes // _MAG_ROW_BYTES
 
-    # Slice this to the time range
-    merged_and_sliced_table = merged_table[
-        (merged_table["UTC"] > time_range.start)
-        & (merged_table["UTC"] < time_range.end)
-    ]
+        # Each file is sliced to the time range before it is copied, and
+        # copied once, into preallocated columns.
+        with span("parse_messenger_mag.concatenate"):
+            merged_and_sliced = ArrayTimeseries.concatenate(file_data, capacity)
+
+        parse_span.add(rows=len(merged_and_sliced))
+
+        if as_arrays:
+            return merged_and_sliced
+
+        with span("parse_messenger_mag.to_qtable"):
+            return merged_and_sliced.to_qtable()
+
+
+def _read_messenger_mag_file(
+    path: Path, dtype: np.dtype = np.dtype(np.float64)
+) -> ArrayTimeseries:
+    # Files may be compressed in the cache (see ClientMESSENGER), and are
+    # decompressed in memory.
+    with span("parse_messenger_mag.read", bytes=lambda: Path(path).stat().st_size):
+        text = read_data_file(path)
+
+    with span("parse_messenger_mag.tokenise") as tokenise_span:
+        table = ascii.read(text)
+        tokenise_span.add(rows=len(table))
+    assert type(table) == Table
+
+    # Extract time information
+    with span("parse_messenger_mag.time"):
+        time = day_of_year_to_nanoseconds(*(table.columns[i] for i in range(5)))
+
+    # For MESSENGER MAG at full cadence, the files contain 12 columns. Time
+    # averaged products contain 16 columns.
+    match len(table.colnames):
+        # Full Cadence
+        case 12:
+            columns = {
+                "X MSO": (6, u.kilometer),
+                "Y MSO": (7, u.kilometer),
+                "Z MSO": (8, u.kilometer),
+                "Bx": (9, u.nanotesla),
+                "By": (10, u.nanotesla),
+                "Bz": (11, u.nanotesla),
+            }
+            meta = {}
+
+        # Averaged Product
+        # Note: the time column for averaged data products is at the centre
+        # of the averaging window.
+        case 16:
+            columns = {
+                "N Observations": (6, None),
+                "X MSO": (7, u.kilometer),
+                "Y MSO": (8, u.kilometer),
+                "Z MSO": (9, u.kilometer),
+                "Bx": (10, u.nanotesla),
+                "By": (11, u.nanotesla),
+                "Bz": (12, u.nanotesla),
+                "SD(Bx)": (13, u.nanotesla),
+                "SD(By)": (14, u.nanotesla),
+                "SD(Bz)": (15, u.nanotesla),
+            }
+            meta = {
+                "Notes": "This is an averaged data product. Several observations within a window of time are averaged, with their mean recorded as Bx, By, Bz, and their standard deviation as SD(Bx), etc. UTC marks the centre time of that window, and N Observations details the number of observations in that window."
+            }
+
+        case _:
+            raise ValueError(
+                f"Unrecognised MESSENGER MAG file with {len(table.colnames)} columns: {path}"
+            )
+
+    # Field columns are stored in the requested precision
+    values = {
+        name: (
+            np.asarray(table.columns[i], dtype=dtype)
+            if unit == u.nanotesla
+            else np.asarray(table.columns[i])
+        )
+        for name, (i, unit) in columns.items()
+    }
+
+    return ArrayTimeseries(
+        time,
+        values,
+        {name: unit for name, (_, unit) in columns.items() if unit is not None},
+        meta=meta,
+    )
+
+
+def _quantity(table: QTable | ArrayTimeseries, name: str) -> u.Quantity:
+    if isinstance(table, ArrayTimeseries):
+        return table.quantity(name)
 
-    return merged_and_sliced_table
+    return table[name]
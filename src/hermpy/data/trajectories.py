@@ -4,23 +4,47 @@ from functools import cache
 import astropy.units as u
 import numpy as np
 import spiceypy as spice
+from astropy.time import Time
 
-from hermpy.utils import Constants, DateLike, DateSequence
+from hermpy.utils import (
+    Constants,
+    DateLike,
+    DateSequence,
+    from_nanoseconds,
+    to_nanoseconds,
+)
+from hermpy.utils.tracing import span, traced
 
 
+_NS_PER_DAY = 86_400_000_000_000
+
+
+@traced()
 def get_aberration_angle(
-    datetimes: DateLike | DateSequence,
+    times: DateLike | DateSequence | Time | np.ndarray,
 ) -> u.Quantity:
+    """
+    The aberration angle for each time, which changes daily. Times may be
+    datetimes or dates, an astropy Time, a datetime64 array, or int64
+    nanoseconds (see hermpy.utils.to_nanoseconds).
+
+    The angle is only computed once per unique day, and broadcast back to
+    each sample, so no per-sample Python objects are created.
+    """
+
+    if isinstance(times, (list, tuple)):
+        times = np.array(times, dtype="datetime64[ns]")
 
-    # Force list format even for single input
-    if isinstance(datetimes, DateLike):
-        dates = datetimes if isinstance(datetimes, dt.date) else datetimes.date()
-    else:
-        dates = [d if isinstance(d, dt.date) else d.date() for d in datetimes]
+    days, inverse = np.unique(to_nanoseconds(times) // _NS_PER_DAY, return_inverse=True)
 
-    aberration_angles = u.Quantity([_get_aberration_angle_single(d) for d in dates])
+    day_angles = u.Quantity(
+        [
+            _get_aberration_angle_single(dt.date(1970, 1, 1) + dt.timedelta(days=int(day)))
+            for day in days
+        ]
+    )
 
-    aberration_angles = np.squeeze(aberration_angles)
+    aberration_angles = np.squeeze(day_angles[inverse])
 
     assert isinstance(aberration_angles, u.Quantity)
 
@@ -42,17 +66,47 @@ def _get_aberration_angle_single(date: dt.date) -> u.Quantity:
 
 
 def get_heliocentric_distance(
-    datetimes: DateLike | DateSequence,
+    times: DateLike | DateSequence | Time | np.ndarray,
 ) -> u.Quantity:
+    """
+    Mercury's distance from the Sun at each time, accepting the same time
+    representations as get_aberration_angle(). Always returns an array.
+    """
 
-    if isinstance(datetimes, (dt.date, dt.datetime)):
-        datetimes_list: list[DateLike] = [datetimes]
-    else:
-        datetimes_list = list(datetimes)
+    if isinstance(times, (list, tuple)):
+        times = np.array(times, dtype="datetime64[ns]")
 
-    ets = spice.datetime2et(datetimes_list)
-    positions, _ = spice.spkpos("MERCURY", ets, "J2000", "NONE", "SUN")
+    ets = _ephemeris_times(from_nanoseconds(to_nanoseconds(times)))
+
+    with span("spice.spkpos", samples=len(ets)):
+        positions, _ = spice.spkpos("MERCURY", ets, "J2000", "NONE", "SUN")
 
     distances = np.linalg.norm(positions, axis=1) * u.km
 
     return distances
+
+
+def get_positions(
+    times: Time,
+    target: str = "MESSENGER",
+    observer: str = "MERCURY",
+    frame: str = "MSGR_MSO",
+) -> u.Quantity:
+    """
+    Positions of a target relative to an observer, in a SPICE frame, as an
+    (n, 3) array. By default, the position of MESSENGER in MSO coordinates.
+    """
+
+    ets = _ephemeris_times(times)
+
+    with span("spice.spkpos", samples=len(ets)):
+        positions, _ = spice.spkpos(target, ets, frame, "NONE", observer)
+
+    return np.asarray(positions) * u.km
+
+
+def _ephemeris_times(times: Time) -> np.ndarray:
+    # SPICE ephemeris time is TDB seconds past J2000. Computing it with
+    # astropy avoids a per-sample Python datetime for spice.datetime2et.
+    tdb = times.tdb
+    return np.atleast_1d((tdb.jd1 - 2_451_545.0) * 86_400 + tdb.jd2 * 86_400)
@@ -0,0 +1,477 @@
+"""
+Dynamic (wave power) spectra of MAG timeseries.
+
+    spectra = dynamic_spectrum(mag, window=60 * u.s)
+    SpectrogramPanel(spectra["Bx"])
+
+Data are streamed in chunks (e.g. one parsed file per day) with overlap
+carried between them, so multi-day full cadence data needn't fit in memory,
+and transforms are spread across threads (numpy's FFT releases the GIL).
+"""
+
+import math
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import xarray as xr
+from astropy import units as u
+from astropy.table import QTable
+
+from hermpy.data.arrays import ArrayTimeseries
+from hermpy.utils import to_nanoseconds
+
+Timeseries = ArrayTimeseries | QTable
+
+FIELD_COMPONENTS = ("Bx", "By", "Bz", "|B|")
+FIELD_ALIGNED_COMPONENTS = ("B Parallel", "B Perpendicular 1", "B Perpendicular 2")
+
+# The number of samples (windows x window length) transformed in each batch,
+# bounding the temporary memory of each thread.
+_BATCH_SAMPLES = 2**18
+
+# Samples of output in each wavelet block, excluding overlap.
+_WAVELET_BLOCK = 2**16
+
+# Morlet wavelet non-dimensional frequency, as in Torrence & Compo (1998)
+_OMEGA_0 = 6.0
+
+
+def dynamic_spectrum(
+    mag: Timeseries | Iterable[Timeseries],
+    components: tuple[str, ...] | list[str] = FIELD_COMPONENTS,
+    window: u.Quantity = 60 * u.s,
+    step: u.Quantity | None = None,
+    method: str = "fft",
+    frequencies: u.Quantity | None = None,
+    workers: int | None = None,
+    time_column: str = "UTC",
+) -> xr.Dataset:
+    """
+    Power spectral density of field components through time.
+
+    With method "fft", each spectrum is of a window of data, with its mean
+    removed and a Hann taper applied, with windows every step (by default,
+    half of window). With method "wavelet", the Morlet wavelet power
+    (Torrence & Compo, 1998) is averaged over each step, and scaled to a
+    one-sided power spectral density (2 dt |W|^2).
+
+    Components may be any of Bx, By, Bz, |B|, and the field-aligned
+    components B Parallel, B Perpendicular 1 and B Perpendicular 2. The
+    background field is the mean over each window (for "fft") or a moving
+    average over window (for "wavelet"). Perpendicular 1 is along b x X,
+    and perpendicular 2 completes the right handed set, b x (b x X).
+
+    MAG may be a single timeseries, or an iterable of chunks in time order,
+    of which only one need be held in memory at a time. The sampling rate is
+    taken from the first chunk. Spectra which include a data gap or a
+    different sampling rate are NaN. Wavelet power within the cone of
+    influence of a gap is not masked.
+
+
+    Parameters
+    ----------
+    mag : ArrayTimeseries | QTable | Iterable[ArrayTimeseries | QTable]
+        MAG timeseries with columns Bx, By, Bz, or chunks of one.
+
+    components : tuple[str, ...]
+        Components to find spectra of. Each is a variable of the result.
+
+    window : astropy.units.Quantity
+        FFT window length, or the background field averaging length for
+        field-aligned wavelet spectra.
+
+    step : astropy.units.Quantity, optional
+        Time between spectra.
+
+    method : str
+        "fft" or "wavelet".
+
+    frequencies : astropy.units.Quantity, optional
+        Wavelet frequencies. By default, 64 log spaced frequencies from
+        1 / window to the Nyquist frequency.
+
+    workers : int, optional
+        Number of threads. Defaults to the number of CPUs.
+
+
+    Returns
+    -------
+    out : xarray.Dataset
+        A variable per component, with dimensions ("UTC", "Frequency"), in
+        nT^2 / Hz. UTC is the centre of each window (marked by its
+        "Position" attribute), and frequency is in Hz. Frequency bin edges
+        are given by the "Frequency Edges" attribute of each variable. Both
+        are used by SpectrogramPanel.
+    """
+
+    unknown = set(components) - set(FIELD_COMPONENTS + FIELD_ALIGNED_COMPONENTS)
+    if len(unknown) > 0:
+        raise ValueError(
+            f"Unknown components: {sorted(unknown)}. Expected any of "
+            f"{FIELD_COMPONENTS + FIELD_ALIGNED_COMPONENTS}"
+        )
+
+    if method not in ("fft", "wavelet"):
+        raise ValueError(f"Unknown method: {method}. Expected 'fft' or 'wavelet'")
+
+    chunks = _field_chunks(mag, time_column)
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError("No data")
+
+    # The sampling interval, in nanoseconds
+    interval = int(round(np.median(np.diff(first[0])))) if len(first[0]) > 1 else 0
+    if interval <= 0:
+        raise ValueError("Need at least two samples to find the sampling rate")
+
+    window_samples = int(round(window.to_value(u.ns) / interval))
+    step_samples = (
+        max(window_samples // 2, 1)
+        if step is None
+        else int(round(step.to_value(u.ns) / interval))
+    )
+    if window_samples < 2 or step_samples < 1:
+        raise ValueError("Window and step must span at least two and one samples")
+
+    chunks = _chained(first, chunks)
+    components = list(components)
+
+    with ThreadPoolExecutor(workers or os.cpu_count()) as executor:
+        if method == "fft":
+            times, power, frequency, edges = _fft_spectra(
+                chunks, components, window_samples, step_samples, interval, executor
+            )
+        else:
+            if frequencies is None:
+                frequencies = np.geomspace(
+                    1 / window.to_value(u.s), 0.5e9 / interval, 64
+                ) * u.Hz
+            times, power, frequency, edges = _wavelet_spectra(
+                chunks,
+                components,
+                np.sort(frequencies.to_value(u.Hz)),
+                window_samples,
+                step_samples,
+                interval,
+                executor,
+            )
+
+    attributes = {"units": "nT2 / Hz", "Frequency Edges": edges.tolist()}
+
+    return xr.Dataset(
+        data_vars={
+            name: (("UTC", "Frequency"), power[:, :, i], attributes)
+            for i, name in enumerate(components)
+        },
+        coords={
+            "UTC": ("UTC", times.view("datetime64[ns]"), {"Position": "centre"}),
+            "Frequency": frequency,
+        },
+        attrs={"Method": method, "Frequency Unit": "Hz"},
+    )
+
+
+def _fft_spectra(
+    chunks: Iterator[tuple[np.ndarray, np.ndarray]],
+    components: list[str],
+    window_samples: int,
+    step_samples: int,
+    interval: int,
+    executor: ThreadPoolExecutor,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+
+    dt = interval / 1e9
+    taper = np.hanning(window_samples)
+
+    # One-sided power spectral density. The DC component is dropped, and the
+    # Nyquist component (for even windows) isn't doubled.
+    scale = np.full(window_samples // 2, 2 * dt / np.sum(taper**2))
+    if window_samples % 2 == 0:
+        scale[-1] /= 2
+
+    def transform(times: np.ndarray, field: np.ndarray, starts: np.ndarray):
+        index = starts[:, None] + np.arange(window_samples)[None, :]
+        window_times = times[index]
+        segments = field[index]
+
+        series = _components(segments, segments.mean(axis=1, keepdims=True), components)
+        series -= series.mean(axis=1, keepdims=True)
+        series *= taper[None, :, None]
+
+        spectra = np.fft.rfft(series, axis=1)[:, 1:, :]
+        power = (spectra.real**2 + spectra.imag**2) * scale[None, :, None]
+
+        power[~_regular(window_times, interval)] = np.nan
+
+        return window_times[:, 0] + (window_samples * interval) // 2, power
+
+    times_out, power_out = [], []
+    batch = max(_BATCH_SAMPLES // window_samples, 1)
+
+    # Samples before the start of the next window aren't needed again
+    consumed = lambda n: _complete_windows(n, window_samples, step_samples) * step_samples
+
+    for times, field in _overlapping(chunks, consumed):
+        n_windows = _complete_windows(len(times), window_samples, step_samples)
+        starts = np.arange(n_windows) * step_samples
+
+        for centres, power in executor.map(
+            lambda s: transform(times, field, s),
+            [starts[i : i + batch] for i in range(0, n_windows, batch)],
+        ):
+            times_out.append(centres)
+            power_out.append(power)
+
+    frequency = np.fft.rfftfreq(window_samples, dt)[1:]
+    df = frequency[0]
+    edges = (np.arange(1, len(frequency) + 2) - 0.5) * df
+
+    return _stack(times_out, power_out, len(frequency), len(components)) + (frequency, edges)
+
+
+def _wavelet_spectra(
+    chunks: Iterator[tuple[np.ndarray, np.ndarray]],
+    components: list[str],
+    frequencies: np.ndarray,
+    window_samples: int,
+    step_samples: int,
+    interval: int,
+    executor: ThreadPoolExecutor,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+
+    dt = interval / 1e9
+
+    fourier_factor = 4 * np.pi / (_OMEGA_0 + np.sqrt(2 + _OMEGA_0**2))
+    scales = 1 / (frequencies * fourier_factor)
+
+    # Blocks overlap by the e-folding time of the largest scale (and half of
+    # the background field window), so that output isn't affected by the
+    # edges of a block, except at the ends of the data.
+    margin = max(math.ceil(np.sqrt(2) * scales.max() / dt), window_samples // 2 + 1)
+    block = max(_WAVELET_BLOCK // step_samples, 1) * step_samples
+
+    def transform(times: np.ndarray, field: np.ndarray, start: int, stop: int):
+        # Power for whole steps of samples [start, stop) of a block
+        background = _moving_average(field, window_samples)
+        series = _components(field, background, components)
+
+        # Samples which are NaN, or either side of a gap or a change of
+        # sampling rate, invalidate the steps they fall in.
+        invalid = ~np.isfinite(series).all(axis=1)
+        irregular = np.abs(np.diff(times) - interval) > interval // 2
+        invalid[:-1] |= irregular
+        invalid[1:] |= irregular
+
+        series = series - np.nanmean(series, axis=0)
+        series[~np.isfinite(series)] = 0
+
+        n_fft = 1 << (len(series) - 1).bit_length()
+        spectrum = np.fft.rfft(series, n=n_fft, axis=0)
+        omega = 2 * np.pi * np.fft.rfftfreq(n_fft, dt)
+
+        n_steps = (stop - start) // step_samples
+
+        def scale_power(s: float) -> np.ndarray:
+            # Torrence & Compo (1998) normalised Morlet, in Fourier space
+            daughter = (
+                np.pi**-0.25
+                * np.sqrt(2 * np.pi * s / dt)
+                * np.exp(-0.5 * (s * omega - _OMEGA_0) ** 2)
+            )
+            full = np.zeros((n_fft, len(components)), dtype=complex)
+            full[: len(omega)] = spectrum * daughter[:, None]
+
+            coefficients = np.fft.ifft(full, axis=0)[start:stop]
+            power = coefficients.real**2 + coefficients.imag**2
+
+            return power.reshape(n_steps, step_samples, -1).mean(axis=1)
+
+        power = np.stack(list(executor.map(scale_power, scales)), axis=1) * 2 * dt
+        power[invalid[start:stop].reshape(n_steps, step_samples).any(axis=1)] = np.nan
+
+        return times[start:stop:step_samples] + (step_samples * interval) // 2, power
+
+    times_out, power_out = [], []
+
+    buffer_times = np.empty(0, dtype=np.int64)
+    buffer_field = np.empty((0, 3))
+    # The first sample of the buffer not yet output
+    start = 0
+
+    for times, field in _chained_with_end(chunks):
+        final = times is None
+        if not final:
+            buffer_times = np.concatenate([buffer_times, times])
+            buffer_field = np.concatenate([buffer_field, field])
+
+        while True:
+            # Samples a margin from the end of the buffer can be output, or
+            # all samples at the end of the data. Other than at the end, we
+            # wait for a whole block.
+            available = len(buffer_times) - start - (0 if final else margin)
+            n_output = min(available, block) // step_samples * step_samples
+            if n_output == 0 or (not final and n_output < block):
+                break
+
+            stop = start + n_output
+            end = min(stop + margin, len(buffer_times))
+
+            centres, power = transform(buffer_times[:end], buffer_field[:end], start, stop)
+            times_out.append(centres)
+            power_out.append(power)
+
+            # Keep a margin before the next output
+            keep = max(stop - margin, 0)
+            buffer_times = buffer_times[keep:]
+            buffer_field = buffer_field[keep:]
+            start = stop - keep
+
+    # Geometric midpoints between frequencies
+    if len(frequencies) > 1:
+        midpoints = np.sqrt(frequencies[1:] * frequencies[:-1])
+        edges = np.concatenate(
+            [
+                [frequencies[0] ** 2 / midpoints[0]],
+                midpoints,
+                [frequencies[-1] ** 2 / midpoints[-1]],
+            ]
+        )
+    else:
+        edges = np.array([frequencies[0] / 2, frequencies[0] * 2])
+
+    return _stack(times_out, power_out, len(frequencies), len(components)) + (
+        frequencies,
+        edges,
+    )
+
+
+def _components(field: np.ndarray, background: np.ndarray, components: list[str]) -> np.ndarray:
+    # Components of field (..., 3), stacked on a new last axis. The
+    # background field (broadcastable to field) defines field-aligned axes.
+    columns = []
+
+    if any(c in FIELD_ALIGNED_COMPONENTS for c in components):
+        parallel = background / np.linalg.norm(background, axis=-1, keepdims=True)
+
+        # b x X, or b x Z where b is nearly along X
+        reference = np.zeros_like(parallel)
+        along_x = np.abs(parallel[..., 0]) > 0.99
+        reference[..., 0] = ~along_x
+        reference[..., 2] = along_x
+
+        perpendicular_1 = np.cross(parallel, reference)
+        perpendicular_1 /= np.linalg.norm(perpendicular_1, axis=-1, keepdims=True)
+        perpendicular_2 = np.cross(parallel, perpendicular_1)
+
+        axes = {
+            "B Parallel": parallel,
+            "B Perpendicular 1": perpendicular_1,
+            "B Perpendicular 2": perpendicular_2,
+        }
+
+    for name in components:
+        match name:
+            case "Bx" | "By" | "Bz":
+                columns.append(field[..., "xyz".index(name[1])])
+            case "|B|":
+                columns.append(np.linalg.norm(field, axis=-1))
+            case _:
+                columns.append(np.sum(field * axes[name], axis=-1))
+
+    return np.stack(columns, axis=-1)
+
+
+def _moving_average(field: np.ndarray, length: int) -> np.ndarray:
+    # Centred moving average along the first axis, shortened at the ends
+    cumulative = np.concatenate([np.zeros((1, field.shape[1])), np.cumsum(field, axis=0)])
+
+    index = np.arange(len(field))
+    lower = np.maximum(index - length // 2, 0)
+    upper = np.minimum(index + length - length // 2, len(field))
+
+    return (cumulative[upper] - cumulative[lower]) / (upper - lower)[:, None]
+
+
+def _regular(times: np.ndarray, interval: int) -> np.ndarray:
+    # Whether each row of times is evenly sampled at interval, within half a
+    # sample, i.e. without gaps or a change of sampling rate.
+    steps = np.diff(times, axis=-1)
+    return np.all(np.abs(steps - interval) <= interval // 2, axis=-1)
+
+
+def _complete_windows(n_samples: int, window_samples: int, step_samples: int) -> int:
+    if n_samples < window_samples:
+        return 0
+
+    return (n_samples - window_samples) // step_samples + 1
+
+
+def _overlapping(chunks, consumed):
+    # Yield chunks with the unconsumed samples of the previous chunk
+    # prepended, where consumed(n) is the number of leading samples of a
+    # chunk of n samples which aren't needed again.
+    buffer_times = np.empty(0, dtype=np.int64)
+    buffer_field = np.empty((0, 3))
+
+    for times, field in chunks:
+        times = np.concatenate([buffer_times, times])
+        field = np.concatenate([buffer_field, field])
+
+        yield times, field
+
+        used = consumed(len(times))
+        buffer_times, buffer_field = times[used:], field[used:]
+
+
+def _field_chunks(
+    mag: Timeseries | Iterable[Timeseries], time_column: str
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    # (times, field) for each non-empty chunk, checking time order
+
+    if isinstance(mag, (ArrayTimeseries, QTable)):
+        mag = [mag]
+
+    previous_end = None
+    for chunk in mag:
+        if len(chunk) == 0:
+            continue
+
+        if isinstance(chunk, ArrayTimeseries):
+            times = chunk.time
+        else:
+            times = to_nanoseconds(chunk[time_column])
+
+        if previous_end is not None and times[0] <= previous_end:
+            raise ValueError("Data chunks must be sorted and in time order")
+        previous_end = times[-1]
+
+        field = np.column_stack(
+            [
+                np.asarray(getattr(chunk[c], "value", chunk[c]), dtype=np.float64)
+                for c in ("Bx", "By", "Bz")
+            ]
+        )
+
+        yield times, field
+
+
+def _chained(first, rest: Iterator) -> Iterator:
+    yield first
+    yield from rest
+
+
+def _chained_with_end(chunks: Iterator) -> Iterator:
+    # Chunks, followed by (None, None) to mark the end of the data
+    yield from chunks
+    yield None, None
+
+
+def _stack(
+    times: list[np.ndarray], power: list[np.ndarray], n_frequencies: int, n_components: int
+) -> tuple[np.ndarray, np.ndarray]:
+    if len(times) == 0:
+        return np.empty(0, dtype=np.int64), np.empty((0, n_frequencies, n_components))
+
+    return np.concatenate(times), np.concatenate(power)
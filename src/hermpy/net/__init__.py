@@ -1,4 +1,17 @@
-from .client_messenger import ClientMESSENGER
-from .client_spice import ClientSPICE
+from typing import TYPE_CHECKING
 
-__all__ = ["ClientMESSENGER", "ClientSPICE"]
+from hermpy._lazy import attach
+
+# Imported on first access (PEP 562), see hermpy.data
+_LAZY_ATTRIBUTES = {
+    "IngestionCatalog": ".catalog",
+    "ClientMESSENGER": ".client_messenger",
+    "ClientSPICE": ".client_spice",
+}
+
+__getattr__, __dir__, __all__ = attach(__name__, _LAZY_ATTRIBUTES)
+
+if TYPE_CHECKING:
+    from .catalog import IngestionCatalog
+    from .client_messenger import ClientMESSENGER
+    from .client_spice import ClientSPICE
@@ -0,0 +1,341 @@
+import argparse
+import datetime as dt
+import hashlib
+import re
+import sqlite3
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from astropy.config import get_cache_dir_path
+from sunpy.time import TimeRange
+
+from hermpy.utils.compression import open_data_file
+
+
+def main():
+    """
+    Synchronise the local archive with the PDS, downloading only new or
+    republished files, e.g.:
+
+        python -m hermpy.net.catalog 2011-03-24 2015-04-30 MAG FIPS --compression xz
+    """
+
+    from hermpy.net.client_messenger import ClientMESSENGER
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("start")
+    parser.add_argument("end")
+    parser.add_argument("instruments", nargs="+")
+    parser.add_argument("--catalog", type=Path, default=None)
+    parser.add_argument("--compression", default=None)
+    arguments = parser.parse_args()
+
+    catalog = IngestionCatalog(arguments.catalog)
+    results = catalog.sync(
+        ClientMESSENGER(compression=arguments.compression),
+        TimeRange(arguments.start, arguments.end),
+        arguments.instruments,
+    )
+
+    for result in results:
+        if result.status != "unchanged":
+            print(f"{result.instrument} {result.day}: {result.status} (V{result.version})")
+
+    print(
+        f"{sum(r.status != 'unchanged' for r in results)} of {len(results)} files updated"
+    )
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    instrument: str
+    day: dt.date
+    version: int
+    path: Path
+    # One of "new", "superseded", "unchanged"
+    status: str
+
+
+class IngestionCatalog:
+    """
+    A local SQLite catalog of ingested PDS files, recording per instrument
+    and day the file version and checksum, and any artefacts derived from it
+    (e.g. converted or compressed products).
+
+    sync() uses this to download and reprocess only the days which are new, or
+    which the PDS has republished with a new version, so a refresh of the
+    whole mission touches only what changed.
+
+    By default the catalog is stored beside the hermpy download cache.
+    """
+
+    def __init__(self, path: Path | str | None = None):
+        if path is None:
+            path = get_cache_dir_path("hermpy") / "catalog.sqlite"
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._connection = sqlite3.connect(self.path)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                instrument TEXT NOT NULL,
+                day TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                checksum TEXT NOT NULL,
+                url TEXT NOT NULL,
+                path TEXT NOT NULL,
+                ingested TEXT NOT NULL,
+                PRIMARY KEY (instrument, day)
+            );
+            CREATE TABLE IF NOT EXISTS artefacts (
+                instrument TEXT NOT NULL,
+                day TEXT NOT NULL,
+                name TEXT NOT NULL,
+                path TEXT NOT NULL,
+                checksum TEXT NOT NULL,
+                PRIMARY KEY (instrument, day, name)
+            );
+            """
+        )
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "IngestionCatalog":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def get(self, instrument: str, day: dt.date) -> dict | None:
+        """The catalog entry of an instrument's file for a day, if any."""
+
+        row = self._connection.execute(
+            "SELECT version, checksum, url, path, ingested FROM files "
+            "WHERE instrument = ? AND day = ?",
+            (instrument, day.isoformat()),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return dict(zip(("version", "checksum", "url", "path", "ingested"), row))
+
+    def artefacts(self, instrument: str, day: dt.date) -> dict[str, Path]:
+        """Derived artefacts recorded for an instrument's file for a day."""
+
+        rows = self._connection.execute(
+            "SELECT name, path FROM artefacts WHERE instrument = ? AND day = ?",
+            (instrument, day.isoformat()),
+        )
+
+        return {name: Path(path) for name, path in rows}
+
+    def record(
+        self,
+        instrument: str,
+        day: dt.date,
+        version: int,
+        checksum: str,
+        url: str,
+        path: Path | str,
+        artefacts: dict[str, Path] | None = None,
+    ) -> None:
+        """
+        Record an ingested file, replacing any previous version, along with
+        any artefacts derived from it, in a single transaction. Artefacts
+        derived from a different checksum are dropped, as they are stale.
+        """
+
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    instrument,
+                    day.isoformat(),
+                    version,
+                    checksum,
+                    url,
+                    str(path),
+                    dt.datetime.now(dt.timezone.utc).isoformat(),
+                ),
+            )
+            self._connection.execute(
+                "DELETE FROM artefacts WHERE instrument = ? AND day = ? AND checksum != ?",
+                (instrument, day.isoformat(), checksum),
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO artefacts VALUES (?, ?, ?, ?, ?)",
+                [
+                    (instrument, day.isoformat(), name, str(artefact), checksum)
+                    for name, artefact in (artefacts or {}).items()
+                ],
+            )
+
+    def record_artefact(
+        self, instrument: str, day: dt.date, name: str, path: Path | str
+    ) -> None:
+        """Record an artefact derived from the current file of a day."""
+
+        entry = self.get(instrument, day)
+        if entry is None:
+            raise ValueError(f"No {instrument} file recorded for {day}")
+
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO artefacts VALUES (?, ?, ?, ?, ?)",
+                (instrument, day.isoformat(), name, str(path), entry["checksum"]),
+            )
+
+    def sync(
+        self,
+        client,
+        time_range: TimeRange,
+        instruments: list[str],
+        process: Callable[[str, dt.date, Path], dict[str, Path]] | None = None,
+    ) -> list[SyncResult]:
+        """Bring the local archive up to date with the PDS.
+
+        The remote listing is compared with the catalog, and only days which
+        are new, have a newer version, or whose local file has gone missing
+        are downloaded. A republished file with identical content is recorded
+        under its new version, but not reprocessed.
+
+
+        Parameters
+        ----------
+        client : hermpy.net.ClientMESSENGER
+            The client to query and download with.
+
+        time_range : sunpy.time.TimeRange
+            The time range to synchronise.
+
+        instruments : list[str]
+            Instrument keys of the client, e.g. ["MAG", "FIPS"].
+
+        process : Callable, optional
+            Called as process(instrument, day, path) for each new or changed
+            file, returning a dictionary of named artefacts derived from it,
+            which are recorded in the catalog.
+
+
+        Returns
+        -------
+        results : list[SyncResult]
+            The outcome for each day.
+        """
+
+        results: list[SyncResult] = []
+
+        for instrument in instruments:
+            latest = _latest_versions(client.query(time_range, instrument, buffer=False))
+
+            to_download: list[tuple[dt.date, int, str]] = []
+            for day, (version, url) in sorted(latest.items()):
+                entry = self.get(instrument, day)
+
+                if (
+                    entry is not None
+                    and entry["version"] >= version
+                    and Path(entry["path"]).exists()
+                ):
+                    results.append(
+                        SyncResult(
+                            instrument,
+                            day,
+                            entry["version"],
+                            Path(entry["path"]),
+                            "unchanged",
+                        )
+                    )
+                    continue
+
+                to_download.append((day, version, url))
+
+            if len(to_download) == 0:
+                continue
+
+            paths = client.download([url for _, _, url in to_download])
+
+            for (day, version, url), path in zip(to_download, paths):
+                path = Path(path)
+                entry = self.get(instrument, day)
+                checksum = file_checksum(path)
+
+                if entry is None:
+                    status = "new"
+                elif entry["checksum"] == checksum:
+                    status = "unchanged"
+                else:
+                    status = "superseded"
+
+                # The file is only recorded once it has been processed, so
+                # that if processing fails, the day is processed again by the
+                # next sync rather than seen as unchanged.
+                artefacts = None
+                if process is not None and status != "unchanged":
+                    artefacts = process(instrument, day, path)
+
+                self.record(instrument, day, version, checksum, url, path, artefacts)
+
+                results.append(SyncResult(instrument, day, version, path, status))
+
+        return results
+
+
+def file_checksum(path: Path | str) -> str:
+    """
+    SHA-256 of a file's decompressed content, so that recompressing a file in
+    the cache doesn't change its checksum.
+    """
+
+    digest = hashlib.sha256()
+    with open_data_file(path, "rb") as file:
+        while chunk := file.read(1024**2):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+# PDS file names end with the version, e.g. MAGMSOSCI11152_V08.TAB, and the
+# day of year precedes the first underscore (or 'CDR' for FIPS). The year is
+# the directory containing the month directory.
+_VERSION = re.compile(r"_V(\d+)\.TAB$", re.IGNORECASE)
+_DAY_OF_YEAR = re.compile(r"(\d{3})(?:_|CDR)")
+_YEAR_DIRECTORY = re.compile(r"/(\d{4})/[^/]+/[^/]+$")
+
+
+def parse_file_name(url: str) -> tuple[dt.date, int]:
+    """Return the day and version of a PDS file from its url."""
+
+    version = _VERSION.search(url)
+    year = _YEAR_DIRECTORY.search(url)
+    day_of_year = _DAY_OF_YEAR.search(url.rsplit("/", 1)[-1])
+
+    if version is None or year is None or day_of_year is None:
+        raise ValueError(f"Cannot determine day and version of {url}")
+
+    day = dt.date(int(year.group(1)), 1, 1) + dt.timedelta(
+        days=int(day_of_year.group(1)) - 1
+    )
+
+    return day, int(version.group(1))
+
+
+def _latest_versions(urls: list[str]) -> dict[dt.date, tuple[int, str]]:
+    # The PDS can list several versions of a day, we only want the newest.
+    latest: dict[dt.date, tuple[int, str]] = {}
+
+    for url in urls:
+        day, version = parse_file_name(url)
+        if day not in latest or version > latest[day][0]:
+            latest[day] = (version, url)
+
+    return latest
+
+
+if __name__ == "__main__":
+    main()
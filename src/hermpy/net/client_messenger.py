@@ -1,13 +1,28 @@
 import calendar
 import datetime as dt
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+from astropy import units as u
 from astropy.time import Time
-from astropy.utils.data import download_files_in_parallel
+from astropy.utils.data import cache_contents, download_files_in_parallel
 from sunpy.net import Scraper
 from sunpy.time import TimeRange
 
+from hermpy.net.catalog import parse_file_name
+from hermpy.utils.compression import COMPRESSION_METHODS, compress_file
+from hermpy.utils.tracing import span, traced
+
+if TYPE_CHECKING:
+    from hermpy.data.coverage import CoverageIndex
+
+# Approximate parse throughput of a single core, in bytes of file per second,
+# used to estimate the cost of a query.
+_PARSE_BYTES_PER_SECOND = {"MAG": 25e6, "FIPS": 15e6}
+
 
 def main():
     """
@@ -49,12 +64,54 @@ class ClientMESSENGER:
             # FIPS
             "FIPS": "{{year:4d}}/{subdir}/FIPS_R{{year:4d}}{{day_of_year:3d}}CDR_V{{version}}.TAB",
         },
+        PRODUCT_CADENCE: dict[str, u.Quantity] = {
+            # Full cadence MAG is sampled at up to 20 Hz, depending on the
+            # orbit phase.
+            "MAG": 0.05 * u.s,
+            "MAG 1s": 1 * u.s,
+            "MAG 5s": 5 * u.s,
+            "MAG 10s": 10 * u.s,
+            "MAG 60s": 60 * u.s,
+            # FIPS scans every 10 s in burst mode, and every 60 s otherwise.
+            "FIPS": 10 * u.s,
+        },
+        FILE_SIZE: dict[str, int] = {
+            # Nominal size in bytes of a (uncompressed) day file, at the
+            # cadence above.
+            "MAG": 171_000_000,
+            "MAG 1s": 11_500_000,
+            "MAG 5s": 2_300_000,
+            "MAG 10s": 1_150_000,
+            "MAG 60s": 192_000,
+            "FIPS": 30_000_000,
+        },
+        compression: str | None = None,
+        compression_level: int | None = None,
+        coverage: dict[str, "CoverageIndex"] | None = None,
     ):
         # Paths defining where the data can be found
         self.PDS_BASE_URL = PDS_BASE_URL
         self.PDS_DATA_LOCATION = PDS_DATA_LOCATION
         self.FILE_PATTERN = FILE_PATTERN
 
+        # The sampling cadence and size of each product, used to plan
+        # queries (see plan())
+        self.PRODUCT_CADENCE = PRODUCT_CADENCE
+        self.FILE_SIZE = FILE_SIZE
+
+        # Downloaded files can be recompressed in the cache. The parsers
+        # detect and decompress these transparently.
+        if compression is not None and compression not in COMPRESSION_METHODS:
+            raise ValueError(
+                f"Unknown compression method: {compression}. Expected one of {COMPRESSION_METHODS}"
+            )
+        self.compression = compression
+        self.compression_level = compression_level
+
+        # Coverage indices by instrument, used to skip files known to have no
+        # data in a queried time range.
+        self.coverage = coverage or {}
+
         # We want the user to be able to query for the existance of
         # files before downloading, so we introduce a search buffer to
         # hold the results of the most recent query.
@@ -64,12 +121,15 @@ class ClientMESSENGER:
     def instruments(self) -> list[str]:
         return list(self.PDS_DATA_LOCATION.keys())
 
-    def query(self, time_range: TimeRange, instrument: str) -> list[str]:
+    @traced("ClientMESSENGER.query")
+    def query(
+        self, time_range: TimeRange, instrument: str, buffer: bool = True
+    ) -> list[str]:
         """
         Query the data locations for key <instrument>, between the times in
         time_range.
 
-        Returns a list[str] of urls and extends the search buffer.
+        Returns a list[str] of urls and, if buffer, extends the search buffer.
         """
 
         pattern = (
@@ -87,7 +147,8 @@ class ClientMESSENGER:
                 }
 
                 scraper = Scraper(format=pattern, **pattern_kwargs)
-                filelist = scraper.filelist(time_range)
+                with span("Scraper.filelist"):
+                    filelist = scraper.filelist(time_range)
                 assert type(filelist) == list
                 urls.extend(filelist)
 
@@ -97,7 +158,8 @@ class ClientMESSENGER:
             }
 
             scraper = Scraper(format=pattern, **pattern_kwargs)
-            filelist = scraper.filelist(time_range)
+            with span("Scraper.filelist"):
+                filelist = scraper.filelist(time_range)
             assert type(filelist) == list
             urls = filelist
 
@@ -107,28 +169,188 @@ class ClientMESSENGER:
         doys = _get_timerange_doys(time_range)
         urls = [url for url in urls if any(doy in url.split("/")[-1] for doy in doys)]
 
+        if instrument in self.coverage:
+            urls = [
+                url
+                for url in urls
+                if _may_have_data(self.coverage[instrument], url, time_range)
+            ]
+
         # Add urls to search buffer
-        self._query_buffer.extend(urls)
+        if buffer:
+            self._query_buffer.extend(urls)
 
         return urls
 
+    def plan(
+        self,
+        time_range: TimeRange,
+        points: int | None = None,
+        cadence: u.Quantity | None = None,
+        instrument: str = "MAG",
+        query: bool = True,
+        buffer: bool = True,
+    ) -> "QueryPlan":
+        """
+        Choose the cheapest product of an instrument (e.g. of "MAG", "MAG 1s",
+        ... "MAG 60s") which samples time_range at the given cadence or
+        finer, or with at least the given number of points, and estimate the
+        cost of fetching and parsing it. For example:
+
+            plan = client.plan(TimeRange("2011-06-01", "2012-06-01"), points=10_000)
+            print(plan)
+
+            local_paths = client.fetch()
+
+        If query, the product is queried for (extending the search buffer if
+        buffer), so that files already in the download cache aren't counted
+        as downloads. Otherwise the plan is made offline, assuming a file per
+        day, none of which are cached.
+
+        If no product is fine enough, the finest is chosen, with a warning.
+        """
+
+        if (points is None) == (cadence is None):
+            raise ValueError("Expected exactly one of points or cadence")
+
+        products = [
+            name
+            for name in self.PDS_DATA_LOCATION
+            if (name == instrument or name.startswith(instrument + " "))
+            and name in self.PRODUCT_CADENCE
+            and name in self.FILE_SIZE
+        ]
+        if len(products) == 0:
+            raise ValueError(
+                f"No products of {instrument} with a known cadence and file size"
+            )
+
+        duration = (time_range.end - time_range.start).to(u.s)
+        required = cadence if cadence is not None else duration / points
+
+        suitable = sorted(
+            (name for name in products if self.PRODUCT_CADENCE[name] <= required),
+            key=lambda name: self.FILE_SIZE[name],
+        )
+        if len(suitable) > 0:
+            product = suitable[0]
+        else:
+            product = min(products, key=lambda name: self.PRODUCT_CADENCE[name])
+            warnings.warn(
+                f"No product of {instrument} has a cadence of {required:.3g} or "
+                f"finer, using {product}"
+            )
+
+        if query:
+            urls = self.query(time_range, product, buffer=buffer)
+            cached = set(cache_contents("hermpy", on_missing="ignore"))
+            n_files = len(urls)
+            n_cached = sum(url in cached for url in urls)
+        else:
+            urls = []
+            n_files = len(_get_timerange_doys(time_range))
+            n_cached = 0
+
+        file_size = self.FILE_SIZE[product]
+        parse_rate = _PARSE_BYTES_PER_SECOND.get(product.split(" ")[0], 25e6)
+
+        return QueryPlan(
+            instrument=product,
+            time_range=time_range,
+            cadence=self.PRODUCT_CADENCE[product],
+            urls=tuple(urls),
+            files=n_files,
+            cached_files=n_cached,
+            points=round(float(duration / self.PRODUCT_CADENCE[product])),
+            download_bytes=(n_files - n_cached) * file_size,
+            parse_seconds=n_files * file_size / parse_rate,
+        )
+
     def fetch(self, check_for_updates: bool = False) -> list[Path]:
         """
         Download and fetch files in self.query_buffer and clears the buffer. If
         files are already downloaded, fetch them.
+
+        If the client was created with a compression method, files are
+        compressed in place in the cache after download. Files already
+        compressed are skipped, so this is cheap for cached files.
         """
 
-        data_paths = download_files_in_parallel(
-            self._query_buffer,
-            cache="update" if check_for_updates else True,
-            pkgname="hermpy",
-        )
+        data_paths = self.download(self._query_buffer, check_for_updates)
 
         # Flush query buffer
         self._query_buffer = []
 
         return data_paths
 
+    def download(self, urls: list[str], check_for_updates: bool = False) -> list[Path]:
+        """
+        Download and fetch a list of urls, as returned by query(), without
+        using the query buffer.
+        """
+
+        with span("ClientMESSENGER.download", files=len(urls)) as download_span:
+            data_paths = download_files_in_parallel(
+                urls,
+                cache="update" if check_for_updates else True,
+                pkgname="hermpy",
+            )
+            download_span.add(bytes=lambda: sum(Path(p).stat().st_size for p in data_paths))
+
+        if self.compression is not None:
+            with span("ClientMESSENGER.compress"), ThreadPoolExecutor() as executor:
+                list(
+                    executor.map(
+                        lambda path: compress_file(
+                            path, self.compression, self.compression_level
+                        ),
+                        data_paths,
+                    )
+                )
+
+        return data_paths
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """
+    The product chosen by ClientMESSENGER.plan(), and the estimated cost of
+    fetching and parsing it. Estimates are from nominal file sizes, so are
+    upper bounds for full cadence MAG, whose cadence varies.
+    """
+
+    instrument: str
+    time_range: TimeRange
+    cadence: u.Quantity
+    # Empty if the plan was made without querying
+    urls: tuple[str, ...]
+    files: int
+    cached_files: int
+    points: int
+    download_bytes: int
+    parse_seconds: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.instrument} ({self.cadence:g}): {self.files} files "
+            f"({self.cached_files} cached), ~{self.points:,} points, "
+            f"~{self.download_bytes / 1e6:,.1f} MB to download, "
+            f"~{self.parse_seconds:,.1f} s to parse"
+        )
+
+
+def _may_have_data(coverage: "CoverageIndex", url: str, time_range: TimeRange) -> bool:
+    # Files the index hasn't seen are kept, as we can't know.
+    day, _ = parse_file_name(url)
+    if not coverage.is_scanned(day):
+        return True
+
+    day_start = Time(day.isoformat(), scale="utc")
+    start = max(day_start, time_range.start)
+    end = min(day_start + 1 * u.day, time_range.end)
+
+    return start < end and coverage.has_data(TimeRange(start, end))
+
 
 def _get_subdir(time_range: TimeRange) -> str | list[str]:
     """
@@ -8,6 +8,8 @@ from urllib.request import urlopen
 import spiceypy as spice
 from astropy.utils.data import download_files_in_parallel
 
+from hermpy.utils.tracing import span, traced
+
 
 class ClientSPICE:
     def __init__(
@@ -52,6 +54,7 @@ class ClientSPICE:
         """
         self._local_buffer: list[Path] = []
 
+    @traced("ClientSPICE.fetch")
     def fetch(self, check_for_updates: bool = False) -> list[str]:
         """
         Download and fetch files in self.query_buffer and clears the buffer. If
@@ -69,11 +72,13 @@ class ClientSPICE:
 
         self._query_buffer.extend(all_urls)
 
-        data_paths = download_files_in_parallel(
-            self._query_buffer,
-            cache="update" if check_for_updates else True,
-            pkgname="hermpy",
-        )
+        with span("ClientSPICE.download", files=len(self._query_buffer)) as download_span:
+            data_paths = download_files_in_parallel(
+                self._query_buffer,
+                cache="update" if check_for_updates else True,
+                pkgname="hermpy",
+            )
+            download_span.add(bytes=lambda: sum(Path(p).stat().st_size for p in data_paths))
 
         # Return downloaded paths and anything in the local buffer.
         return data_paths + [str(p) for p in self._local_buffer]
@@ -88,7 +93,7 @@ class ClientSPICE:
 def list_remote_files(url: str) -> list[str]:
     """Return filenames from a simple Apache-style directory listing."""
 
-    with urlopen(url) as f:
+    with span("ClientSPICE.list_remote_files"), urlopen(url) as f:
         html = f.read().decode("utf-8")
 
     # Extract href targets
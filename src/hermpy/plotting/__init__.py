@@ -1,2 +1,19 @@
-from .boundary_models import plot_magnetospheric_boundaries
-from .panels import *
+from typing import TYPE_CHECKING
+
+from hermpy._lazy import attach
+
+# Imported on first access (PEP 562), see hermpy.data. This avoids importing
+# matplotlib until something is plotted.
+_LAZY_ATTRIBUTES = {
+    "plot_magnetospheric_boundaries": ".boundary_models",
+    "MultiPanel": ".panels",
+    "Panel": ".panels",
+    "SpectrogramPanel": ".panels",
+    "TimeseriesPanel": ".panels",
+}
+
+__getattr__, __dir__, __all__ = attach(__name__, _LAZY_ATTRIBUTES)
+
+if TYPE_CHECKING:
+    from .boundary_models import plot_magnetospheric_boundaries
+    from .panels import MultiPanel, Panel, SpectrogramPanel, TimeseriesPanel
@@ -1,15 +1,17 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from hermpy.data.boundaries import Winslow2013, bow_shock_curve, magnetopause_curve
+
 
 def plot_magnetospheric_boundaries(
     ax: plt.Axes,
     plane: str = "xy",
-    sub_solar_magnetopause: float = 1.45,
-    alpha: float = 0.5,
-    psi: float = 1.04,
-    p: float = 2.75,
-    initial_x: float = 0.5,
+    sub_solar_magnetopause: float = Winslow2013.SUB_SOLAR_MAGNETOPAUSE,
+    alpha: float = Winslow2013.ALPHA,
+    psi: float = Winslow2013.PSI,
+    p: float = Winslow2013.P,
+    initial_x: float = Winslow2013.INITIAL_X,
     add_legend: bool = False,
     zorder: int = 0,
     color="black",
@@ -20,7 +22,8 @@ def plot_magnetospheric_boundaries(
 
     Add the plane projection of the average magnetopause and
     bow shock locations based on Winslow et al. (2013).
-    These are plotted in units of Mercury radii.
+    These are plotted in units of Mercury radii. The model
+    definitions are shared with hermpy.data.classify_regions.
 
 
     Parameters
@@ -43,17 +46,11 @@ def plot_magnetospheric_boundaries(
 
     # Plotting magnetopause
     phi = np.linspace(0, 2 * np.pi, 1000)
-    rho = sub_solar_magnetopause * (2 / (1 + np.cos(phi))) ** alpha
-
-    magnetopause_x_coords = rho * np.cos(phi)
-    magnetopause_y_coords = rho * np.sin(phi)
-
-    L = psi * p
-
-    rho = L / (1 + psi * np.cos(phi))
 
-    bowshock_x_coords = initial_x + rho * np.cos(phi)
-    bowshock_y_coords = rho * np.sin(phi)
+    magnetopause_x_coords, magnetopause_y_coords = magnetopause_curve(
+        phi, sub_solar_magnetopause, alpha
+    )
+    bowshock_x_coords, bowshock_y_coords = bow_shock_curve(phi, psi, p, initial_x)
 
     # Bow shock functional form creates non-physical points far sunward of Mercury.
     # These are incorrect and must be removed.
@@ -10,6 +10,9 @@ import xarray as xr
 from astropy import units as u
 from astropy.table import QTable
 
+from hermpy.utils import to_nanoseconds
+from hermpy.utils.tracing import span, traced
+
 
 class MultiPanel:
     def __init__(self, panels: list[Panel]):
@@ -26,6 +29,7 @@ class MultiPanel:
         else:
             raise NotImplementedError
 
+    @traced("MultiPanel.plot")
     def plot(self, sharex=True, show=True, figsize: tuple[int, int] | None = None):
         n = len(self._panels)
 
@@ -41,7 +45,8 @@ class MultiPanel:
             axes = [axes]
 
         for panel, ax in zip(self._panels, axes):
-            panel._plot_on(ax)
+            with span(lambda: f"{type(panel).__name__}.plot"):
+                panel._plot_on(ax)
 
         if show:
             plt.show()
@@ -123,12 +128,16 @@ class TimeseriesPanel(Panel):
         self._unit = base_unit
 
     def _plot_on(self, ax):
+        # Matplotlib plots datetime64 directly, which avoids creating a Python
+        # datetime per sample.
+        times = to_nanoseconds(self.table[self.time_column]).view("datetime64[ns]")
+
         for column_name in self.table.colnames:
             if column_name == self.time_column:
                 continue
 
             ax.plot(
-                self.table[self.time_column].to_datetime(leap_second_strict="warn"),
+                times,
                 self.table[column_name].value,
                 label=column_name,
             )
@@ -147,28 +156,54 @@ class SpectrogramPanel(Panel):
         self,
         data: xr.DataArray,
         time_dim: str = "UTC",
-        y_dim: str = "Energy Channel",
+        y_dim: str | None = None,
         y_bin_edges: list[float | int] | None = None,
         vmin=None,
         vmax=None,
         cmap="viridis",
         yscale="log",
     ):
+        # By default, the y dimension is the one which isn't time (e.g.
+        # "Energy Channel" for FIPS, or "Frequency" for dynamic_spectrum()),
+        # and its bin edges are taken from the "<y_dim> Edges" attribute of
+        # the data if present, or are the channel indices otherwise.
+        #
+        # Timestamps are taken as the right edges of each column, unless the
+        # time coordinate has the attribute "Position": "centre" (e.g. from
+        # dynamic_spectrum()), in which case edges are midway between them.
+        if y_dim is None:
+            y_dim = next(d for d in data.dims if d != time_dim)
+
         self.data = data
         self.time_dim = time_dim
         self.y_dim = y_dim
-        self.y_bin_edges = y_bin_edges or np.arange(0, len(data[y_dim]) + 1).tolist()
+        self.y_bin_edges = (
+            y_bin_edges
+            or data.attrs.get(f"{y_dim} Edges")
+            or np.arange(0, len(data[y_dim]) + 1).tolist()
+        )
         self.vmin = vmin
         self.vmax = vmax
         self.cmap = cmap
         self.yscale = yscale
 
     def _plot_on(self, ax):
-        mesh = ax.pcolormesh(
+        times = self.data[self.time_dim]
+
+        if times.attrs.get("Position") == "centre":
+            time_edges = _edges_from_centres(
+                to_nanoseconds(times.values).view("datetime64[ns]")
+            )
+            values = self.data
+        else:
             # Assuming timestamps are right edges, we drop the first data column.
-            self.data[self.time_dim],
+            time_edges = times
+            values = self.data[1:, ...]
+
+        mesh = ax.pcolormesh(
+            time_edges,
             self.y_bin_edges,
-            self.data[1:, ...].T,
+            values.T,
             vmin=self.vmin,
             vmax=self.vmax,
             cmap=self.cmap,
@@ -180,3 +215,22 @@ class SpectrogramPanel(Panel):
         self.cbar = plt.colorbar(mesh, cax=self.cbar_ax)
 
         ax.set_yscale(self.yscale)
+
+
+def _edges_from_centres(centres: np.ndarray) -> np.ndarray:
+    # Edges midway between datetime64[ns] bin centres, with the outer edges
+    # half a bin beyond the first and last centres.
+    nanoseconds = centres.view(np.int64)
+    if len(nanoseconds) < 2:
+        return np.repeat(centres, 2)
+
+    midpoints = nanoseconds[:-1] + np.diff(nanoseconds) // 2
+    edges = np.concatenate(
+        [
+            [nanoseconds[0] - (midpoints[0] - nanoseconds[0])],
+            midpoints,
+            [nanoseconds[-1] + (nanoseconds[-1] - midpoints[-1])],
+        ]
+    )
+
+    return edges.view("datetime64[ns]")
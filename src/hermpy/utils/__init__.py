@@ -1,2 +1,32 @@
-from .constants import Constants
-from .typing import DateLike, DateSequence
+from typing import TYPE_CHECKING
+
+from hermpy._lazy import attach
+
+# Imported on first access (PEP 562), see hermpy.data
+_LAZY_ATTRIBUTES = {
+    "compress_file": ".compression",
+    "detect_compression": ".compression",
+    "open_data_file": ".compression",
+    "Constants": ".constants",
+    "day_of_year_strings_to_nanoseconds": ".timestamps",
+    "day_of_year_to_nanoseconds": ".timestamps",
+    "from_nanoseconds": ".timestamps",
+    "nearest_indices": ".timestamps",
+    "to_nanoseconds": ".timestamps",
+    "DateLike": ".typing",
+    "DateSequence": ".typing",
+}
+
+__getattr__, __dir__, __all__ = attach(__name__, _LAZY_ATTRIBUTES)
+
+if TYPE_CHECKING:
+    from .compression import compress_file, detect_compression, open_data_file
+    from .constants import Constants
+    from .timestamps import (
+        day_of_year_strings_to_nanoseconds,
+        day_of_year_to_nanoseconds,
+        from_nanoseconds,
+        nearest_indices,
+        to_nanoseconds,
+    )
+    from .typing import DateLike, DateSequence
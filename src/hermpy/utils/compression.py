@@ -0,0 +1,145 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import IO
+
+# Leading bytes identifying each supported format. Files are detected by
+# their content, not their name, as files in the astropy download cache are
+# all named 'contents'.
+_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+    "bz2": b"BZh",
+}
+
+COMPRESSION_METHODS = ("gzip", "xz", "zstd")
+
+
+def detect_compression(path: Path | str) -> str | None:
+    """Return the compression format of a file, or None if uncompressed."""
+
+    with open(path, "rb") as file:
+        header = file.read(6)
+
+    for method, magic in _MAGIC.items():
+        if header.startswith(magic):
+            return method
+
+    return None
+
+
+def open_data_file(path: Path | str, mode: str = "rt") -> IO:
+    """
+    Open a (possibly compressed) data file, decompressing as a stream. The
+    format is detected from the file's content. mode is "rt" or "rb".
+    """
+
+    method = detect_compression(path)
+    binary_mode = mode.replace("t", "") or "rb"
+
+    match method:
+        case None:
+            return open(path, mode)
+        case "gzip":
+            stream = gzip.open(path, binary_mode)
+        case "xz":
+            stream = lzma.open(path, binary_mode)
+        case "bz2":
+            stream = bz2.open(path, binary_mode)
+        case "zstd":
+            stream = _zstd().open(path, binary_mode)
+        case _:
+            raise ValueError(f"Unsupported compression: {method}")
+
+    if "t" in mode:
+        return io.TextIOWrapper(stream, encoding="ascii")
+
+    return stream
+
+
+def read_data_file(path: Path | str) -> str:
+    """Read a (possibly compressed) ASCII data file to a string."""
+
+    with open_data_file(path, "rb") as file:
+        return file.read().decode("ascii")
+
+
+def compress_file(path: Path | str, method: str = "gzip", level: int | None = None) -> None:
+    """
+    Compress a file in place, keeping its name. The compressed data is written
+    to a temporary file beside the original, which then replaces it
+    atomically. Files which are already compressed are left alone.
+
+    zstd requires Python 3.14, or the zstandard package.
+    """
+
+    if method not in COMPRESSION_METHODS:
+        raise ValueError(
+            f"Unknown compression method: {method}. Expected one of {COMPRESSION_METHODS}"
+        )
+
+    path = Path(path)
+    if detect_compression(path) is not None:
+        return
+
+    match method:
+        case "gzip":
+            # Level 6 is much faster than the default 9, for a similar ratio on
+            # these tables.
+            opener = lambda f: gzip.GzipFile(fileobj=f, mode="wb", compresslevel=level or 6, mtime=0)
+        case "xz":
+            opener = lambda f: lzma.LZMAFile(f, "wb", preset=level)
+        case "zstd":
+            opener = lambda f: _zstd().open(f, "wb", **_zstd_level(level))
+
+    descriptor, temporary_path = tempfile.mkstemp(dir=path.parent, prefix=".compress-")
+    try:
+        with os.fdopen(descriptor, "wb") as raw, opener(raw) as compressed:
+            with open(path, "rb") as source:
+                shutil.copyfileobj(source, compressed, 1024**2)
+
+        # mkstemp creates files readable only by their owner
+        shutil.copymode(path, temporary_path)
+        os.replace(temporary_path, path)
+
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def _zstd():
+    # Python 3.14 includes zstd in the standard library. Otherwise, we fall
+    # back to the zstandard package, which provides the same open() interface.
+    try:
+        from compression import zstd
+
+        return zstd
+    except ImportError:
+        pass
+
+    try:
+        import zstandard
+
+        return zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd compression requires Python 3.14 or the zstandard package: "
+            "pip install zstandard"
+        ) from None
+
+
+def _zstd_level(level: int | None) -> dict:
+    if level is None:
+        return {}
+
+    # The keyword differs between the two implementations
+    if _zstd().__name__ == "zstandard":
+        return {"cctx": _zstd().ZstdCompressor(level=level)}
+
+    return {"level": level}
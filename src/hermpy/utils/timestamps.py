@@ -0,0 +1,186 @@
+import datetime as dt
+from functools import cache
+
+import erfa
+import numpy as np
+from astropy.time import Time
+
+# Julian date of 1970-01-01T00:00:00, the epoch of our nanosecond timestamps.
+_EPOCH_JD = 2_440_587.5
+_NS_PER_SECOND = 1_000_000_000
+_NS_PER_HALF_DAY = 43_200_000_000_000
+_NS_PER_DAY = 2 * _NS_PER_HALF_DAY
+
+
+def to_nanoseconds(times) -> np.ndarray:
+    """Convert times to int64 nanoseconds since 1970-01-01 UTC.
+
+    This is the representation used by hermpy's time indices. Like numpy's
+    datetime64[ns] (and unix time) every day is 86400 s long. Times within a
+    leap second (23:59:60.x) are mapped to the last nanosecond of 23:59:59,
+    so ordering is preserved.
+
+
+    Parameters
+    ----------
+    times : astropy.time.Time | numpy.datetime64 array | int array | datetime | str
+        Times to convert. Integer arrays are assumed to already be in
+        nanoseconds and are passed through.
+
+
+    Returns
+    -------
+    out : numpy.ndarray
+        An int64 array of at least one dimension.
+    """
+
+    if isinstance(times, Time):
+        # TAI has no leap seconds, so we count nanoseconds on the TAI
+        # calendar and remove the accumulated leap seconds afterwards. Working
+        # from the two-part julian date keeps nanosecond precision, which a
+        # single float64 of seconds since 1970 does not have.
+        tai = times.tai
+        tai_ns = _jd_to_nanoseconds(np.atleast_1d(tai.jd1), np.atleast_1d(tai.jd2))
+
+        leap_instants, tai_minus_utc = _leap_second_table()
+
+        k = np.searchsorted(leap_instants + tai_minus_utc, tai_ns, side="right") - 1
+        k = np.maximum(k, 0)
+
+        nanoseconds = tai_ns - tai_minus_utc[k]
+
+        # Clamp samples inside an inserted leap second to just before midnight.
+        next_instant = np.append(leap_instants, np.iinfo(np.int64).max)[k + 1]
+        return np.minimum(nanoseconds, next_instant - 1)
+
+    if isinstance(times, (str, dt.datetime, dt.date)):
+        times = np.datetime64(times, "ns")
+
+    array = np.atleast_1d(np.asarray(times))
+
+    if np.issubdtype(array.dtype, np.datetime64):
+        return array.astype("datetime64[ns]").view(np.int64)
+
+    if np.issubdtype(array.dtype, np.integer):
+        return array.astype(np.int64, copy=False)
+
+    if array.dtype.kind in "UO":
+        return to_nanoseconds(Time(array, scale="utc"))
+
+    raise TypeError(f"Cannot interpret times of dtype {array.dtype}")
+
+
+def from_nanoseconds(nanoseconds: np.ndarray) -> Time:
+    """Convert int64 nanoseconds since 1970-01-01 UTC to an astropy Time."""
+
+    nanoseconds = np.asarray(nanoseconds, dtype=np.int64)
+
+    leap_instants, tai_minus_utc = _leap_second_table()
+    k = np.maximum(np.searchsorted(leap_instants, nanoseconds, side="right") - 1, 0)
+
+    days, remainder = np.divmod(nanoseconds + tai_minus_utc[k], _NS_PER_DAY)
+
+    times = Time(
+        days + _EPOCH_JD,
+        remainder / _NS_PER_DAY,
+        format="jd",
+        scale="tai",
+    ).utc
+    times.format = "isot"
+
+    return times
+
+
+def day_of_year_to_nanoseconds(
+    year: np.ndarray,
+    day_of_year: np.ndarray,
+    hour: np.ndarray,
+    minute: np.ndarray,
+    second: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorised conversion of UTC time components (as found in PDS tables) to
+    int64 nanoseconds since 1970-01-01 UTC, without constructing strings or
+    astropy Time objects. Seconds may be fractional. As in to_nanoseconds(),
+    seconds within a leap second are clamped to the last nanosecond of the
+    day.
+    """
+
+    year = np.asarray(year, dtype=np.int64)
+
+    days = (year - 1970).astype("datetime64[Y]").astype("datetime64[D]").astype(
+        np.int64
+    ) + (np.asarray(day_of_year, dtype=np.int64) - 1)
+
+    time_of_day = (
+        np.asarray(hour, dtype=np.int64) * 3600 + np.asarray(minute, dtype=np.int64) * 60
+    ) * _NS_PER_SECOND + np.round(np.asarray(second) * _NS_PER_SECOND).astype(np.int64)
+
+    return days * _NS_PER_DAY + np.minimum(time_of_day, _NS_PER_DAY - 1)
+
+
+def day_of_year_strings_to_nanoseconds(strings: np.ndarray) -> np.ndarray:
+    """
+    Vectorised conversion of PDS day-of-year timestamps, e.g.
+    '2011-152T00:00:01.500', to int64 nanoseconds since 1970-01-01 UTC.
+    """
+
+    strings = np.asarray(strings, dtype=str)
+
+    def field(start: int, stop: int | None) -> np.ndarray:
+        return np.strings.slice(strings, start, stop)
+
+    return day_of_year_to_nanoseconds(
+        field(0, 4).astype(np.int64),
+        field(5, 8).astype(np.int64),
+        field(9, 11).astype(np.int64),
+        field(12, 14).astype(np.int64),
+        field(15, None).astype(float),
+    )
+
+
+def nearest_indices(sorted_times: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """For each value in times, find the index of the closest value in
+    sorted_times. Both inputs are int64 nanoseconds, sorted_times must be
+    sorted and non-empty. Ties resolve to the earlier index."""
+
+    if len(sorted_times) == 1:
+        return np.zeros(len(times), dtype=np.intp)
+
+    right = np.searchsorted(sorted_times, times, side="left")
+    right = np.clip(right, 1, len(sorted_times) - 1)
+    left = right - 1
+
+    # Differences are taken as int64, which is exact at nanosecond resolution.
+    closer_to_left = (times - sorted_times[left]) <= (sorted_times[right] - times)
+
+    return np.where(closer_to_left, left, right)
+
+
+def _jd_to_nanoseconds(jd1: np.ndarray, jd2: np.ndarray) -> np.ndarray:
+    # jd1 is (nearly always) a multiple of half a day, and so converts exactly.
+    half_days = np.round((jd1 - _EPOCH_JD) * 2).astype(np.int64)
+    remainder = (jd1 - _EPOCH_JD) - half_days / 2 + jd2
+
+    return half_days * _NS_PER_HALF_DAY + np.round(remainder * _NS_PER_DAY).astype(
+        np.int64
+    )
+
+
+@cache
+def _leap_second_table() -> tuple[np.ndarray, np.ndarray]:
+    # The UTC instants (as nanoseconds) at which TAI - UTC changes, and the
+    # value it takes from then on. Before 1972 the offset drifted
+    # continuously; we only use the integer leap seconds from then onward.
+    table = erfa.leap_seconds.get()
+    table = table[table["year"] >= 1972]
+
+    instants = [
+        (dt.date(year, month, 1) - dt.date(1970, 1, 1)).days * _NS_PER_DAY
+        for year, month in zip(table["year"], table["month"])
+    ]
+
+    return (
+        np.array(instants, dtype=np.int64),
+        np.round(table["tai_utc"]).astype(np.int64) * _NS_PER_SECOND,
+    )
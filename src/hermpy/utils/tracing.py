@@ -0,0 +1,274 @@
+"""
+Lightweight tracing of hermpy's hot paths: downloads, parsing, time
+conversion, SPICE calls, and plotting.
+
+Tracing is off by default, in which case span() returns a shared no-op
+object and costs a single flag check. To trace a block of code:
+
+    from hermpy.utils import tracing
+
+    with tracing.enabled():
+        data = parse_messenger_mag(paths, time_range)
+
+    print(tracing.summary())
+    tracing.export_chrome_trace("trace.json")
+
+The exported JSON can be opened in chrome://tracing or https://ui.perfetto.dev.
+
+Setting the environment variable HERMPY_TRACE to a file path enables tracing
+for the whole process, writing a Chrome trace to that path on exit.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class _State:
+    enabled = False
+    # Process start, so exported timestamps are small.
+    origin = time.perf_counter_ns()
+
+
+_events: list[tuple] = []
+_counters: dict[str, float] = defaultdict(float)
+
+
+class Span:
+    """
+    A timed region of code, with counters (e.g. rows, bytes) added through
+    add(). Created by span().
+    """
+
+    __slots__ = ("name", "counters", "_start")
+
+    def __init__(self, name: str, counters: dict):
+        self.name = name
+        self.counters = counters
+
+    def add(self, **counters: float | Callable[[], float]) -> None:
+        for key, value in _evaluated(counters).items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *_) -> None:
+        end = time.perf_counter_ns()
+        _events.append(
+            (self.name, self._start, end - self._start, threading.get_ident(), self.counters)
+        )
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def add(self, **counters: float | Callable[[], float]) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(
+    name: str | Callable[[], str], **counters: float | Callable[[], float]
+) -> Span | _NullSpan:
+    """
+    Time a block of code as a named span, with optional initial counters.
+
+        with span("parse_messenger_mag.read", files=1) as s:
+            ...
+            s.add(rows=len(table))
+
+    The name and counters may instead be functions of no arguments, which
+    are only called if tracing is enabled, for values which are costly to
+    find (e.g. file sizes):
+
+        with span("read", bytes=lambda: path.stat().st_size):
+            ...
+    """
+
+    if not _State.enabled:
+        return _NULL_SPAN
+
+    return Span(name() if callable(name) else name, _evaluated(counters))
+
+
+def _evaluated(counters: dict) -> dict:
+    return {key: value() if callable(value) else value for key, value in counters.items()}
+
+
+def traced(name: str | None = None):
+    """Decorator tracing every call to a function as a span."""
+
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _State.enabled:
+                return function(*args, **kwargs)
+
+            with Span(span_name, {}):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name: str, value: float = 1) -> None:
+    """Increment a global counter, e.g. cache hits."""
+
+    if _State.enabled:
+        _counters[name] += value
+
+
+def enable() -> None:
+    _State.enabled = True
+
+
+def disable() -> None:
+    _State.enabled = False
+
+
+def is_enabled() -> bool:
+    return _State.enabled
+
+
+def reset() -> None:
+    """Discard all recorded spans and counters."""
+
+    _events.clear()
+    _counters.clear()
+
+
+@contextmanager
+def enabled(clear: bool = True):
+    """Enable tracing within a block, by default discarding earlier records."""
+
+    if clear:
+        reset()
+
+    previous = _State.enabled
+    _State.enabled = True
+    try:
+        yield
+    finally:
+        _State.enabled = previous
+
+
+def counters() -> dict[str, float]:
+    """Global counters, with hit rates added for each '<name>.hits' and
+    '<name>.misses' pair."""
+
+    values = dict(_counters)
+
+    for key in list(values):
+        if key.endswith(".hits"):
+            prefix = key.removesuffix(".hits")
+            lookups = values[key] + values.get(f"{prefix}.misses", 0)
+            values[f"{prefix}.hit_rate"] = values[key] / lookups if lookups else 0.0
+
+    return values
+
+
+def summary():
+    """
+    An astropy QTable of recorded spans grouped by name, with call count,
+    total, mean and maximum duration, the summed counters of each span, and
+    rows per second where spans count rows. Sorted by total time.
+    """
+
+    from astropy import units as u
+    from astropy.table import QTable
+
+    grouped: dict[str, list] = defaultdict(list)
+    for event in list(_events):
+        grouped[event[0]].append(event)
+
+    counter_names = sorted({key for event in _events for key in event[4]})
+
+    rows = []
+    for name, events in grouped.items():
+        durations = [event[2] for event in events]
+        totals = {key: sum(event[4].get(key, 0) for event in events) for key in counter_names}
+        rows.append((name, len(events), sum(durations), max(durations), totals))
+
+    rows.sort(key=lambda row: row[2], reverse=True)
+
+    table = QTable(
+        {
+            "Span": [row[0] for row in rows],
+            "Calls": [row[1] for row in rows],
+            "Total": [row[2] / 1e9 for row in rows] * u.s,
+            "Mean": [row[2] / row[1] / 1e9 for row in rows] * u.s,
+            "Max": [row[3] / 1e9 for row in rows] * u.s,
+        }
+    )
+
+    for key in counter_names:
+        table[key] = [row[4][key] for row in rows]
+
+    if "rows" in counter_names:
+        table["Rows per second"] = [
+            row[4]["rows"] / (row[2] / 1e9) if row[2] else 0.0 for row in rows
+        ]
+
+    return table
+
+
+def export_chrome_trace(path: Path | str) -> Path:
+    """
+    Write recorded spans as Chrome trace event JSON. Span counters are
+    included as event arguments, and global counters as counter events.
+    """
+
+    process_id = os.getpid()
+    trace_events = [
+        {
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (start - _State.origin) / 1000,
+            "dur": duration / 1000,
+            "pid": process_id,
+            "tid": thread_id,
+            "args": span_counters,
+        }
+        for name, start, duration, thread_id, span_counters in list(_events)
+    ]
+
+    end = max(
+        (event["ts"] + event["dur"] for event in trace_events),
+        default=0,
+    )
+    trace_events.extend(
+        {"name": name, "ph": "C", "ts": end, "pid": process_id, "args": {"value": value}}
+        for name, value in counters().items()
+    )
+
+    path = Path(path)
+    path.write_text(json.dumps({"traceEvents": trace_events, "displayTimeUnit": "ms"}))
+
+    return path
+
+
+# Process-wide tracing, configured by environment variable
+if os.environ.get("HERMPY_TRACE"):
+    enable()
+    atexit.register(export_chrome_trace, os.environ["HERMPY_TRACE"])
@@ -0,0 +1,86 @@
+"""
+Synthetic SPICE kernels, shared by the tests and the benchmarks so that both
+run offline. Not part of the hermpy package.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+MONTHS = ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+
+
+def write_spice_kernels(directory: Path | str, name: str = "synthetic") -> list[Path]:
+    """
+    A leap seconds kernel, and an SPK of Mercury's (Keplerian) orbit about the
+    Sun for 2011 to 2015, enough for get_aberration_angle(). Kernels are
+    written to directory as <name>.tls and <name>.bsp, unless they already
+    exist. Returns their paths.
+    """
+
+    import erfa
+    import spiceypy as spice
+
+    directory = Path(directory)
+    lsk_path = directory / f"{name}.tls"
+    spk_path = directory / f"{name}.bsp"
+
+    if not lsk_path.exists():
+        table = erfa.leap_seconds.get()
+        table = table[table["year"] >= 1972]
+        entries = ",\n    ".join(
+            f"{int(round(offset))}, @{year}-{MONTHS[month - 1]}-1"
+            for year, month, offset in zip(table["year"], table["month"], table["tai_utc"])
+        )
+
+        lsk_path.write_text(
+            "KPL/LSK\n\n\\begindata\n\n"
+            "DELTET/DELTA_T_A = 32.184\n"
+            "DELTET/K = 1.657D-3\n"
+            "DELTET/EB = 1.671D-2\n"
+            "DELTET/M = ( 6.239996D0 1.99096871D-7 )\n"
+            f"DELTET/DELTA_AT = ( {entries} )\n\n"
+            "\\begintext\n"
+        )
+
+    if not spk_path.exists():
+        spice.furnsh(str(lsk_path))
+
+        start = spice.str2et("2011-01-01")
+        end = spice.str2et("2016-01-01")
+        ets = np.arange(start, end, 3600.0)
+
+        # Mercury's orbit as a Keplerian ellipse in the J2000 XY plane.
+        semi_major_axis = 57.909e6
+        eccentricity = 0.2056
+        mean_motion = 2 * np.pi / (87.969 * 86_400)
+
+        mean_anomaly = mean_motion * (ets - start)
+        eccentric_anomaly = mean_anomaly.copy()
+        for _ in range(20):
+            eccentric_anomaly = mean_anomaly + eccentricity * np.sin(eccentric_anomaly)
+
+        minor = np.sqrt(1 - eccentricity**2)
+        rate = mean_motion / (1 - eccentricity * np.cos(eccentric_anomaly))
+        zeros = np.zeros_like(ets)
+
+        states = np.column_stack(
+            [
+                semi_major_axis * (np.cos(eccentric_anomaly) - eccentricity),
+                semi_major_axis * minor * np.sin(eccentric_anomaly),
+                zeros,
+                -semi_major_axis * np.sin(eccentric_anomaly) * rate,
+                semi_major_axis * minor * np.cos(eccentric_anomaly) * rate,
+                zeros,
+            ]
+        )
+
+        handle = spice.spkopn(str(spk_path), "hermpy synthetic", 0)
+        # Mercury (199) relative to the Sun (10), as Lagrange interpolated
+        # states (type 9).
+        spice.spkw09(
+            handle, 199, 10, "J2000", ets[0], ets[-1], "synthetic", 7, len(ets), states, ets
+        )
+        spice.spkcls(handle)
+
+    return [lsk_path, spk_path]
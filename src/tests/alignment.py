@@ -0,0 +1,89 @@
+import unittest
+from unittest import TestCase
+
+import numpy as np
+import xarray as xr
+from astropy import units as u
+
+from hermpy.data import ArrayTimeseries, asof_join, scan_statistics
+
+_S = 1_000_000_000
+
+
+class TestAlignment(TestCase):
+
+    def setUp(self):
+        # Scans at 0, 10 and 70 s (a change of mode), and MAG at 1 Hz for 100 s.
+        self.fips = xr.Dataset(
+            data_vars={
+                "Proton Flux": (("UTC", "Energy Channel"), np.arange(6.0).reshape(3, 2)),
+                "Mode": ("UTC", np.array([2, 0, 0])),
+            },
+            coords={
+                "UTC": np.array([0, 10, 70]) * _S,
+                "Energy Channel": [0, 1],
+            },
+        )
+        self.fips["UTC"] = self.fips["UTC"].values.astype("datetime64[ns]")
+
+        times = np.arange(100) * _S
+        self.mag = ArrayTimeseries(times, {"Bx": np.arange(100.0)}, {"Bx": u.nT})
+
+    def test_scan_statistics(self):
+        statistics = scan_statistics(self.fips, self.mag, columns=["Bx"])
+
+        # Windows are [0, 10), [10, 70), and [70, 130)
+        np.testing.assert_array_equal(statistics["Count"].sel(Channel="Bx"), [10, 60, 30])
+        np.testing.assert_allclose(statistics["Mean"].sel(Channel="Bx"), [4.5, 39.5, 84.5])
+        np.testing.assert_allclose(
+            statistics["SD"].sel(Channel="Bx"),
+            [np.std(np.arange(n), ddof=1) for n in (10, 60, 30)],
+        )
+        self.assertEqual(statistics.attrs["Channel Units"], ["nT"])
+
+        # Chunks (e.g. days) split windows, in any order, combine exactly.
+        chunks = [self.mag[50:], self.mag[:25], self.mag[25:50]]
+        streamed = scan_statistics(self.fips, iter(chunks), columns=["Bx"])
+        xr.testing.assert_allclose(streamed, statistics)
+
+        limited = scan_statistics(self.fips, self.mag, columns=["Bx"], max_window=20 * u.s)
+        np.testing.assert_array_equal(limited["Count"].sel(Channel="Bx"), [10, 20, 20])
+
+    def test_single_scan(self):
+        single = self.fips.isel(UTC=[1])
+
+        statistics = scan_statistics(
+            single, self.mag, columns=["Bx"], max_window=20 * u.s
+        )
+        np.testing.assert_array_equal(statistics["Count"].sel(Channel="Bx"), [20])
+
+        with self.assertRaises(ValueError):
+            scan_statistics(single, self.mag, columns=["Bx"])
+
+    def test_asof_join(self):
+        joined = asof_join(self.fips, self.mag[[5, 10, 69, 99]])
+
+        np.testing.assert_array_equal(joined["Mode"], [2, 0, 0, 0])
+        np.testing.assert_array_equal(joined["Proton Flux"][:, 1], [1, 3, 3, 5])
+
+        nearest = asof_join(
+            self.fips, self.mag[[5, 69]], ["Mode"], direction="nearest", tolerance=3 * u.s
+        )
+        self.assertTrue(np.isnan(nearest["Mode"][0]))
+        self.assertEqual(nearest["Mode"][1], 0)
+        self.assertTrue(np.isnat(nearest["Scan UTC"][0]))
+
+        with self.assertRaises(ValueError):
+            asof_join(self.fips, self.mag, direction="sideways")
+
+    def test_asof_join_without_scans(self):
+        joined = asof_join(self.fips.isel(UTC=[]), self.mag[[5, 10]])
+
+        self.assertEqual(joined["Proton Flux"].shape, (2, 2))
+        self.assertTrue(np.all(np.isnan(joined["Proton Flux"])))
+        self.assertTrue(np.all(np.isnan(joined["Mode"])))
+        self.assertTrue(np.all(np.isnat(joined["Scan UTC"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
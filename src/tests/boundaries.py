@@ -0,0 +1,70 @@
+import unittest
+from unittest import TestCase
+
+import numpy as np
+from astropy import units as u
+
+from hermpy.data import Region, classify_regions
+from hermpy.data.boundaries import bow_shock_curve, magnetopause_curve
+from hermpy.utils import Constants
+
+
+class TestRegionClassification(TestCase):
+
+    def test_subsolar_line(self):
+        x = np.array([1.0, 1.6, 2.5])
+        regions, magnetopause_distance, bow_shock_distance = classify_regions(
+            x, np.zeros(3), np.zeros(3)
+        )
+
+        np.testing.assert_array_equal(
+            regions, [Region.MAGNETOSPHERE, Region.MAGNETOSHEATH, Region.SOLAR_WIND]
+        )
+        np.testing.assert_allclose(magnetopause_distance, x - 1.45)
+        np.testing.assert_allclose(bow_shock_distance, x - (0.5 + 1.04 * 2.75 / 2.04))
+
+    def test_points_on_boundaries(self):
+        # Points on the model curves should be at zero distance from them
+        phi = np.linspace(-2, 2, 50)
+
+        x, rho = magnetopause_curve(phi)
+        _, distance, _ = classify_regions(x, rho, np.zeros_like(x))
+        np.testing.assert_allclose(distance, 0, atol=1e-12)
+
+        x, rho = bow_shock_curve(phi)
+        _, _, distance = classify_regions(x, np.zeros_like(x), rho)
+        np.testing.assert_allclose(distance, 0, atol=1e-12)
+
+    def test_mso_quantities(self):
+        offset = Constants.DIPOLE_OFFSET
+        regions, _, _ = classify_regions(
+            [0] * u.km, [0] * u.km, offset + 1.4 * Constants.MERCURY_RADIUS, frame="MSO"
+        )
+        self.assertEqual(regions[0], Region.MAGNETOSPHERE)
+
+    def test_scalars(self):
+        regions, magnetopause_distance, bow_shock_distance = classify_regions(
+            1.6 * Constants.MERCURY_RADIUS, 0, 0
+        )
+
+        self.assertEqual(np.shape(regions), ())
+        self.assertEqual(regions, Region.MAGNETOSHEATH)
+        self.assertAlmostEqual(float(magnetopause_distance), 1.6 - 1.45)
+        self.assertLess(bow_shock_distance, 0)
+
+    def test_mixed_scalars_and_arrays(self):
+        x = np.array([1.0, 1.6, 2.5])
+        expected = classify_regions(x, np.zeros(3), np.zeros(3))
+
+        # A scalar in each position, alongside arrays
+        for arguments in ((x, 0, np.zeros(3)), (x, np.zeros(3), 0), (x, 0, 0)):
+            for result, expected_result in zip(classify_regions(*arguments), expected):
+                np.testing.assert_array_equal(result, expected_result)
+
+        regions, _, _ = classify_regions(1.0, np.zeros(3), np.zeros(3))
+        np.testing.assert_array_equal(regions, Region.MAGNETOSPHERE)
+        self.assertEqual(regions.shape, (3,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+from sunpy.time import TimeRange
+
+from hermpy.data import ParsedFileCache, parse_cache, parse_messenger_mag
+from tests.timeseries import write_mag_file
+
+
+class TestParsedFileCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(3):
+            path = Path(self.directory.name) / f"{i}.dat"
+            path.write_text(str(i))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_eviction_by_bytes(self):
+        # Each parsed 'file' takes 800 bytes, so only two fit.
+        cache = ParsedFileCache(max_bytes=1600)
+        read = lambda path: np.full(100, float(path.read_text()))
+
+        for path in self.paths:
+            cache.get(path, read)
+
+        statistics = cache.statistics
+        self.assertEqual((statistics.entries, statistics.nbytes), (2, 1600))
+        self.assertEqual(statistics.evictions, 1)
+
+        # The most recent two are retained
+        cache.get(self.paths[2], read)
+        cache.get(self.paths[0], read)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+    def test_sliding_windows(self):
+        paths = [Path(self.directory.name) / f"MAG{d}.TAB" for d in (152, 153)]
+        for path, day in zip(paths, (152, 153)):
+            write_mag_file(path, day)
+
+        parse_cache.clear()
+        for start in ("2011-06-01T00:00:30", "2011-06-01T00:01:00", "2011-06-01T00:01:30"):
+            parse_messenger_mag(paths, TimeRange(start, "2011-06-02T00:00:30"))
+
+        self.assertEqual(parse_cache.statistics.misses, 2)
+        self.assertEqual(parse_cache.statistics.hits, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import datetime as dt
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+from sunpy.time import TimeRange
+
+from hermpy.net import IngestionCatalog
+from hermpy.net.catalog import parse_file_name
+
+BASE_URL = "https://pds/mess-mag-calibrated/data/mso/2011/152_181_JUN/"
+
+
+class LocalClient:
+    """Stands in for ClientMESSENGER, serving files from a directory."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.files: dict[str, bytes] = {}
+        self.downloads: list[str] = []
+
+    def query(self, time_range, instrument, buffer=True):
+        return list(self.files)
+
+    def download(self, urls, check_for_updates=False):
+        self.downloads.extend(urls)
+
+        paths = []
+        for url in urls:
+            path = self.directory / url.rsplit("/", 1)[-1]
+            path.write_bytes(self.files[url])
+            paths.append(path)
+
+        return paths
+
+
+class TestIngestionCatalog(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        directory = Path(self.directory.name)
+
+        self.client = LocalClient(directory)
+        self.client.files = {
+            f"{BASE_URL}MAGMSOSCI11152_V08.TAB": b"a",
+            f"{BASE_URL}MAGMSOSCI11153_V08.TAB": b"b",
+        }
+
+        self.catalog = IngestionCatalog(directory / "catalog.sqlite")
+        self.time_range = TimeRange("2011-06-01", "2011-06-03")
+
+    def tearDown(self):
+        self.catalog.close()
+        self.directory.cleanup()
+
+    def test_parse_file_name(self):
+        self.assertEqual(
+            parse_file_name(f"{BASE_URL}MAGMSOSCIAVG11152_01_V08.TAB"),
+            (dt.date(2011, 6, 1), 8),
+        )
+        self.assertEqual(
+            parse_file_name(
+                "https://pds/mess-epps-fips-calibrated/data/scan/2011/152_181_JUN/FIPS_R2011153CDR_V3.TAB"
+            ),
+            (dt.date(2011, 6, 2), 3),
+        )
+
+    def test_sync(self):
+        processed = []
+
+        def process(instrument, day, path):
+            processed.append(day)
+            return {"copy": path}
+
+        results = self.catalog.sync(self.client, self.time_range, ["MAG"], process)
+        self.assertEqual([r.status for r in results], ["new", "new"])
+
+        # Nothing has changed, so nothing is downloaded
+        self.client.downloads.clear()
+        results = self.catalog.sync(self.client, self.time_range, ["MAG"], process)
+        self.assertEqual([r.status for r in results], ["unchanged", "unchanged"])
+        self.assertEqual(self.client.downloads, [])
+
+        # The second day is republished, only it is downloaded and reprocessed
+        self.client.files[f"{BASE_URL}MAGMSOSCI11153_V09.TAB"] = b"c"
+        results = self.catalog.sync(self.client, self.time_range, ["MAG"], process)
+
+        self.assertEqual([r.status for r in results], ["unchanged", "superseded"])
+        self.assertEqual(self.client.downloads, [f"{BASE_URL}MAGMSOSCI11153_V09.TAB"])
+        self.assertEqual(processed, [dt.date(2011, 6, 1), dt.date(2011, 6, 2), dt.date(2011, 6, 2)])
+        self.assertEqual(self.catalog.get("MAG", dt.date(2011, 6, 2))["version"], 9)
+        self.assertIn("copy", self.catalog.artefacts("MAG", dt.date(2011, 6, 2)))
+
+    def test_failed_processing(self):
+        processed = []
+
+        def process(instrument, day, path):
+            if len(processed) == 0:
+                processed.append(None)
+                raise RuntimeError("Processing failed")
+
+            processed.append(day)
+            return {"copy": path}
+
+        with self.assertRaises(RuntimeError):
+            self.catalog.sync(self.client, self.time_range, ["MAG"], process)
+
+        self.assertIsNone(self.catalog.get("MAG", dt.date(2011, 6, 1)))
+
+        # The failed day is processed again, rather than seen as unchanged
+        results = self.catalog.sync(self.client, self.time_range, ["MAG"], process)
+        self.assertEqual([r.status for r in results], ["new", "new"])
+        self.assertEqual(processed[1:], [dt.date(2011, 6, 1), dt.date(2011, 6, 2)])
+        self.assertIn("copy", self.catalog.artefacts("MAG", dt.date(2011, 6, 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
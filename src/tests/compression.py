@@ -0,0 +1,57 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+from sunpy.time import TimeRange
+
+from hermpy.data import parse_messenger_mag
+from hermpy.utils.compression import compress_file, detect_compression
+from tests.timeseries import write_mag_file
+
+
+class TestCompression(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "MAG152.TAB"
+        write_mag_file(self.path, 152, n_rows=2000)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_parse_compressed(self):
+        time_range = TimeRange("2011-06-01", "2011-06-02")
+        expected = parse_messenger_mag([self.path], time_range, use_cache=False)
+
+        for method in ("gzip", "xz"):
+            path = Path(self.directory.name) / f"{method}.TAB"
+            shutil.copy(self.path, path)
+
+            compress_file(path, method)
+            self.assertEqual(detect_compression(path), method)
+            self.assertLess(path.stat().st_size, self.path.stat().st_size / 3)
+
+            # Compressing twice is a no-op
+            size = path.stat().st_size
+            compress_file(path, method)
+            self.assertEqual(path.stat().st_size, size)
+
+            parsed = parse_messenger_mag([path], time_range, use_cache=False)
+            np.testing.assert_array_equal(parsed["Bx"], expected["Bx"])
+
+    def test_permissions(self):
+        self.path.chmod(0o644)
+        compress_file(self.path)
+
+        self.assertEqual(self.path.stat().st_mode & 0o777, 0o644)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            compress_file(self.path, "rar")
+
+
+if __name__ == "__main__":
+    unittest.main()
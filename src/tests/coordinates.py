@@ -0,0 +1,80 @@
+import unittest
+from unittest import TestCase
+
+import numpy as np
+from astropy import units as u
+from astropy.table import QTable
+from astropy.time import Time
+
+from hermpy.data import add_coordinate_frames
+from hermpy.data.coordinates import derived_quantities, transform
+from hermpy.utils import Constants
+
+
+class TestTransform(TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x, self.y, self.z = rng.normal(0, 5000, (3, 100))
+        self.angle = rng.uniform(0.1, 0.2, 100)
+
+    def test_round_trip(self):
+        transformed = transform(self.x, self.y, self.z, "MSO", "MSM'", self.angle)
+        recovered = transform(*transformed, "MSM'", "MSO", self.angle)
+
+        np.testing.assert_allclose(recovered, (self.x, self.y, self.z), atol=1e-9)
+
+    def test_matches_rotation_matrix(self):
+        x, y, z = transform(self.x, self.y, self.z, "MSM", "MSO'", self.angle)
+
+        c, s = np.cos(self.angle), np.sin(self.angle)
+        np.testing.assert_allclose(x, c * self.x - s * self.y)
+        np.testing.assert_allclose(y, s * self.x + c * self.y)
+        np.testing.assert_allclose(z, self.z + Constants.DIPOLE_OFFSET.to_value(u.km))
+
+    def test_in_place(self):
+        expected = transform(self.x, self.y, self.z, "MSO'", "MSM", self.angle)
+
+        out = (self.x.copy(), self.y.copy(), self.z.copy())
+        transform(*out, "MSO'", "MSM", self.angle, out=out)
+
+        np.testing.assert_allclose(out, expected)
+
+    def test_derived_quantities(self):
+        r, local_time, latitude = derived_quantities(
+            np.array([1.0, 0, -1]), np.array([0.0, -1, 0]), np.array([0.0, 0, 1])
+        )
+
+        np.testing.assert_allclose(r, [1, 1, np.sqrt(2)])
+        np.testing.assert_allclose(local_time, [12, 6, 0])
+        np.testing.assert_allclose(latitude, [0, 0, 45])
+
+
+class TestCoordinateFrames(TestCase):
+
+    def test_add_coordinate_frames(self):
+        table = QTable(
+            {
+                "UTC": Time(["2011-06-01T00:00", "2011-06-01T00:01"]),
+                "X MSO": [1000, 2000] * u.km,
+                "Y MSO": [0, 0] * u.km,
+                "Z MSO": [479, 479] * u.km,
+                "Bx": [1, 2] * u.nT,
+                "By": [0, 0] * u.nT,
+                "Bz": [3, 4] * u.nT,
+                "Aberration Angle": [0, 0] * u.rad,
+            }
+        )
+
+        add_coordinate_frames(table)
+
+        for column in ("X MSM", "Z MSM'", "Bx'", "Magnetic Local Time"):
+            self.assertIn(column, table.colnames)
+
+        np.testing.assert_allclose(table["Z MSM"].to_value(u.km), [0, 0])
+        np.testing.assert_allclose(table["Radial Distance"].to_value(u.km), [1000, 2000])
+        np.testing.assert_allclose(table["Magnetic Latitude"].to_value(u.deg), [0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
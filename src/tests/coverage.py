@@ -0,0 +1,100 @@
+import datetime as dt
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+from sunpy.time import TimeRange
+
+from hermpy.data import CoverageIndex
+from hermpy.data.coverage import contiguous_intervals, scan_intervals, scan_times
+from hermpy.net import ClientMESSENGER
+from hermpy.net.client_messenger import _may_have_data
+from tests.timeseries import write_mag_file
+
+S = 1_000_000_000
+
+
+class TestCoverage(TestCase):
+
+    def test_contiguous_intervals(self):
+        # 1 s data, a gap, then a switch to 10 Hz with no gap
+        times = np.concatenate(
+            [np.arange(100) * S, 200 * S + np.arange(100) * S, 300 * S + np.arange(50) * S // 10]
+        )
+        times[5] += 1000  # jitter
+
+        start, end, cadence = contiguous_intervals(times)
+
+        np.testing.assert_array_equal(start, [0, 200 * S, 300 * S])
+        np.testing.assert_array_equal(end, [100 * S, 300 * S, 305 * S])
+        np.testing.assert_array_equal(cadence, [S, S, S // 10])
+
+    def test_scan_intervals(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        # A uniform file, and one with a gap in the middle of its rows, both
+        # named as in the astropy download cache
+        paths = [Path(directory.name) / name / "contents" for name in ("a", "b")]
+        for path in paths:
+            path.parent.mkdir()
+        write_mag_file(paths[0], 152, n_rows=1000)
+        write_mag_file(paths[1], 153, n_rows=1000)
+        lines = paths[1].read_text().splitlines()
+        paths[1].write_text("\n".join(lines[:480] + lines[520:]) + "\n")
+
+        for path in paths:
+            expected = contiguous_intervals(scan_times(path, "MAG"))
+            for result, expected_result in zip(scan_intervals(path, "MAG"), expected):
+                np.testing.assert_array_equal(result, expected_result)
+
+        self.assertEqual(len(scan_intervals(paths[1], "MAG")[0]), 2)
+
+        index = CoverageIndex("MAG")
+        index.update(paths)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(len(index.files), 2)
+
+    def test_index(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        paths = [Path(directory.name) / f"MAG{d}.TAB" for d in (152, 153)]
+        for path, day in zip(paths, (152, 153)):
+            write_mag_file(path, day)
+
+        index = CoverageIndex("MAG")
+        index.update(paths)
+        self.assertEqual(len(index), 2)
+
+        # Rescanning does nothing
+        index.update(paths)
+        self.assertEqual(len(index), 2)
+
+        self.assertTrue(index.has_data(TimeRange("2011-06-01T00:00:50", "2011-06-01T00:01:00")))
+        self.assertFalse(index.has_data(TimeRange("2011-06-01T01:00", "2011-06-01T02:00")))
+
+        gaps = index.gaps(TimeRange("2011-06-01", "2011-06-03"))
+        self.assertEqual(len(gaps), 2)
+        self.assertEqual(gaps[0].start.isot, "2011-06-01T00:01:40.000")
+
+        loaded = CoverageIndex.load("MAG", index.save(Path(directory.name) / "index.npz"))
+        np.testing.assert_array_equal(loaded.end, index.end)
+        self.assertTrue(loaded.is_scanned(dt.date(2011, 6, 2)))
+
+        # The client skips the first day, which has no data in the range.
+        client = ClientMESSENGER(coverage={"MAG": loaded})
+        self.assertIs(client.coverage["MAG"], loaded)
+
+        url = "https://pds/mess-mag-calibrated/data/mso/2011/152_181_JUN/MAGMSOSCI11{}_V08.TAB"
+        time_range = TimeRange("2011-06-01T12:00", "2011-06-02T12:00")
+
+        self.assertFalse(_may_have_data(loaded, url.format(152), time_range))
+        self.assertTrue(_may_have_data(loaded, url.format(153), time_range))
+        self.assertTrue(_may_have_data(loaded, url.format(154), time_range))
+
+
+if __name__ == "__main__":
+    unittest.main()
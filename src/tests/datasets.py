@@ -0,0 +1,147 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+from astropy import units as u
+from astropy.table import QTable
+from astropy.time import Time
+from sunpy.time import TimeRange
+
+from hermpy.data import (
+    InstantEventList,
+    WindowDataset,
+    build_window_dataset,
+    parse_messenger_mag,
+    superposed_epoch,
+)
+
+
+def write_mag_file(path: Path, day_of_year: int, seconds: np.ndarray) -> None:
+    """Write a synthetic MESSENGER MAG file, with samples at the given seconds of day."""
+
+    rows = []
+    for second in seconds:
+        hour, remainder = divmod(int(second), 3600)
+        minute, whole_seconds = divmod(remainder, 60)
+        rows.append(
+            f"2011 {day_of_year:3d} {hour:02d} {minute:02d} {whole_seconds:06.3f} "
+            f"{day_of_year + second / 86400:12.6f} "
+            f"{1.0:10.3f} {2.0:10.3f} {3.0:10.3f} "
+            f"{second % 1000:9.3f} {np.sin(second / 30):9.3f} {1.5:9.3f}"
+        )
+
+    path.write_text("\n".join(rows) + "\n")
+
+
+class TestWindowDataset(TestCase):
+
+    def setUp(self):
+        # Ten minutes either side of midnight, at 1 Hz
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+        self.paths = [self.root / "MAG152.TAB", self.root / "MAG153.TAB"]
+        write_mag_file(self.paths[0], 152, np.arange(86_400 - 600, 86_400))
+        write_mag_file(self.paths[1], 153, np.arange(600))
+
+        # The second crossing's window spans midnight
+        self.crossings = InstantEventList(
+            QTable(
+                {
+                    "UTC": Time("2011-06-02") + [-300, -10, 300] * u.s,
+                    "Type": ["BS_IN", "MP_IN", "MP_OUT"],
+                }
+            ),
+            time_column="UTC",
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build(self, name: str, **kwargs) -> WindowDataset:
+        kwargs.setdefault("workers", 1)
+        return build_window_dataset(
+            self.crossings,
+            self.paths,
+            self.root / name,
+            window=30 * u.s,
+            resolution=1.5 * u.s,
+            columns=["Bx", "By", "|B|"],
+            **kwargs,
+        )
+
+    def test_windows(self):
+        dataset = self.build("dataset")
+
+        expected = superposed_epoch(
+            self.crossings,
+            parse_messenger_mag(self.paths, TimeRange("2011-06-01", "2011-06-03")),
+            ["Bx", "By"],
+            window=30 * u.s,
+            resolution=1.5 * u.s,
+        )
+
+        self.assertEqual(dataset.mag.shape, (3, 41, 3))
+        self.assertEqual(dataset.mag.dtype, np.float32)
+        self.assertEqual(dataset.units, ["nT", "nT", "nT"])
+        np.testing.assert_allclose(dataset.mag[..., :2], expected.values, atol=1e-3)
+        np.testing.assert_array_equal(dataset.index.table["Coverage"], 1)
+
+        loaded = WindowDataset.load(self.root / "dataset")
+        self.assertEqual(list(loaded.index.table["Label"]), ["BS_IN", "MP_IN", "MP_OUT"])
+        np.testing.assert_array_equal(loaded.mag, dataset.mag)
+
+    def test_negatives(self):
+        dataset = self.build("first", negatives=20, seed=1)
+        again = self.build("second", negatives=20, seed=1, workers=2)
+
+        index = dataset.index.table
+        self.assertEqual(len(dataset), 23)
+        self.assertEqual(np.sum(index["Label"] == "Negative"), 20)
+        np.testing.assert_array_equal(
+            index["Crossing Index"][index["Label"] != "Negative"], [0, 1, 2]
+        )
+
+        # Negatives are kept at least a window from every crossing
+        negatives = dataset.index.time_index[index["Label"] == "Negative"]
+        distance = np.abs(negatives[:, None] - self.crossings.time_index[None, :])
+        self.assertTrue(np.all(distance > 30e9))
+
+        # The same seed gives the same dataset, however many workers
+        np.testing.assert_array_equal(dataset.index.time_index, again.index.time_index)
+        np.testing.assert_array_equal(dataset.mag, again.mag)
+
+    def test_resume(self):
+        complete = self.build("dataset")
+        expected = np.array(complete.mag)
+
+        # As if interrupted after the first file
+        with open(self.root / "dataset" / "dataset.json") as file:
+            description = json.load(file)
+        del description["files"][max(description["files"])]
+        description["complete"] = False
+        with open(self.root / "dataset" / "dataset.json", "w") as file:
+            json.dump(description, file)
+
+        # Removing what the second file wrote: the lags after midnight
+        mag = np.load(self.root / "dataset" / "mag.npy", mmap_mode="r+")
+        mag[1, complete.mag_lags > 10] = np.nan
+        mag[2] = np.nan
+        mag.flush()
+
+        with self.assertRaises(ValueError):
+            WindowDataset.load(self.root / "dataset")
+
+        resumed = self.build("dataset")
+        np.testing.assert_array_equal(resumed.mag, expected)
+
+        # A directory isn't resumed with different settings
+        with self.assertRaises(ValueError):
+            self.build("dataset", seed=2, negatives=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
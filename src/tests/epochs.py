@@ -0,0 +1,46 @@
+import unittest
+from unittest import TestCase
+
+import numpy as np
+from astropy import units as u
+from astropy.table import QTable
+from astropy.time import Time
+
+from hermpy.data import InstantEventList, superposed_epoch
+
+
+class TestSuperposedEpoch(TestCase):
+
+    def test_chunked_windows(self):
+        # One sample per second for an hour, with a ten second gap
+        seconds = np.delete(np.arange(3600), np.arange(1800, 1810))
+        data = QTable(
+            {
+                "UTC": Time("2011-06-01") + seconds * u.s,
+                "Bx": seconds * u.nT,
+            }
+        )
+        events = InstantEventList(
+            QTable({"UTC": Time("2011-06-01") + [60, 1805, 3590] * u.s}),
+            time_column="UTC",
+        )
+
+        windows = superposed_epoch(
+            events,
+            (data[:1000], data[1000:]),
+            ["Bx"],
+            window=20 * u.s,
+            resolution=0.5 * u.s,
+        )
+
+        self.assertEqual(windows.shape, (3, 81, 1))
+        np.testing.assert_allclose(windows[0, :, 0], 60 + windows["Lag"])
+
+        # Lags within the gap, or after the end of the data, are missing
+        self.assertTrue(np.isnan(windows[1].sel(Lag=0)).all())
+        self.assertTrue(np.isnan(windows[2].sel(Lag=10)).all())
+        self.assertEqual(float(windows[2].sel(Lag=9, Channel="Bx")), 3599)
+
+
+if __name__ == "__main__":
+    unittest.main()
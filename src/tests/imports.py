@@ -0,0 +1,66 @@
+import json
+import subprocess
+import sys
+import unittest
+from unittest import TestCase
+
+# Packages which should only be imported once they are needed
+HEAVY_MODULES = [
+    "astropy.table",
+    "astropy.time",
+    "astropy.units",
+    "matplotlib",
+    "pandas",
+    "spiceypy",
+    "sunpy",
+    "xarray",
+]
+
+# Generous, as this runs in a fresh interpreter on any machine. Eager imports
+# take over a second.
+MAX_IMPORT_SECONDS = 0.5
+
+
+def _import_in_subprocess(statement: str) -> dict:
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "duration = time.perf_counter() - start\n"
+        f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'duration': duration, 'loaded': loaded}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class TestLazyImports(TestCase):
+
+    def test_import_hermpy(self):
+        result = _import_in_subprocess(
+            "import hermpy, hermpy.data, hermpy.net, hermpy.plotting, hermpy.utils"
+        )
+
+        self.assertEqual(result["loaded"], [])
+        self.assertLess(result["duration"], MAX_IMPORT_SECONDS)
+
+    def test_attribute_access_imports_submodule(self):
+        result = _import_in_subprocess("from hermpy.data import CrossingList")
+
+        self.assertIn("astropy.table", result["loaded"])
+        self.assertNotIn("matplotlib", result["loaded"])
+
+    def test_star_import(self):
+        import hermpy.plotting
+
+        namespace: dict = {}
+        exec("from hermpy.plotting import *", namespace)
+
+        for name in hermpy.plotting.__all__:
+            self.assertIn(name, namespace)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import tempfile
+import unittest
+import warnings
+from unittest import TestCase
+
+import numpy as np
+from astropy import units as u
+from astropy.table import QTable
+from astropy.time import Time
+from sunpy.time import TimeRange
+
+from hermpy.data import (
+    CrossingIntervalList,
+    DurationEventList,
+    EventList,
+    InstantEventList,
+)
+
+
+def _crossings() -> InstantEventList:
+    table = QTable(
+        {
+            "UTC": Time(
+                [
+                    "2011-06-01T12:00",
+                    "2011-06-01T00:00",
+                    "2011-06-01T06:00",
+                    "2011-06-02T00:00",
+                ]
+            ),
+            "Type": ["MP_IN", "BS_IN", "BS_OUT", "MP_OUT"],
+        }
+    )
+    return InstantEventList(table, time_column="UTC")
+
+
+class TestInstantEventList(TestCase):
+
+    def test_events_in(self):
+        crossings = _crossings()
+
+        events = crossings.events_in(TimeRange("2011-06-01T03:00", "2011-06-01T12:00"))
+
+        self.assertEqual(list(events["Type"]), ["BS_OUT"])
+
+    def test_nearest(self):
+        crossings = _crossings()
+
+        self.assertEqual(crossings.nearest(Time("2011-06-01T07:00")), 1)
+
+        indices = crossings.nearest(
+            np.array(["2011-05-01", "2011-06-01T10:00", "2011-07-01"], "datetime64[ns]")
+        )
+        np.testing.assert_array_equal(indices, [0, 2, 3])
+
+    def test_count_in_windows(self):
+        crossings = _crossings()
+
+        counts = crossings.count_in_windows(
+            Time(["2011-06-01T00:00", "2011-06-01T06:00", "2011-06-03"]),
+            Time(["2011-06-01T06:00", "2011-06-03T00:00", "2011-06-04"]),
+        )
+        np.testing.assert_array_equal(counts, [1, 3, 0])
+
+    def test_save_and_load(self):
+        crossings = _crossings()
+        crossings.table["X MSO"] = [1.0, 2.0, 3.0, 4.0] * u.km
+        crossings.table.meta["Source"] = "Test"
+
+        with tempfile.TemporaryDirectory() as directory:
+            crossings.save(directory)
+            loaded = EventList.load(directory, mmap=True)
+
+            self.assertIsInstance(loaded, InstantEventList)
+            self.assertEqual(loaded.table.meta["Source"], "Test")
+            self.assertEqual(list(loaded.table["Type"]), list(crossings.table["Type"]))
+            np.testing.assert_array_equal(loaded.time_index, crossings.time_index)
+            np.testing.assert_array_equal(
+                loaded.table["X MSO"].to_value(u.m), [1000, 2000, 3000, 4000]
+            )
+
+
+class TestDurationEventList(TestCase):
+
+    def setUp(self):
+        table = QTable(
+            {
+                "Start": Time(["2011-06-01T06:00", "2011-06-01T00:00"]),
+                "End": Time(["2011-06-01T12:00", "2011-06-01T04:00"]),
+                "Region": ["Magnetosheath", "Magnetosphere"],
+            }
+        )
+        self.intervals = DurationEventList(table, "Start", "End")
+
+    def test_interval_at(self):
+        samples = QTable(
+            {
+                "UTC": Time(
+                    ["2011-06-01T01:00", "2011-06-01T05:00", "2011-06-01T06:00"]
+                )
+            }
+        )
+
+        self.intervals.add_interval_column(samples)
+
+        np.testing.assert_array_equal(samples["Interval"], [0, -1, 1])
+        self.assertEqual(self.intervals.interval_at(Time("2011-06-01T12:00")), -1)
+
+    def test_overlapping(self):
+        overlapping = self.intervals.overlapping(
+            TimeRange("2011-06-01T03:00", "2011-06-01T07:00")
+        )
+        self.assertEqual(len(overlapping), 2)
+
+        overlapping = self.intervals.overlapping(
+            TimeRange("2011-06-01T04:00", "2011-06-01T06:00")
+        )
+        self.assertEqual(len(overlapping), 0)
+
+
+class TestCrossingIntervalList(TestCase):
+
+    def test_pairing(self):
+        crossings = _crossings()
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            intervals = CrossingIntervalList.from_crossings(crossings)
+
+        self.assertEqual(list(intervals.table["Label"]), ["Bow Shock", "Magnetopause"])
+        np.testing.assert_array_equal(intervals.table["Start Index"], [0, 2])
+        np.testing.assert_array_equal(intervals.table["End Index"], [1, 3])
+
+    def test_unmatched_crossings(self):
+        table = _crossings().table
+        table["Type"][3] = "MP_IN"
+        crossings = InstantEventList(table, time_column="UTC")
+
+        issues = CrossingIntervalList.validate(crossings)
+        np.testing.assert_array_equal(issues["Index"], [2, 3])
+
+        with self.assertRaises(ValueError):
+            CrossingIntervalList.from_crossings(crossings, strict=True)
+
+        with self.assertWarns(UserWarning):
+            intervals = CrossingIntervalList.from_crossings(crossings)
+        self.assertEqual(len(intervals), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
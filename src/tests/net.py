@@ -1,6 +1,9 @@
 import unittest
 from unittest import TestCase
 
+from astropy import units as u
+from sunpy.time import TimeRange
+
 from hermpy.net import ClientMESSENGER
 
 
@@ -19,5 +22,62 @@ class TestInstruments(TestCase):
         self.assertTrue(has_fips)
 
 
+class TestPlan(TestCase):
+
+    def test_product_choice(self):
+        client = ClientMESSENGER()
+
+        # A year to 10,000 points needs a sample every ~53 minutes
+        year = client.plan(
+            TimeRange("2011-06-01", "2012-05-31"), points=10_000, query=False
+        )
+        self.assertEqual(year.instrument, "MAG 60s")
+        self.assertEqual(year.files, 366)
+        self.assertGreaterEqual(year.points, 10_000)
+
+        hour = client.plan(
+            TimeRange("2011-06-01T00:00", "2011-06-01T01:00"), points=10_000, query=False
+        )
+        self.assertEqual(hour.instrument, "MAG")
+        self.assertEqual(hour.points, 72_000)
+
+        days = client.plan(
+            TimeRange("2011-06-01", "2011-06-02"), cadence=7 * u.s, query=False
+        )
+        self.assertEqual(days.instrument, "MAG 5s")
+        self.assertEqual(days.download_bytes, 2 * client.FILE_SIZE["MAG 5s"])
+
+        with self.assertWarns(UserWarning):
+            finest = client.plan(
+                TimeRange("2011-06-01", "2011-06-02"), cadence=1 * u.ms, query=False
+            )
+        self.assertEqual(finest.instrument, "MAG")
+
+        with self.assertRaises(ValueError):
+            client.plan(TimeRange("2011-06-01", "2011-06-02"))
+
+    def test_query(self):
+        client = ClientMESSENGER()
+
+        # Offline, the query for the chosen product is replaced
+        queried = []
+
+        def query(time_range, instrument, buffer=True):
+            queried.append(instrument)
+            urls = ["https://example.com/MAGMSOSCIAVG11152_60_V08.TAB"]
+            if buffer:
+                client._query_buffer.extend(urls)
+            return urls
+
+        client.query = query
+
+        plan = client.plan(TimeRange("2011-06-01", "2011-06-01T12:00"), cadence=1 * u.min)
+
+        self.assertEqual(queried, ["MAG 60s"])
+        self.assertEqual(plan.urls, tuple(client._query_buffer))
+        self.assertEqual(plan.files, 1)
+        self.assertIn("MAG 60s", str(plan))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from unittest import TestCase
+
+import numpy as np
+from astropy import units as u
+from astropy.table import QTable
+from astropy.time import Time
+
+from hermpy.data import OrbitList
+
+
+def _trajectory() -> QTable:
+    # An eccentric 12 hour orbit, sampled each minute for three days, with
+    # a gap covering the second day.
+    minutes = np.arange(3 * 24 * 60)
+    minutes = minutes[(minutes < 1440) | (minutes >= 2880)]
+
+    mean_anomaly = 2 * np.pi * (minutes / 720 + 0.5)
+    eccentric_anomaly = mean_anomaly.copy()
+    for _ in range(20):
+        eccentric_anomaly = mean_anomaly + 0.7 * np.sin(eccentric_anomaly)
+
+    return QTable(
+        {
+            "UTC": Time("2011-06-01") + minutes * u.min,
+            "X MSO": 10_000 * (np.cos(eccentric_anomaly) - 0.7) * u.km,
+            "Y MSO": 7_000 * np.sin(eccentric_anomaly) * u.km,
+            "Z MSO": np.zeros(len(minutes)) * u.km,
+        }
+    )
+
+
+class TestOrbitList(TestCase):
+
+    def test_segmentation(self):
+        trajectory = _trajectory()
+        orbits = OrbitList.from_timeseries(trajectory)
+
+        # Orbits 3 and 4 fall in the data gap
+        np.testing.assert_array_equal(orbits.table["Orbit"], [1, 2, 5, 6])
+        np.testing.assert_allclose(
+            orbits.table["Periapsis Distance"].to_value(u.km), 3000, rtol=1e-3
+        )
+
+        self.assertEqual(orbits[5]["Periapsis"].isot, "2011-06-03T06:00:00.000")
+
+        # The orbits either side of the gap end and start with the data
+        # rather than spanning it.
+        self.assertEqual(orbits[2]["End"].isot, "2011-06-01T23:59:00.000")
+        self.assertEqual(orbits[5]["Start"].isot, "2011-06-03T00:00:00.000")
+        self.assertEqual(orbits[5]["Start Offset"], orbits[2]["End Offset"] + 1)
+
+        samples = orbits.select(trajectory, 5)
+        np.testing.assert_array_equal(
+            samples["X MSO"], trajectory["X MSO"][orbits.sample_slice(5)]
+        )
+        self.assertEqual(len(samples), 720)
+
+
+if __name__ == "__main__":
+    unittest.main()
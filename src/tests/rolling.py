@@ -0,0 +1,115 @@
+import unittest
+from unittest import TestCase
+
+import numpy as np
+from astropy import units as u
+
+from hermpy.data import ArrayTimeseries, RollingStatistics, rolling_statistics
+
+
+class TestRollingStatistics(TestCase):
+
+    def setUp(self):
+        # 10 minutes at 1 Hz with a gap and some missing samples
+        rng = np.random.default_rng(0)
+        seconds = np.concatenate([np.arange(300), np.arange(360, 660)])
+        values = 100 + 10 * rng.normal(size=len(seconds))
+        values[[5, 6, 400]] = np.nan
+
+        self.seconds = seconds
+        self.values = values
+        self.timeseries = ArrayTimeseries(
+            seconds * 1_000_000_000, {"|B|": values}, {"|B|": u.nT}
+        )
+
+    def brute_force(self, window: float, statistic, centred: bool = False):
+        expected = []
+        for t in self.seconds:
+            if centred:
+                inside = (self.seconds >= t - window / 2) & (self.seconds < t + window / 2)
+            else:
+                inside = (self.seconds > t - window) & (self.seconds <= t)
+            values = self.values[inside]
+            values = values[np.isfinite(values)]
+            expected.append(statistic(values) if len(values) > 0 else np.nan)
+
+        return np.array(expected)
+
+    def test_statistics(self):
+        result = rolling_statistics(
+            self.timeseries, ["|B|"], [10, 60] * u.s, ("count", "mean", "std", "min", "max")
+        )
+
+        self.assertEqual(len(result), len(self.timeseries))
+        self.assertEqual(result.units["|B| std 60 s"], u.nT)
+        self.assertNotIn("|B| count 60 s", result.units)
+
+        for window in (10, 60):
+            for statistic, reference in (
+                ("mean", np.mean),
+                ("std", lambda v: np.std(v, ddof=1) if len(v) > 1 else np.nan),
+                ("min", np.min),
+                ("max", np.max),
+            ):
+                np.testing.assert_allclose(
+                    result[f"|B| {statistic} {window} s"],
+                    self.brute_force(window, reference),
+                    rtol=1e-10,
+                    err_msg=f"{statistic} {window} s",
+                )
+
+        # Just after the gap, only the new samples are in the window
+        self.assertEqual(result["|B| count 60 s"][300], 1)
+
+    def test_quantiles(self):
+        result = rolling_statistics(
+            self.timeseries,
+            ["|B|"],
+            30 * u.s,
+            ("mean",),
+            quantiles=(0.1, 0.5, 0.9),
+            alignment="centred",
+        )
+
+        bin_width = (np.nanmax(self.values) - np.nanmin(self.values)) / 64
+        for q in (0.1, 0.5, 0.9):
+            expected = self.brute_force(
+                30, lambda v: np.quantile(v, q, method="inverted_cdf"), centred=True
+            )
+            np.testing.assert_allclose(
+                result[f"|B| q{100 * q:g} 30 s"], expected, atol=bin_width, equal_nan=True
+            )
+
+    def test_streaming(self):
+        whole = rolling_statistics(
+            self.timeseries, ["|B|"], [10, 60] * u.s, alignment="centred"
+        )
+
+        rolling = RollingStatistics(["|B|"], [10, 60] * u.s, alignment="centred")
+        parts = [
+            rolling.update(self.timeseries[i : i + 100])
+            for i in range(0, len(self.timeseries), 100)
+        ]
+        parts.append(rolling.finish())
+
+        # Output is held back until the centred windows are complete
+        self.assertLess(len(parts[0]), 100)
+
+        streamed = ArrayTimeseries.concatenate(parts)
+        np.testing.assert_array_equal(streamed.time, whole.time)
+        for name in rolling.names:
+            np.testing.assert_allclose(streamed[name], whole[name], rtol=1e-12)
+
+        with self.assertRaises(ValueError):
+            rolling.update(self.timeseries[:10])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            RollingStatistics(["|B|"], 10 * u.s, ("median",))
+
+        with self.assertRaises(ValueError):
+            RollingStatistics(["|B|"], 10 * u.s, alignment="leading")
+
+
+if __name__ == "__main__":
+    unittest.main()
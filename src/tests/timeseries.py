@@ -0,0 +1,188 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+from astropy import units as u
+from astropy.table import QTable
+from sunpy.time import TimeRange
+
+from hermpy.data import (
+    ArrayTimeseries,
+    add_coordinate_frames,
+    add_field_magnitude,
+    parse_cache,
+    parse_messenger_mag,
+    precision_report,
+)
+
+
+def write_mag_file(path: Path, day_of_year: int, n_rows: int = 100) -> None:
+    """Write a synthetic full cadence MESSENGER MAG file, one row per second."""
+
+    rows = []
+    for i in range(n_rows):
+        hour, remainder = divmod(i, 3600)
+        minute, second = divmod(remainder, 60)
+        rows.append(
+            f"2011 {day_of_year:3d} {hour:02d} {minute:02d} {second:06.3f} "
+            f"{1000 + i:12.3f} "
+            f"{i:10.3f} {-i:10.3f} {2 * i:10.3f} "
+            f"{i / 10:9.3f} {-i / 10:9.3f} {1.5:9.3f}"
+        )
+
+    path.write_text("\n".join(rows) + "\n")
+
+
+class TestMAG(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = [Path(self.directory.name) / f"MAG{d}.TAB" for d in (152, 153)]
+        for path, day in zip(self.paths, (152, 153)):
+            write_mag_file(path, day)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_parse(self):
+        time_range = TimeRange("2011-06-01T00:00:10", "2011-06-02T00:00:05")
+
+        table = parse_messenger_mag(self.paths, time_range)
+        arrays = parse_messenger_mag(self.paths, time_range, as_arrays=True)
+
+        self.assertIsInstance(table, QTable)
+        self.assertIsInstance(arrays, ArrayTimeseries)
+
+        # 89 samples after the start of the first day, 5 on the second
+        self.assertEqual(len(table), 94)
+        self.assertEqual(table["UTC"][0].isot, "2011-06-01T00:00:11.000")
+        self.assertEqual(table["Bx"].unit, u.nT)
+
+        np.testing.assert_array_equal(table["X MSO"].to_value(u.km), arrays["X MSO"])
+
+    def test_preallocated_merge(self):
+        time_range = TimeRange("2011-06-01T00:00:10", "2011-06-02T00:00:05")
+
+        cached = parse_messenger_mag(self.paths, time_range, as_arrays=True)
+        uncached = parse_messenger_mag(
+            self.paths, time_range, as_arrays=True, use_cache=False
+        )
+
+        # Sized from the file sizes, then shrunk as most rows are outside
+        # of the time range.
+        self.assertEqual(len(uncached), 94)
+        self.assertIsNone(uncached["Bx"].base)
+        np.testing.assert_array_equal(uncached.time, cached.time)
+        np.testing.assert_array_equal(uncached["Bx"], cached["Bx"])
+
+        # Too small an estimate grows
+        merged = ArrayTimeseries.concatenate(iter([cached, cached]), capacity=10)
+        self.assertEqual(len(merged), 188)
+        np.testing.assert_array_equal(merged["Bx"][94:], cached["Bx"])
+
+    def test_reduced_precision(self):
+        time_range = TimeRange("2011-06-01", "2011-06-03")
+
+        parse_cache.clear()
+        reference = parse_messenger_mag(self.paths, time_range, as_arrays=True)
+        reduced = parse_messenger_mag(
+            self.paths, time_range, as_arrays=True, dtype=np.float32
+        )
+
+        # Each precision is cached separately
+        self.assertEqual(parse_cache.statistics.entries, 4)
+
+        self.assertEqual(reduced["Bx"].dtype, np.float32)
+        self.assertEqual(reduced["X MSO"].dtype, np.float64)
+        self.assertEqual(reduced.time.dtype, np.int64)
+
+        report = precision_report(reduced, reference)
+        bx = report[list(report["Column"]).index("Bx")]
+        self.assertLess(bx["Max absolute error"], 1e-3)
+        self.assertEqual(bx["Bytes"] * 2, bx["Reference bytes"])
+
+        with self.assertRaises(ValueError):
+            parse_messenger_mag(self.paths, time_range, dtype=int)
+
+    def test_round_trip(self):
+        table = parse_messenger_mag(self.paths, TimeRange("2011-06-01", "2011-06-03"))
+
+        arrays = ArrayTimeseries.from_qtable(table)
+        self.assertTrue(np.shares_memory(arrays["Bx"], table["Bx"]))
+
+        round_trip = arrays.to_qtable()
+        self.assertTrue(np.shares_memory(round_trip["Bx"], table["Bx"]))
+        self.assertTrue(all(round_trip["UTC"] == table["UTC"]))
+
+    def test_field_magnitude(self):
+        arrays = parse_messenger_mag(
+            self.paths, TimeRange("2011-06-01", "2011-06-03"), as_arrays=True
+        )
+
+        with_magnitude = add_field_magnitude(arrays)
+
+        self.assertNotIn("|B|", arrays)
+        self.assertIs(with_magnitude["Bx"], arrays["Bx"])
+        np.testing.assert_allclose(
+            with_magnitude.quantity("|B|"),
+            add_field_magnitude(arrays.to_qtable())["|B|"],
+        )
+
+
+class TestDerivedColumns(TestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+        def double(timeseries):
+            self.calls += 1
+            return 2 * timeseries["a"]
+
+        self.timeseries = ArrayTimeseries(np.arange(5), {"a": np.arange(5.0)})
+        self.timeseries.register_derived("2a", double, ["a"], "nT")
+        self.timeseries.register_derived("4a", lambda ts: 2 * ts["2a"], ["2a"], "nT")
+
+    def test_lazy_and_cached(self):
+        self.assertEqual(self.calls, 0)
+        self.assertIn("4a", self.timeseries.colnames)
+
+        np.testing.assert_array_equal(self.timeseries["4a"], 4 * np.arange(5.0))
+        self.timeseries["2a"]
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.timeseries.quantity("2a").unit, u.nT)
+
+    def test_invalidation(self):
+        self.timeseries["4a"]
+
+        # Replacing a source column invalidates its dependents, transitively
+        self.timeseries["a"] = np.ones(5)
+        np.testing.assert_array_equal(self.timeseries["4a"], np.full(5, 4.0))
+        self.assertEqual(self.calls, 2)
+
+    def test_coordinate_frames(self):
+        timeseries = ArrayTimeseries(
+            np.arange(3),
+            {"X MSO": np.ones(3), "Y MSO": np.zeros(3), "Z MSO": np.zeros(3)},
+            {c: u.km for c in ("X MSO", "Y MSO", "Z MSO")},
+        )
+        calls = []
+
+        def aberration(_):
+            calls.append(1)
+            return np.full(3, 90.0)
+
+        # Nothing aberrated is computed until it is accessed
+        timeseries.register_derived("Aberration Angle", aberration, [], u.deg)
+        add_coordinate_frames(timeseries)
+        self.assertIn("X MSM'", timeseries.colnames)
+        self.assertEqual(len(calls), 0)
+
+        np.testing.assert_allclose(timeseries["Y MSM'"], 1)
+        np.testing.assert_allclose(timeseries["Magnetic Local Time"], 18)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
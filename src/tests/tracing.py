@@ -0,0 +1,78 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+from sunpy.time import TimeRange
+
+from hermpy.data import parse_cache, parse_messenger_mag
+from hermpy.utils import tracing
+from tests.timeseries import write_mag_file
+
+
+class TestTracing(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "MAG152.TAB"
+        write_mag_file(self.path, 152)
+
+        self.time_range = TimeRange("2011-06-01", "2011-06-02")
+        parse_cache.clear()
+
+    def tearDown(self):
+        tracing.reset()
+        self.directory.cleanup()
+
+    def test_disabled(self):
+        tracing.reset()
+        parse_messenger_mag([self.path], self.time_range)
+
+        self.assertFalse(tracing.is_enabled())
+        self.assertEqual(len(tracing.summary()), 0)
+
+    def test_spans(self):
+        with tracing.enabled():
+            parse_messenger_mag([self.path], self.time_range)
+            parse_messenger_mag([self.path], self.time_range)
+
+        summary = tracing.summary()
+        spans = dict(zip(summary["Span"], summary["Calls"]))
+
+        self.assertEqual(spans["parse_messenger_mag"], 2)
+        # The second call is served from the cache
+        self.assertEqual(spans["parse_messenger_mag.tokenise"], 1)
+        self.assertEqual(tracing.counters()["parse_cache.hit_rate"], 0.5)
+
+        rows = dict(zip(summary["Span"], summary["rows"]))
+        self.assertEqual(rows["parse_messenger_mag"], 2 * 99)
+
+        trace_path = tracing.export_chrome_trace(Path(self.directory.name) / "trace.json")
+        events = json.loads(trace_path.read_text())["traceEvents"]
+        self.assertIn("parse_messenger_mag.time", {event["name"] for event in events})
+
+    def test_lazy_counters(self):
+        calls = []
+
+        def size() -> int:
+            calls.append(1)
+            return self.path.stat().st_size
+
+        # Only evaluated when tracing
+        with tracing.span(lambda: "read", bytes=size) as read_span:
+            read_span.add(bytes=size)
+        self.assertEqual(len(calls), 0)
+
+        with tracing.enabled():
+            with tracing.span(lambda: "read", bytes=size) as read_span:
+                read_span.add(bytes=size)
+
+        summary = tracing.summary()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(list(summary["Span"]), ["read"])
+        self.assertEqual(summary["bytes"][0], 2 * self.path.stat().st_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
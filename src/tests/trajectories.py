@@ -0,0 +1,53 @@
+import datetime as dt
+import tempfile
+import unittest
+from unittest import TestCase
+
+import numpy as np
+import spiceypy as spice
+from astropy import units as u
+from astropy.time import Time
+
+from hermpy.data.trajectories import _get_aberration_angle_single, get_aberration_angle
+from spice_fixtures import write_spice_kernels
+
+
+class TestAberrationAngle(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Synthetic kernels, so this runs offline
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.kernels = [str(k) for k in write_spice_kernels(cls.directory.name)]
+
+        spice.furnsh(cls.kernels)
+
+    @classmethod
+    def tearDownClass(cls):
+        spice.unload(cls.kernels)
+        cls.directory.cleanup()
+
+    def test_representations(self):
+        datetimes = [
+            dt.datetime(2011, 6, 1, 12),
+            dt.datetime(2011, 6, 2),
+            dt.datetime(2011, 6, 1),
+        ]
+        expected = np.squeeze(
+            u.Quantity([_get_aberration_angle_single(d.date()) for d in datetimes])
+        )
+
+        for times in (
+            datetimes,
+            Time(datetimes),
+            np.array(datetimes, dtype="datetime64[ns]"),
+            np.array(datetimes, dtype="datetime64[ns]").view(np.int64),
+        ):
+            np.testing.assert_array_equal(get_aberration_angle(times), expected)
+
+        self.assertEqual(get_aberration_angle(dt.date(2011, 6, 2)), expected[1])
+        self.assertTrue(get_aberration_angle(dt.date(2011, 6, 2)).isscalar)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from unittest import TestCase
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import numpy as np
+from astropy import units as u
+
+from hermpy.data import ArrayTimeseries, dynamic_spectrum
+from hermpy.plotting import SpectrogramPanel
+
+
+class TestDynamicSpectrum(TestCase):
+
+    def setUp(self):
+        # 20 minutes at 20 Hz: a 1 Hz wave in Bx, and white noise in By
+        rng = np.random.default_rng(0)
+        n = 20 * 1200
+        times = np.arange(n) * 50_000_000
+
+        self.timeseries = ArrayTimeseries(
+            times,
+            {
+                "Bx": 3 * np.sin(2 * np.pi * times / 1e9),
+                "By": rng.normal(0, 1, n),
+                "Bz": np.full(n, 100.0),
+            },
+            {c: u.nT for c in ("Bx", "By", "Bz")},
+        )
+
+    def test_fft(self):
+        spectra = dynamic_spectrum(self.timeseries, ["Bx", "By", "B Parallel"])
+
+        self.assertEqual(spectra.sizes["UTC"], 39)
+        self.assertEqual(spectra["Bx"].attrs["units"], "nT2 / Hz")
+
+        peak = spectra["Bx"].mean("UTC").idxmax("Frequency")
+        self.assertAlmostEqual(float(peak), 1.0)
+
+        # The power spectral density of unit white noise is 2 dt
+        self.assertAlmostEqual(float(spectra["By"].mean()), 0.1, delta=0.005)
+
+        # Parseval: the variance of the wave is 4.5 nT^2
+        edges = np.array(spectra["Bx"].attrs["Frequency Edges"])
+        variance = np.sum(spectra["Bx"].mean("UTC").values * np.diff(edges))
+        self.assertAlmostEqual(variance, 4.5, delta=0.1)
+
+        # Streaming over chunks gives the same result
+        chunks = (self.timeseries[i : i + 5000] for i in range(0, len(self.timeseries), 5000))
+        streamed = dynamic_spectrum(chunks, ["Bx", "By", "B Parallel"])
+        np.testing.assert_allclose(streamed["Bx"], spectra["Bx"])
+
+    def test_spectrogram_panel(self):
+        spectra = dynamic_spectrum(self.timeseries, ["Bx"])
+
+        # Each window is drawn centred on its time, and none are dropped
+        figure, ax = plt.subplots()
+        SpectrogramPanel(spectra["Bx"])._plot_on(ax)
+        mesh = ax.collections[0]
+        plt.close(figure)
+
+        self.assertEqual(mesh.get_array().shape, (spectra.sizes["Frequency"], 39))
+
+        time_edges = mesh.get_coordinates()[0, :, 0]
+        centres = mdates.date2num(spectra["UTC"].values)
+        np.testing.assert_allclose((time_edges[:-1] + time_edges[1:]) / 2, centres)
+
+    def test_wavelet(self):
+        spectra = dynamic_spectrum(
+            self.timeseries, ["Bx"], method="wavelet", window=30 * u.s, step=10 * u.s
+        )
+
+        self.assertEqual(spectra.sizes["UTC"], 120)
+
+        peak = spectra["Bx"].mean("UTC").idxmax("Frequency")
+        self.assertAlmostEqual(float(peak), 1.0, delta=0.05)
+
+    def test_gaps(self):
+        with_gap = self.timeseries[np.r_[0:10_000, 12_000:len(self.timeseries)]]
+
+        spectra = dynamic_spectrum(with_gap, ["By"])
+        # Two windows span the gap
+        self.assertEqual(int(np.isnan(spectra["By"][:, 0]).sum()), 2)
+
+        with self.assertRaises(ValueError):
+            dynamic_spectrum(self.timeseries, ["Bq"])
+
+
+if __name__ == "__main__":
+    unittest.main()